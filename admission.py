@@ -0,0 +1,193 @@
+# admission.py
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# ----------------------------------------
+# ✅ 요청 허용 제어 (클라이언트별 토큰 버킷 + 외부 API 별 동시 호출 상한)
+# ----------------------------------------
+
+class AdmissionRejected(Exception):
+    """한도를 넘어 요청을 받지 않은 경우 (retry_after: 다시 시도할 때까지 권장 대기 초)"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def parse_limits(spec, defaults=None):
+    """"endpoint=rate/burst,..." → {endpoint: (rate, burst)}  ("endpoint=off" 는 제한 해제, "off" 는 전체 해제)
+
+    예) RATE_LIMITS="chatbot_unified_chat=0.2/5,reverse_geocode=off"
+    """
+    limits = dict(defaults or {})
+    for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+        if part == "off":
+            limits.clear()
+            continue
+        endpoint, _, value = part.partition("=")
+        if value.strip() == "off":
+            limits.pop(endpoint.strip(), None)
+            continue
+        rate, _, burst = value.partition("/")
+        limits[endpoint.strip()] = (float(rate), float(burst or 1))
+    return limits
+
+
+class MemoryBucketStore:
+    """프로세스 메모리의 토큰 버킷 (키 수가 max_keys 를 넘으면 가장 오래 안 쓰인 키부터 제거)"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> [tokens, updated]
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        """토큰 하나를 쓰면 0, 없으면 토큰이 찰 때까지의 초를 반환합니다."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBucketStore:
+    """여러 gunicorn 워커가 공유하는 SQLite 토큰 버킷 (UPSERT ... RETURNING 한 문장으로 갱신)"""
+
+    def __init__(self, db_path, purge_every=10000, idle_ttl=3600):
+        self.db_path = db_path
+        self.purge_every = purge_every  # take() 이 횟수마다 idle_ttl 초 넘게 안 쓰인 버킷을 지웁니다.
+        self.idle_ttl = idle_ttl
+        self._calls = 0
+        self._local = threading.local()
+        # 테이블만 만들고 연결은 닫습니다. (프리포크 서버에서 연결이 fork 를 건너가지 않도록 - 스레드별 연결은 첫 take() 때)
+        conn = sqlite3.connect(db_path, timeout=5, isolation_level=None)
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_bucket (
+                    bucket_key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    allowed INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # 버킷 상태는 잃어도 되는 값
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, rate, burst, now):
+        self._calls += 1
+        if self._calls % self.purge_every == 0:
+            self.purge_idle(self.idle_ttl)
+        # 시간(updated)은 벽시계 기준 - 워커끼리 같은 시계를 써야 합니다.
+        row = self._connect().execute("""
+            INSERT INTO rate_bucket (bucket_key, tokens, updated, allowed) VALUES (:key, :burst - 1, :now, 1)
+            ON CONFLICT (bucket_key) DO UPDATE SET
+                allowed = min(:burst, tokens + (:now - updated) * :rate) >= 1,
+                tokens = min(:burst, tokens + (:now - updated) * :rate)
+                         - (min(:burst, tokens + (:now - updated) * :rate) >= 1),
+                updated = :now
+            RETURNING tokens, allowed
+        """, {"key": key, "rate": rate, "burst": burst, "now": now}).fetchone()
+        return 0.0 if row[1] else (1 - row[0]) / rate
+
+    def purge_idle(self, older_than):
+        """older_than 초 동안 쓰이지 않은 버킷을 지웁니다. (다시 가득 찼을 버킷이므로 지워도 동작은 같음)"""
+        return self._connect().execute(
+            "DELETE FROM rate_bucket WHERE updated < ?", (time.time() - older_than,)
+        ).rowcount
+
+
+class ClientRateLimiter:
+    """(엔드포인트, 클라이언트)별 토큰 버킷. limits: {endpoint: (초당 rate, burst)} - 없는 엔드포인트는 제한 없음"""
+
+    def __init__(self, limits, store=None):
+        self.limits = limits
+        self.store = store or MemoryBucketStore()
+        self.clock = time.time if isinstance(self.store, SQLiteBucketStore) else time.monotonic
+        self.rejected = {}
+        self._lock = threading.Lock()
+
+    def check(self, endpoint, client):
+        """허용되면 None, 거부되면 AdmissionRejected 를 던집니다."""
+        limit = self.limits.get(endpoint)
+        if limit is None:
+            return
+        rate, burst = limit
+        wait = self.store.take(f"{endpoint}|{client}", rate, burst, self.clock())
+        if wait > 0:
+            with self._lock:
+                self.rejected[endpoint] = self.rejected.get(endpoint, 0) + 1
+            raise AdmissionRejected("요청이 너무 많습니다. 잠시 후 다시 시도해 주세요.", wait)
+
+    def snapshot_stats(self):
+        with self._lock:
+            rejected = dict(self.rejected)
+        return {
+            "limits": {endpoint: {"rate": rate, "burst": burst} for endpoint, (rate, burst) in self.limits.items()},
+            "rejected": rejected,
+            "store": type(self.store).__name__,
+        }
+
+
+class UpstreamLimiter:
+    """외부 API(openai, google_cse, nominatim)별 동시 호출 수 상한 (프로세스 단위)
+
+    자리가 없으면 max_wait 초까지 기다렸다가 그래도 없으면 AdmissionRejected 를 던집니다.
+    """
+
+    def __init__(self, caps, max_wait=0.5, retry_after=2):
+        self.caps = caps  # {upstream: 동시 호출 상한}
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self._slots = {name: threading.BoundedSemaphore(cap) for name, cap in caps.items()}
+        self.stats = {name: {"in_flight": 0, "max_in_flight": 0, "rejected": 0} for name in caps}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, upstream):
+        semaphore = self._slots.get(upstream)
+        if semaphore is None:  # 상한이 없는 외부 API
+            yield
+            return
+        stats = self.stats[upstream]
+        if not semaphore.acquire(timeout=self.max_wait):
+            with self._lock:
+                stats["rejected"] += 1
+            raise AdmissionRejected(f"{upstream} 호출이 많아 잠시 후 다시 시도해 주세요.", self.retry_after)
+        with self._lock:
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            yield
+        finally:
+            with self._lock:
+                stats["in_flight"] -= 1
+            semaphore.release()
+
+    def snapshot_stats(self):
+        with self._lock:
+            return {name: {"cap": self.caps[name], **stats} for name, stats in self.stats.items()}
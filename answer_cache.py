@@ -0,0 +1,182 @@
+# answer_cache.py
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from cache_utils import SingleFlight
+from search_cache import normalize_query
+
+# ----------------------------------------
+# ✅ 질문 정규화 (의도 표현 제거 → 핵심 물품어만 남김)
+# ----------------------------------------
+
+# "어떻게 버려요", "버리는 방법" 처럼 물품과 무관한 질문 표현 (토큰 단위로 제거)
+INTENT_WORDS = {
+    "어떻게", "어떡해", "어떡해요", "어디에", "어디", "뭐야", "뭐예요", "무엇", "알려줘", "알려주세요",
+    "버려요", "버려야", "버려야해", "버려야해요", "버리나요", "버리는", "버리기", "버릴", "버려", "버리면",
+    "버리면돼", "버리면돼요", "버리면되나요", "버림", "방법", "방식", "법", "분리수거", "분리배출", "배출",
+    "배출해요", "배출하나요", "배출방법", "하나요", "해요", "되나요", "돼요", "하면", "해야", "해야해요",
+    "인가요", "나요", "요", "좀", "그냥", "혹시", "재활용", "재활용돼요", "재활용되나요", "가능", "가능해요",
+}
+
+# 물품어 끝에 붙는 조사 ("비닐은", "페트병을" → "비닐", "페트병")
+PARTICLES = ("은", "는", "이", "가", "을", "를", "도", "만", "랑", "이랑", "하고", "의")
+
+
+def question_tokens(question):
+    """질문에서 의도 표현과 조사를 걷어낸 핵심 토큰 목록 (전부 걸러지면 원문 토큰 사용)"""
+    tokens = normalize_query(question).split()
+    content = []
+    for token in tokens:
+        if token in INTENT_WORDS:
+            continue
+        for particle in sorted(PARTICLES, key=len, reverse=True):
+            if len(token) > len(particle) + 1 and token.endswith(particle):
+                token = token[: -len(particle)]
+                break
+        content.append(token)
+    return content or tokens
+
+
+def shingles(question, n=(2, 3)):
+    """핵심 토큰의 문자 n-gram 집합 (토큰 자체도 포함)"""
+    result = set()
+    for token in question_tokens(question):
+        result.add(token)
+        padded = f"^{token}$"
+        for size in n:
+            for i in range(len(padded) - size + 1):
+                result.add(padded[i:i + size])
+    return result
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+# ----------------------------------------
+# ✅ MinHash + LSH 기반 유사 질문 답변 캐시
+# ----------------------------------------
+
+_PRIME = (1 << 61) - 1
+
+
+class AnswerCache:
+    """(정규화된 질문, 사용자 위치) 단위로 챗봇 답변을 캐싱하고, 비슷한 질문도 같은 답변으로 찾습니다.
+
+    질문을 문자 n-gram MinHash 서명으로 만든 뒤 LSH 밴드로 후보를 좁히고,
+    후보의 실제 Jaccard 유사도가 threshold 이상이면 적중으로 봅니다.
+    위치가 다르면 같은 질문이라도 다른 항목입니다. (지역별 규정이 다르므로)
+    """
+
+    def __init__(self, maxsize=2000, ttl=86400, threshold=0.6, num_perm=64, bands=16, seed=1):
+        assert num_perm % bands == 0
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+        self._entries = OrderedDict()  # entry_key -> entry (LRU 순서)
+        self._buckets = {}             # (location, band, band_hash) -> set(entry_key)
+        self._lock = threading.Lock()
+        self.flight = SingleFlight()
+        self.stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def location_key(location):
+        return normalize_query(location if location and location != "알수없음" else "")
+
+    def entry_key(self, question, location):
+        """정확히 같은 질문(정규화 후)과 위치에 대한 키 - single-flight 키로도 사용"""
+        return self.location_key(location), " ".join(question_tokens(question))
+
+    def _signature(self, shingle_set):
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingle_set]
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, location, signature):
+        rows = self.rows
+        return [(location, band, hash(tuple(signature[band * rows:(band + 1) * rows])))
+                for band in range(self.bands)]
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        for band_key in entry["band_keys"]:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def lookup(self, question, location):
+        """캐시된 답변 항목(dict: response, sources, similarity)을 반환합니다. 없으면 None."""
+        key = self.entry_key(question, location)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires_at"] > now:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return {"response": entry["response"], "sources": entry["sources"], "similarity": 1.0}
+
+        shingle_set = shingles(question)
+        band_keys = self._band_keys(key[0], self._signature(shingle_set))
+
+        with self._lock:
+            candidates = set()
+            for band_key in band_keys:
+                candidates |= self._buckets.get(band_key, set())
+
+            best_key, best_score = None, 0.0
+            for candidate in candidates:
+                entry = self._entries[candidate]
+                if entry["expires_at"] <= now:
+                    continue
+                score = jaccard(shingle_set, entry["shingles"])
+                if score > best_score:
+                    best_key, best_score = candidate, score
+
+            if best_key is None or best_score < self.threshold:
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.stats["similar_hits"] += 1
+            entry = self._entries[best_key]
+            return {"response": entry["response"], "sources": entry["sources"], "similarity": round(best_score, 3)}
+
+    def store(self, question, location, response, sources):
+        key = self.entry_key(question, location)
+        shingle_set = shingles(question)
+        band_keys = self._band_keys(key[0], self._signature(shingle_set))
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {
+                "response": response,
+                "sources": sources,
+                "shingles": shingle_set,
+                "band_keys": band_keys,
+                "expires_at": time.time() + self.ttl,
+            }
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, set()).add(key)
+            self.stats["stores"] += 1
+
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        return stats
@@ -1,28 +1,311 @@
-import requests
+import io
+import hashlib
 import os
-import sqlite3
-import json 
-from flask import Flask, render_template, request, jsonify, g 
-from openai import OpenAI 
+import json
+import threading
+import time
+import click
+from flask import Blueprint, Flask, Response, render_template, request, jsonify, g, stream_with_context
+from guide_cache import guide_cache
+from guide_search import search_guide_items
+from guide_pages import (CATEGORY_FIELDS, DEFAULT_CATEGORY_FIELDS, DEFAULT_DETAIL_FIELDS, DEFAULT_LIST_FIELDS,
+                         ITEM_FIELDS, MAX_PAGE_SIZE, InvalidFields, category_index_cache, load_category_items,
+                         load_item, parse_fields)
+from geocode_cache import GeocodeCache, UpstreamRateLimited
+from district_resolver import load_district_resolver, location_from_nominatim, make_location
+from search_cache import SearchCache
+from answer_cache import AnswerCache
+from http_client import OutboundClient, UpstreamUnavailable, retry_after_seconds
+from image_processing import ImageTooLarge, InvalidImage, decode_data_url, prepare_vision_image, to_data_url
+from vision_cache import VisionCache, dhash
+from chat_router import ChatRouter
+from conversation import SessionStore, estimate_prompt_tokens
+from district_aliases import district_directory
+from collection_schedule import ScheduleNotSeeded, normalize_item, parse_moment, schedule_index
+from db_pool import ConnectionPool
+from metrics import histogram_lines, record, registry, server_timing_header, span
+from static_assets import AssetServer
+from vision_jobs import QueueFull, VisionJobQueue
+from admission import AdmissionRejected, ClientRateLimiter, MemoryBucketStore, SQLiteBucketStore, UpstreamLimiter, parse_limits
 
 # ----------------------------------------
-# ✅ 환경 변수 및 API 클라이언트 초기화
+# ✅ 설정 (환경 변수 - create_app(config) 로 일부를 덮어쓸 수 있음)
 # ----------------------------------------
-openai_api_key = os.environ.get("OPENAI_API_KEY")
-GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
-GOOGLE_CSE_CX = os.environ.get("GOOGLE_CSE_CX")
-GOOGLE_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
-
-# API 키가 설정되지 않은 경우 경고/오류 처리 (강화)
-if not openai_api_key:
-    print("❌ 치명적 오류: OPENAI_API_KEY 환경 변수가 설정되지 않았습니다.")
-if not GOOGLE_API_KEY or not GOOGLE_CSE_CX:
-    print("❌ 경고: Google Search API 키 또는 CX ID가 설정되지 않았습니다. 챗봇 출처 기능이 작동하지 않을 수 있습니다.")
-    
-client = OpenAI(api_key=openai_api_key) 
 
-app = Flask(__name__)
-DATABASE = 'smart_recycle.db'
+# 요청 허용 제어: 엔드포인트별 클라이언트 토큰 버킷 (초당 rate / burst) - RATE_LIMITS 로 덮어쓰기
+DEFAULT_RATE_LIMITS = {
+    "chatbot_unified_chat": (0.2, 5),         # 분당 12회, 연속 5회
+    "chatbot_unified_chat_stream": (0.2, 5),
+    "create_vision_job": (0.1, 3),
+    "reverse_geocode": (1, 10),
+    "resolve_district": (2, 20),
+    "bootstrap": (1, 10),
+}
+
+
+def load_config(environ=os.environ):
+    """환경 변수 → 설정 dict (import 할 때가 아니라 create_app() 이 부를 때 읽습니다)"""
+    return {
+        "OPENAI_API_KEY": environ.get("OPENAI_API_KEY"),
+        "GOOGLE_API_KEY": environ.get("GOOGLE_API_KEY"),
+        "GOOGLE_CSE_CX": environ.get("GOOGLE_CSE_CX"),
+        # 외부 API 주소 (벤치마크에서는 로컬 스텁 서버로 바꿔 지정)
+        "GOOGLE_SEARCH_URL": environ.get("GOOGLE_SEARCH_URL", "https://www.googleapis.com/customsearch/v1"),
+        "NOMINATIM_REVERSE_URL": environ.get("NOMINATIM_REVERSE_URL", "https://nominatim.openstreetmap.org/reverse"),
+        "NOMINATIM_RATE_LIMIT": float(environ.get("NOMINATIM_RATE_LIMIT", "1.0")),  # 초당 호출 수 (Nominatim 이용 정책: 1회)
+
+        "DATABASE": environ.get("DATABASE", "smart_recycle.db"),
+        # 캐시 전용 SQLite 파일 (서비스 DB와 분리 - 모든 워커가 공유)
+        "CACHE_DATABASE": environ.get("CACHE_DATABASE", "cache.db"),
+        "GEOCODE_GEOHASH_PRECISION": int(environ.get("GEOCODE_GEOHASH_PRECISION", "7")),
+        "SEARCH_CACHE_TTL": int(environ.get("SEARCH_CACHE_TTL", str(7 * 86400))),        # 성공 결과 보관 (초)
+        "SEARCH_CACHE_NEGATIVE_TTL": int(environ.get("SEARCH_CACHE_NEGATIVE_TTL", "300")),  # 실패 결과 보관 (초)
+        "ANSWER_CACHE_SIZE": int(environ.get("ANSWER_CACHE_SIZE", "2000")),
+        "ANSWER_CACHE_TTL": int(environ.get("ANSWER_CACHE_TTL", "86400")),
+        "ANSWER_CACHE_THRESHOLD": float(environ.get("ANSWER_CACHE_THRESHOLD", "0.6")),  # 유사 질문 판정 Jaccard 하한
+        "UPSTREAM_CONNECT_TIMEOUT": float(environ.get("UPSTREAM_CONNECT_TIMEOUT", "3")),
+        "UPSTREAM_READ_TIMEOUT": float(environ.get("UPSTREAM_READ_TIMEOUT", "10")),
+        "UPSTREAM_MAX_RETRIES": int(environ.get("UPSTREAM_MAX_RETRIES", "2")),
+        "MAX_UPLOAD_BYTES": int(environ.get("MAX_UPLOAD_BYTES", str(12 * 1024 * 1024))),  # 요청 본문 상한 (디코딩 전 거부)
+        "MAX_IMAGE_PIXELS": int(environ.get("MAX_IMAGE_PIXELS", "50000000")),             # 이미지 헤더 기준 픽셀 수 상한
+        "VISION_CACHE_SIZE": int(environ.get("VISION_CACHE_SIZE", "1000")),
+        "VISION_CACHE_TTL": int(environ.get("VISION_CACHE_TTL", str(7 * 86400))),
+        "VISION_CACHE_MAX_DISTANCE": int(environ.get("VISION_CACHE_MAX_DISTANCE", "5")),  # 같은 사진으로 볼 dHash 해밍 거리
+        "CHAT_ROUTER_ANSWER_THRESHOLD": float(environ.get("CHAT_ROUTER_ANSWER_THRESHOLD", "0.6")),    # 이상이면 LLM 없이 가이드로 답변
+        "CHAT_ROUTER_CONTEXT_THRESHOLD": float(environ.get("CHAT_ROUTER_CONTEXT_THRESHOLD", "0.25")),  # 이상이면 웹 검색 대신 가이드를 컨텍스트로
+        "VISION_WORKERS": int(environ.get("VISION_WORKERS", "2")),            # OpenAI 로 동시에 보내는 Vision 호출 수
+        "VISION_QUEUE_SIZE": int(environ.get("VISION_QUEUE_SIZE", "32")),     # 넘으면 429 + Retry-After
+        "VISION_JOB_TTL": int(environ.get("VISION_JOB_TTL", "600")),          # 끝난 작업 결과 보관 (초)
+        "VISION_JOB_MAX_WAIT": float(environ.get("VISION_JOB_MAX_WAIT", "25")),  # 롱 폴링 최대 대기 (초)
+        # 챗봇 대화 세션 (프로세스 메모리, LRU): 세션 수/메모리 상한, 유휴 만료, 세션당 원문 턴 수와 토큰 예산
+        "CHAT_SESSION_MAX": int(environ.get("CHAT_SESSION_MAX", "10000")),
+        "CHAT_SESSION_MAX_BYTES": int(environ.get("CHAT_SESSION_MAX_BYTES", str(64 * 1024 * 1024))),
+        "CHAT_SESSION_TTL": int(environ.get("CHAT_SESSION_TTL", "3600")),
+        "CHAT_SESSION_MAX_TURNS": int(environ.get("CHAT_SESSION_MAX_TURNS", "8")),
+        "CHAT_HISTORY_TOKEN_BUDGET": int(environ.get("CHAT_HISTORY_TOKEN_BUDGET", "1500")),  # 프롬프트에 붙일 최근 턴 원문
+        "CHAT_SUMMARY_TOKEN_BUDGET": int(environ.get("CHAT_SUMMARY_TOKEN_BUDGET", "300")),   # 밀려난 턴 요약
+
+        "RATE_LIMITS": parse_limits(environ.get("RATE_LIMITS"), DEFAULT_RATE_LIMITS),  # 예: "reverse_geocode=0.5/5,bootstrap=off"
+        "RATE_LIMIT_DATABASE": environ.get("RATE_LIMIT_DATABASE"),  # 지정하면 gunicorn 워커끼리 버킷 공유 (예: cache.db)
+        "TRUST_PROXY_HEADERS": environ.get("TRUST_PROXY_HEADERS", "0") == "1",  # 리버스 프록시 뒤: X-Forwarded-For 로 클라이언트 구분
+        # 외부 API 별 동시 호출 상한 (프로세스 단위)과 자리를 기다리는 최대 시간
+        "UPSTREAM_INFLIGHT_CAPS": {
+            "openai": int(environ.get("UPSTREAM_MAX_INFLIGHT_OPENAI", "8")),
+            "google_cse": int(environ.get("UPSTREAM_MAX_INFLIGHT_GOOGLE_CSE", "4")),
+            "nominatim": int(environ.get("UPSTREAM_MAX_INFLIGHT_NOMINATIM", "1")),
+        },
+        "UPSTREAM_ADMISSION_WAIT": float(environ.get("UPSTREAM_ADMISSION_WAIT", "0.5")),
+
+        # SQLite 읽기 연결 풀 설정
+        "SQLITE_MMAP_SIZE": int(environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        "SQLITE_CACHE_SIZE_KIB": int(environ.get("SQLITE_CACHE_SIZE_KIB", str(16 * 1024))),
+        "SQLITE_CACHED_STATEMENTS": int(environ.get("SQLITE_CACHED_STATEMENTS", "512")),
+        "SQLITE_POOL_MAX_IDLE": int(environ.get("SQLITE_POOL_MAX_IDLE", "16")),
+
+        # python static_assets.py 로 만든 이미지 변형 / 해시 파일명 JS·CSS 위치
+        "STATIC_DIST_DIR": environ.get("STATIC_DIST_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "dist")),
+        # 시/군/구 경계 GeoJSON (properties: city_name / district_name - city_district 테이블과 같은 표기)
+        "DISTRICT_GEOJSON": environ.get("DISTRICT_GEOJSON", "static/data/districts.geojson"),
+        # 가이드 유사도 색인(NumPy) 저장 위치 - 지정하면 워커/재시작 프로세스가 같은 버전을 메모리 매핑으로 공유
+        "GUIDE_INDEX_DIR": environ.get("GUIDE_INDEX_DIR") or None,
+        # 비우면 정확한 검색. 정수면 질의당 그만큼만 읽는 근사 검색 (빠르지만 1위가 바뀔 수 있음 - 라우터가 잘못 답할 수 있음)
+        "GUIDE_INDEX_POSTINGS_BUDGET": int(environ["GUIDE_INDEX_POSTINGS_BUDGET"]) if environ.get("GUIDE_INDEX_POSTINGS_BUDGET") else None,
+        # 1 이면 create_app() 에서 가이드/지역 캐시와 OpenAI SDK 를 미리 올림 (gunicorn --preload 와 함께)
+        "WARM_CACHES": environ.get("WARM_CACHES", "0") == "1",
+    }
+
+
+# create_app() 이 채우는 현재 설정 (Vision 워커 스레드에서도 읽으므로 current_app.config 대신 모듈 변수)
+settings = {}
+
+bp = Blueprint("smart_recycle", __name__)
+
+
+# ----------------------------------------
+# ✅ 앱 생성 (gunicorn --preload -w 4 'app:create_app()')
+# ----------------------------------------
+def create_app(config=None):
+    """설정을 읽고 캐시/연결 풀/클라이언트를 만든 뒤 라우트를 등록한 앱을 반환합니다.
+
+    - DB 는 읽기만 합니다. 마이그레이션/시드는 `flask --app app init-db` (또는 static/data/db_init.py) 로 따로 실행합니다.
+    - OpenAI SDK 와 외부 HTTP 세션은 처음 쓸 때 만듭니다. (import 만 1초 가까이 걸리는 SDK 를 시작 경로에서 제외)
+    - WARM_CACHES 이면 캐시를 미리 채우고 SQLite 연결을 모두 닫으므로, 마스터에서 만들고 워커를 fork 해도 됩니다.
+    """
+    settings.clear()
+    settings.update(load_config())
+    settings.update(config or {})
+
+    if not settings["OPENAI_API_KEY"]:
+        print("❌ 치명적 오류: OPENAI_API_KEY 환경 변수가 설정되지 않았습니다.")
+    if not settings["GOOGLE_API_KEY"] or not settings["GOOGLE_CSE_CX"]:
+        print("❌ 경고: Google Search API 키 또는 CX ID가 설정되지 않았습니다. 챗봇 출처 기능이 작동하지 않을 수 있습니다.")
+
+    init_services(settings)
+
+    app = Flask(__name__)
+    app.config.update(settings)
+    app.config["MAX_CONTENT_LENGTH"] = settings["MAX_UPLOAD_BYTES"]  # Content-Length 가 크면 본문을 읽기 전에 413
+    app.jinja_env.globals["asset_url"] = asset_server.url  # 빌드 전이면 /static 원본 경로
+    app.register_blueprint(bp)
+    app.teardown_appcontext(close_connection)
+    app.cli.add_command(init_db_command)
+
+    if settings["WARM_CACHES"]:
+        warm_up(app)
+    return app
+
+
+def init_services(config):
+    """캐시/연결 풀/클라이언트를 만듭니다. (DB/외부 연결은 처음 쓸 때 열고, 워커 스레드도 첫 작업 때 시작)"""
+    global db_pool, rate_limiter, upstream_limits, asset_server, outbound, search_cache, geocode_cache
+    global answer_cache, vision_cache, chat_router, vision_jobs, chat_sessions, _openai_client, _district_resolver
+    global _guide_index_cache
+
+    # 요청마다 새로 열지 않고 풀에서 빌려 쓰고 요청이 끝나면 반납합니다. (WAL, mmap, query_only)
+    db_pool = ConnectionPool(
+        config["DATABASE"],
+        mmap_size=config["SQLITE_MMAP_SIZE"],
+        cache_size_kib=config["SQLITE_CACHE_SIZE_KIB"],
+        cached_statements=config["SQLITE_CACHED_STATEMENTS"],
+        max_idle=config["SQLITE_POOL_MAX_IDLE"],
+    )
+    rate_limiter = ClientRateLimiter(
+        config["RATE_LIMITS"],
+        SQLiteBucketStore(config["RATE_LIMIT_DATABASE"]) if config["RATE_LIMIT_DATABASE"] else MemoryBucketStore(),
+    )
+    upstream_limits = UpstreamLimiter(config["UPSTREAM_INFLIGHT_CAPS"], max_wait=config["UPSTREAM_ADMISSION_WAIT"])
+    asset_server = AssetServer(config["STATIC_DIST_DIR"])
+
+    # Nominatim, Google CSE 공용 외부 HTTP 클라이언트 (연결 풀/타임아웃/재시도/서킷 브레이커)
+    outbound = OutboundClient(
+        connect_timeout=config["UPSTREAM_CONNECT_TIMEOUT"],
+        read_timeout=config["UPSTREAM_READ_TIMEOUT"],
+        max_retries=config["UPSTREAM_MAX_RETRIES"],
+    )
+    search_cache = SearchCache(config["CACHE_DATABASE"], ttl=config["SEARCH_CACHE_TTL"],
+                               negative_ttl=config["SEARCH_CACHE_NEGATIVE_TTL"])
+    geocode_cache = GeocodeCache(
+        fetch_nominatim_reverse,
+        config["CACHE_DATABASE"],
+        precision=config["GEOCODE_GEOHASH_PRECISION"],
+        rate=config["NOMINATIM_RATE_LIMIT"],
+    )
+    answer_cache = AnswerCache(
+        maxsize=config["ANSWER_CACHE_SIZE"],
+        ttl=config["ANSWER_CACHE_TTL"],
+        threshold=config["ANSWER_CACHE_THRESHOLD"],
+    )
+    # 같은 물건을 다시 찍은 사진은 저장된 Vision 답변을 재사용합니다.
+    vision_cache = VisionCache(
+        max_distance=config["VISION_CACHE_MAX_DISTANCE"],
+        maxsize=config["VISION_CACHE_SIZE"],
+        ttl=config["VISION_CACHE_TTL"],
+    )
+    # 가이드 DB / 지역 규정으로 답할 수 있는 질문은 LLM 앞에서 처리합니다.
+    chat_router = ChatRouter(
+        answer_threshold=config["CHAT_ROUTER_ANSWER_THRESHOLD"],
+        context_threshold=config["CHAT_ROUTER_CONTEXT_THRESHOLD"],
+        retriever=similar_guide_items,
+    )
+    # 이미지 분석(Vision)은 전용 워커 풀에서 처리합니다. (웹 워커를 5~15초씩 붙잡지 않도록)
+    vision_jobs = VisionJobQueue(workers=config["VISION_WORKERS"], max_queue=config["VISION_QUEUE_SIZE"],
+                                 job_ttl=config["VISION_JOB_TTL"])
+    # 후속 질문("그럼 뚜껑은요?")이 앞 대화를 이어 받도록 세션별 최근 대화를 토큰 예산 안에서 보관합니다.
+    chat_sessions = SessionStore(
+        max_sessions=config["CHAT_SESSION_MAX"],
+        max_bytes=config["CHAT_SESSION_MAX_BYTES"],
+        ttl=config["CHAT_SESSION_TTL"],
+        max_turns=config["CHAT_SESSION_MAX_TURNS"],
+        history_budget=config["CHAT_HISTORY_TOKEN_BUDGET"],
+        summary_budget=config["CHAT_SUMMARY_TOKEN_BUDGET"],
+    )
+    _openai_client = None
+    _district_resolver = _NOT_LOADED
+    _guide_index_cache = None
+
+
+_openai_lock = threading.Lock()
+
+
+def openai_client():
+    """OpenAI 클라이언트 (SDK import 와 생성은 첫 호출 때 한 번)"""
+    global _openai_client
+    if _openai_client is None:
+        with _openai_lock:
+            if _openai_client is None:
+                from openai import OpenAI
+                _openai_client = OpenAI(api_key=settings["OPENAI_API_KEY"])
+    return _openai_client
+
+
+_guide_index_lock = threading.Lock()
+
+
+def guide_vector_index(conn):
+    """현재 가이드 버전의 유사도 색인 (NumPy 는 처음 쓸 때 import - 시작 시간에 넣지 않도록)"""
+    global _guide_index_cache
+    if _guide_index_cache is None:
+        with _guide_index_lock:
+            if _guide_index_cache is None:
+                from guide_index import GuideIndexCache
+                _guide_index_cache = GuideIndexCache(settings["GUIDE_INDEX_DIR"], settings["GUIDE_INDEX_POSTINGS_BUDGET"])
+    return _guide_index_cache.get(conn)
+
+
+def similar_guide_items(conn, text, k):
+    """질문/물품 이름과 비슷한 가이드 항목 상위 k개 (챗봇 라우터 후보)"""
+    from guide_index import describe_matches
+    return describe_matches(conn, guide_vector_index(conn).search(text, k))
+
+
+def warm_up(app):
+    """가이드 스냅샷 / 카테고리 목록 / 유사도 색인 / 시·구 별칭 / 배출 시간표 / 경계 판별기와 OpenAI SDK 를 미리 올립니다.
+
+    --preload 로 마스터에서 부르면 워커들이 fork 로 같은 메모리를 나눠 씁니다. 끝나면 SQLite 연결을 모두 닫아
+    연결이 fork 를 건너가지 않게 합니다. 실패해도(시드 전 DB 등) 서버는 그대로 시작하고 첫 요청 때 채웁니다.
+    """
+    started = time.perf_counter()
+    try:
+        import openai  # noqa: F401 - import 만 (클라이언트/연결은 워커에서)
+        get_district_resolver()
+        with app.app_context():
+            db = get_db()
+            guide_cache.get(db)
+            category_index_cache.get(db)
+            guide_vector_index(db)
+            district_directory.get(db)
+            schedule_index.get(db)
+    except Exception as e:
+        print(f"❌ 캐시 예열 실패 (첫 요청 때 다시 시도): {e}")
+    finally:
+        db_pool.close_all()
+    print(f"✅ 캐시 예열 완료 ({(time.perf_counter() - started) * 1000:.0f}ms)")
+
+
+@click.command("init-db")
+@click.option("--force", is_flag=True, help="내용이 같아도 다시 시드")
+def init_db_command(force):
+    """스키마 마이그레이션 + 내장 데이터 시드 (서버 시작 경로에서는 DB 를 바꾸지 않음)"""
+    from static.data.db_init import init_db_with_data
+    try:
+        with db_pool.writer() as conn:  # 읽기 풀과 따로 두는 시드용 쓰기 연결 (WAL, synchronous=NORMAL)
+            init_db_with_data(settings["DATABASE"], force=force, conn=conn)
+    finally:
+        db_pool.close_all()
+    # 이 프로세스의 캐시를 비웁니다. (실행 중인 워커는 guide_meta / district_meta 버전이 바뀐 것을 보고 다시 읽음)
+    for cache in (guide_cache, district_directory, schedule_index):
+        cache.invalidate()
+    if _guide_index_cache is not None:
+        _guide_index_cache.invalidate()
+
+
+def __getattr__(name):
+    # `from app import app` (기존 실행 방식) - 처음 접근할 때 환경 변수 설정으로 만듭니다.
+    if name == "app":
+        globals()["app"] = app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # ----------------------------------------
 # DB 연결 관리 함수 (sqlite3)
@@ -31,34 +314,105 @@ DATABASE = 'smart_recycle.db'
 def get_db():
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect(DATABASE)
-        db.row_factory = sqlite3.Row 
+        db = g._database = db_pool.acquire()
     return db
 
-@app.teardown_appcontext
 def close_connection(exception):
-    db = getattr(g, '_database', None)
+    db = g.pop('_database', None)
     if db is not None:
-        db.close()
+        db_pool.release(db)
+
+
+# ----------------------------------------
+# ✅ 요청 단계별 처리 시간 (Server-Timing 헤더 + /metrics 히스토그램)
+# ----------------------------------------
+@bp.before_app_request
+def start_request_timer():
+    g._request_started = time.perf_counter()
+
+
+# ----------------------------------------
+# ✅ 요청 허용 제어 (클라이언트별 토큰 버킷 → 429 + Retry-After)
+# ----------------------------------------
+def client_id():
+    if settings["TRUST_PROXY_HEADERS"] and request.access_route:
+        return request.access_route[0]  # X-Forwarded-For 의 첫 번째 주소
+    return request.remote_addr or "unknown"
+
+
+def endpoint_name():
+    """블루프린트 접두사를 뗀 엔드포인트 이름 (RATE_LIMITS 키, 지표 라벨)"""
+    return (request.endpoint or "unknown").rpartition(".")[2]
+
+
+@bp.before_app_request
+def admit_request():
+    rate_limiter.check(endpoint_name(), client_id())
+
+
+@bp.app_errorhandler(AdmissionRejected)
+def admission_rejected(error):
+    registry.inc("admission_rejected_total", endpoint=endpoint_name())
+    return jsonify({"error": str(error)}), 429, {"Retry-After": str(error.retry_after)}
+
+
+@bp.after_app_request
+def add_server_timing(response):
+    # 단계를 기록한 요청만 전체 시간(total)을 함께 남깁니다. (스트리밍 본문 중의 단계는 헤더에 포함되지 않음)
+    if g.get("_spans"):
+        record("total", g._request_started)
+        response.headers["Server-Timing"] = server_timing_header()
+    return response
+
+
+# ----------------------------------------
+# ✅ 빌드된 정적 파일 (/assets - 내용 해시 파일명, immutable 캐시)
+# ----------------------------------------
+@bp.get("/assets/<path:filename>")
+def assets(filename):
+    """/assets/img/<hash>[-<너비>] 는 Accept 로 AVIF/WebP/JPEG, JS/CSS 는 Accept-Encoding 으로 br/gzip 선택"""
+    return asset_server.serve(filename)
+
+
+def to_json_bytes(obj):
+    """객체를 UTF-8 JSON 바이트로 직렬화합니다. (미리 직렬화된 조각과 이어 붙이기 용)"""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
 
 # ----------------------------------------
 # ✅ Google CSE 검색 함수 (RAG Context 생성)
 # ----------------------------------------
 def get_google_search_results(query, count=3):
-    """Google Custom Search API를 호출하여 검색 결과의 제목과 URL을 반환합니다."""
-    if not GOOGLE_API_KEY or not GOOGLE_CSE_CX:
+    """검색 결과의 제목과 URL을 반환합니다. (정규화된 검색어 캐시 → 미스일 때만 Google CSE 호출)"""
+    if not settings["GOOGLE_API_KEY"] or not settings["GOOGLE_CSE_CX"]:
         return [], "Google API 키 또는 CX ID 없음"
 
+    cached = search_cache.get(query, count)
+    if cached is not None:
+        return cached
+
+    try:
+        with upstream_limits.slot("google_cse"):
+            sources, error = fetch_google_search_results(query, count)
+    except AdmissionRejected as e:
+        return [], str(e)  # 일시적인 거부는 (실패 결과로) 캐시하지 않습니다.
+    search_cache.set(query, count, sources, error)
+    return sources, error
+
+
+def fetch_google_search_results(query, count=3):
+    """Google Custom Search API를 호출하여 검색 결과의 제목과 URL을 반환합니다."""
     params = {
-        "key": GOOGLE_API_KEY,
-        "cx": GOOGLE_CSE_CX,
+        "key": settings["GOOGLE_API_KEY"],
+        "cx": settings["GOOGLE_CSE_CX"],
         "q": query,
         "num": count,  # 가져올 결과 개수
     }
 
+    import requests  # requests 는 첫 외부 호출 때 import (시작 시간 단축)
+
     try:
-        response = requests.get(GOOGLE_SEARCH_URL, params=params)
+        response = outbound.get(settings["GOOGLE_SEARCH_URL"], params=params)
         response.raise_for_status() 
         search_results = response.json()
         
@@ -80,148 +434,627 @@ def get_google_search_results(query, count=3):
         return [], str(e)
 
 
+# ----------------------------------------
+# ✅ Nominatim 역지오코딩 (geohash 셀 캐시 경유)
+# ----------------------------------------
+def fetch_nominatim_reverse(lat, lon):
+    """Nominatim reverse API를 호출합니다. (캐시 미스일 때만 호출됨)"""
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "format": "json",
+        "addressdetails": 1
+    }
+    # 재시도하지 않음: GeocodeCache 토큰 버킷에서 받은 토큰 하나로 요청 한 번만 (Nominatim 이용 정책 1 req/s)
+    with upstream_limits.slot("nominatim"):
+        response = outbound.get(settings["NOMINATIM_REVERSE_URL"], params=params,
+                                headers={"User-Agent": "flask-smart-recycle-app"}, max_retries=0)
+    if response.status_code == 429:
+        response.close()
+        raise UpstreamRateLimited("역지오코딩 요청이 많아 잠시 후 다시 시도해 주세요.",
+                                  retry_after=retry_after_seconds(response))
+    response.raise_for_status()
+    return response.json()
+
+
+_NOT_LOADED = object()
+_district_resolver_lock = threading.Lock()
+
+
+def get_district_resolver():
+    """경계 판별기 (GeoJSON 은 첫 위치 판별 때 읽음). 경계 파일이 없으면 None - 모든 판별이 Nominatim 으로 넘어갑니다."""
+    global _district_resolver
+    if _district_resolver is _NOT_LOADED:
+        with _district_resolver_lock:
+            if _district_resolver is _NOT_LOADED:
+                _district_resolver = load_district_resolver(settings["DISTRICT_GEOJSON"])
+    return _district_resolver
+
+
+def read_coordinates(data):
+    """요청 JSON 의 latitude / longitude → (lat, lon). 없거나 숫자가 아니거나 범위를 벗어나면 ValueError."""
+    try:
+        lat, lon = float(data["latitude"]), float(data["longitude"])
+    except (TypeError, KeyError, ValueError):
+        raise ValueError("latitude 와 longitude 는 숫자여야 합니다.")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):  # NaN 도 여기서 걸러짐
+        raise ValueError("latitude 는 -90~90, longitude 는 -180~180 범위여야 합니다.")
+    return lat, lon
+
+
+def resolve_location(lat, lon):
+    """좌표 → 위치 정보(city/districtKey/districtOriginal)와 판별 출처("local" 또는 "nominatim")"""
+    resolver = get_district_resolver()
+    match = resolver.resolve(lat, lon) if resolver is not None else None
+    if match is not None:
+        return make_location(*match), "local"
+    return location_from_nominatim(geocode_cache.lookup(lat, lon)), "nominatim"
+
+
 # ----------------------------------------
 # ✅ 엔드포인트 정의
 # ----------------------------------------
 
-@app.route("/")
+@bp.route("/")
 def index():
     return "안녕하세요, 스마트 분리수거 앱 Flask 서버가 실행 중입니다. /final 로 접속하세요."
 
-@app.route("/final")
+@bp.route("/final")
 def final():
     """메인 스마트 분리수거 페이지 렌더링"""
     return render_template("final.html", title="♻️ 스마트 분리수거")
 
 # 기능 1: 위치 기반 정보 (Reverse Geocoding)
-@app.post("/reverse-geocode")
+@bp.post("/reverse-geocode")
 def reverse_geocode():
-    data = request.get_json()
-    lat = data.get("latitude")
-    lon = data.get("longitude")
-    url = f"https://nominatim.openstreetmap.org/reverse"
-    params = {
-        "lat": lat,
-        "lon": lon,
-        "format": "json",
-        "addressdetails": 1
-    }
+    try:
+        lat, lon = read_coordinates(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
-        response = requests.get(url, params=params, headers={"User-Agent": "flask-smart-recycle-app"})
-        response.raise_for_status()
-        return jsonify(response.json())
+        with span("geocode"):
+            data = geocode_cache.lookup(lat, lon)
+        with span("encode"):
+            return jsonify(data)
+    except UpstreamRateLimited as e:
+        return jsonify({"error": str(e)}), 429, {"Retry-After": str(e.retry_after)}
+    except AdmissionRejected as e:
+        return admission_rejected(e)
+    except UpstreamUnavailable as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(int(outbound.reset_timeout))}
     except Exception as e:
         print("❌ Reverse Geocoding 오류:", e)
         return jsonify({"error": str(e)}), 500
 
 
+# 기능 1: 로컬 경계 폴리곤으로 행정구역 판별 (매칭 실패 시에만 Nominatim)
+@bp.post("/resolve-district")
+def resolve_district():
+    try:
+        lat, lon = read_coordinates(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        location, source = resolve_location(lat, lon)
+        return jsonify({**location, "source": source})
+    except UpstreamRateLimited as e:
+        return jsonify({"error": str(e)}), 429, {"Retry-After": str(e.retry_after)}
+    except AdmissionRejected as e:
+        return admission_rejected(e)
+    except UpstreamUnavailable as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(int(outbound.reset_timeout))}
+    except Exception as e:
+        print("❌ 행정구역 판별 오류:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+# ----------------------------------------
+# ✅ 지역 정보 / 가이드 응답 조립 (get-recycle-info, bootstrap 공용)
+# ----------------------------------------
+def load_location_info(db, city, district_key):
+    """CITY_DISTRICT + RECYCLE_DETAIL 에서 지역별 분리수거 정보를 조회합니다. 없으면 None.
+
+    시/구 이름은 별칭 사전(정규화 이름, 접미사 생략형, 옛 이름, 영문 표기)으로 district_id 를 찾습니다.
+    """
+    district_id = district_directory.get(db).resolve(city, district_key)
+    if district_id is None:
+        return None
+
+    cursor = db.cursor()
+
+    # 1. 지역별 분리수거 기본 정보 조회 (CITY_DISTRICT - 기본 키 조회)
+    cursor.execute("SELECT discharge_time FROM city_district WHERE district_id = ?", (district_id,))
+    district_data = cursor.fetchone()
+    if not district_data:
+        return None
+
+    info = {"배출시간": district_data['discharge_time']}
+    
+    # 2. 지역별 상세 정보 조회 (RECYCLE_DETAIL - (district_id, info_type) 색인)
+    cursor.execute("""
+        SELECT info_type, item_name, info_value
+        FROM recycle_detail
+        WHERE district_id = ?
+    """, (district_id,))
+    
+    details = cursor.fetchall()
+    
+    recycle_items = {}
+    bag_colors = {}
+    
+    for detail in details:
+        if detail['info_type'] == "재활용품":
+            recycle_items[detail['item_name']] = detail['info_value']
+        elif detail['info_type'] == "봉투색상":
+            bag_colors[detail['item_name']] = detail['info_value']
+    
+    info["재활용품"] = recycle_items
+    info["봉투색상"] = bag_colors
+    return info
+
+
+def guide_fragment(guide, guide_etag):
+    """가이드 스냅샷을 응답 JSON 조각(바이트)으로 만듭니다.
+
+    클라이언트가 같은 버전의 가이드를 이미 가지고 있으면(guide_etag 일치) 본문을 생략합니다.
+    """
+    guide_not_modified = guide_etag is not None and guide_etag == guide.etag
+    return (
+        b'"guide_data":' + (b"null" if guide_not_modified else guide.body)
+        + b',"guide_etag":' + to_json_bytes(guide.etag)
+        + b',"guide_not_modified":' + to_json_bytes(guide_not_modified)
+    )
+
+
+def guide_index_fragment(db):
+    """전체 가이드 대신 카테고리 목록(항목 수 포함)만 담은 응답 JSON 조각 - 항목은 /guide/categories/<id>/items 로"""
+    index = category_index_cache.get(db)
+    return b'"guide_index":' + index.body + b',"guide_etag":' + to_json_bytes(index.etag)
+
+
+def guide_payload(db, data):
+    """guideMode 가 "index" 이면 카테고리 목록만, 아니면 (기존 클라이언트) 전체 가이드 스냅샷"""
+    if data.get("guideMode") == "index":
+        return guide_index_fragment(db)
+    return guide_fragment(guide_cache.get(db), data.get("guideEtag"))
+
+
 # 기능 1 & 2: DB에서 정보 조회하는 엔드포인트
-@app.post("/get-recycle-info")
+@bp.post("/get-recycle-info")
 def get_recycle_info():
     """main.js에서 받은 지역명과 가이드 정보를 DB에서 조회하여 반환"""
     data = request.get_json()
     city = data.get("city")
     district_key = data.get("districtKey")
-    
+    # guideEtag: 클라이언트가 캐싱한 가이드 버전 / guideMode: "index" 면 카테고리 목록만 (선택 사항)
+
     db = get_db()
-    cursor = db.cursor()
-    info = None
     
     try:
-        # 1. 지역별 분리수거 기본 정보 조회 (CITY_DISTRICT)
-        cursor.execute("""
-            SELECT district_id, discharge_time
-            FROM city_district
-            WHERE city_name = ? AND district_name LIKE ?
-            LIMIT 1
-        """, (city, f'%{district_key}%'))
-        
-        district_data = cursor.fetchone()
-        
-        if district_data:
-            district_id = district_data['district_id']
-            info = {"배출시간": district_data['discharge_time']}
-            
-            # 2. 지역별 상세 정보 조회 (RECYCLE_DETAIL)
-            cursor.execute("""
-                SELECT info_type, item_name, info_value
-                FROM recycle_detail
-                WHERE district_id = ?
-            """, (district_id,))
-            
-            details = cursor.fetchall()
-            
-            recycle_items = {}
-            bag_colors = {}
-            
-            for detail in details:
-                if detail['info_type'] == "재활용품":
-                    recycle_items[detail['item_name']] = detail['info_value']
-                elif detail['info_type'] == "봉투색상":
-                    bag_colors[detail['item_name']] = detail['info_value']
-            
-            info["재활용품"] = recycle_items
-            info["봉투색상"] = bag_colors
-
-        # 3. 가이드 정보 전체 조회 (GUIDE_CATEGORY, GUIDE_ITEM)
-        categories_list = []
-        
-        cursor.execute("SELECT category_id, name, icon FROM guide_category ORDER BY category_id")
-        categories_query = cursor.fetchall()
-        
-        for cat in categories_query:
-            category_id = cat['category_id']
-            items_list = []
-            
-            cursor.execute("""
-                SELECT name, description ,image_path
-                FROM guide_item 
-                WHERE category_id = ? 
-                ORDER BY item_id
-            """, (category_id,))
-            item_query = cursor.fetchall()
-            
-            for item in item_query:
-                items_list.append({
-                    "name": item['name'],
-                    "description": item['description'],
-                    "image_path": item['image_path']
-                })
-            
-            categories_list.append({
-                "name": cat['name'],
-                "icon": cat['icon'],
-                "items": items_list
-            })
-            
-        guide_data = {"categories": categories_list}
+        with span("location"):
+            info = load_location_info(db, city, district_key)
 
-        return jsonify({
-            "location_info": info,
-            "guide_data": guide_data,
-            "status": "success"
-        })
+        # 3. 가이드 정보 (불변 스냅샷 - 미리 직렬화된 바이트를 그대로 사용)
+        with span("guide"):
+            guide = guide_payload(db, data)
+
+        with span("encode"):
+            body = (
+                b'{"location_info":' + to_json_bytes(info)
+                + b',' + guide
+                + b',"status":"success"}'
+            )
+        return Response(body, mimetype="application/json")
+
+    except Exception as e:
+        print("❌ DB 조회 중 오류:", e)
+        return jsonify({"error": f"데이터베이스 조회 중 오류가 발생했습니다: {str(e)}"}), 500
+
+
+# 기능 1 & 2 통합: 좌표 → 행정구역 판별 + 지역 정보 + 가이드를 한 번의 왕복으로 반환
+@bp.post("/bootstrap")
+def bootstrap():
+    """첫 화면에 필요한 위치/지역 규정/가이드 정보를 한 응답으로 반환"""
+    data = request.get_json(silent=True) or {}
+    try:
+        lat, lon = read_coordinates(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # guideEtag: 클라이언트가 캐싱한 가이드 버전 / guideMode: "index" 면 카테고리 목록만 (선택 사항)
+
+    try:
+        location, source = resolve_location(lat, lon)
+    except UpstreamRateLimited as e:
+        return jsonify({"error": str(e)}), 429, {"Retry-After": str(e.retry_after)}
+    except AdmissionRejected as e:
+        return admission_rejected(e)
+    except UpstreamUnavailable as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(int(outbound.reset_timeout))}
+    except Exception as e:
+        print("❌ 행정구역 판별 오류:", e)
+        return jsonify({"error": str(e)}), 500
+
+    db = get_db()
+
+    try:
+        info = load_location_info(db, location["city"], location["districtKey"])
+
+        body = (
+            b'{"location":' + to_json_bytes({**location, "source": source})
+            + b',"location_info":' + to_json_bytes(info)
+            + b',' + guide_payload(db, data)
+            + b',"status":"success"}'
+        )
+        return Response(body, mimetype="application/json")
 
     except Exception as e:
         print("❌ DB 조회 중 오류:", e)
         return jsonify({"error": f"데이터베이스 조회 중 오류가 발생했습니다: {str(e)}"}), 500
 
 
+# 가이드 물품 검색 (서버 측 FTS5 - 관련도 순, 강조 스니펫 포함)
+@bp.get("/guide/search")
+def guide_search():
+    query = request.args.get("q", "")
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 50)
+
+    try:
+        results = search_guide_items(get_db(), query, limit)
+        return jsonify({"query": query, "results": results, "status": "success"})
+    except Exception as e:
+        print("❌ 가이드 검색 중 오류:", e)
+        return jsonify({"error": f"가이드 검색 중 오류가 발생했습니다: {str(e)}"}), 500
+
+
+# 문자 n-gram 유사도로 찾은 가이드 항목 (오타/띄어쓰기/조사가 달라도 매칭, Vision 이 인식한 물품 이름 매칭용)
+# GET ?q=질문&k=5  또는  POST {"queries": ["페트병", "우유팩"], "k": 5} (여러 질의를 한 번에)
+MAX_SIMILAR_QUERIES = 100
+
+
+@bp.route("/guide/similar", methods=["GET", "POST"])
+def guide_similar():
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        queries = data.get("queries")
+        k = data.get("k", 5)
+        if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+            return jsonify({"error": "queries 는 문자열 목록이어야 합니다."}), 400
+        if len(queries) > MAX_SIMILAR_QUERIES:
+            return jsonify({"error": f"한 번에 최대 {MAX_SIMILAR_QUERIES}개까지 질의할 수 있습니다."}), 400
+        if not isinstance(k, int):
+            return jsonify({"error": "k 는 정수여야 합니다."}), 400
+    else:
+        queries = [request.args.get("q", "")]
+        k = request.args.get("k", 5, type=int)
+    k = min(max(k, 1), 50)
+
+    try:
+        from guide_index import describe_matches
+        db = get_db()
+        with span("search"):
+            matches = guide_vector_index(db).search_batch(queries, k)
+        results = [{"query": query, "results": describe_matches(db, found)} for query, found in zip(queries, matches)]
+    except Exception as e:
+        print("❌ 가이드 유사도 검색 중 오류:", e)
+        return jsonify({"error": f"가이드 유사도 검색 중 오류가 발생했습니다: {str(e)}"}), 500
+    if request.method == "GET":
+        return jsonify({**results[0], "status": "success"})
+    return jsonify({"results": results, "status": "success"})
+
+
+# 캐시 적중/미스 카운터 (API 할당량 절감 추적용)
+@bp.get("/cache-stats")
+def cache_stats():
+    return jsonify({
+        "search": search_cache.snapshot_stats(),
+        "geocode": geocode_cache.snapshot_stats(),
+        "answer": answer_cache.snapshot_stats(),
+        "vision": vision_cache.snapshot_stats(),
+        "router": chat_router.snapshot_stats(),
+        "guide_index": _guide_index_cache.snapshot_stats() if _guide_index_cache is not None else None,
+    })
+
+
+# 외부 API 호스트별 서킷 상태와 지연 시간 분포
+@bp.get("/upstream-stats")
+def upstream_stats():
+    return jsonify(outbound.snapshot_stats())
+
+
+# 요청 허용 제어 상태 (엔드포인트별 한도/거부 수, 외부 API 별 동시 호출 수)
+@bp.get("/admission-stats")
+def admission_stats():
+    return jsonify({"clients": rate_limiter.snapshot_stats(), "upstreams": upstream_limits.snapshot_stats()})
+
+
+# 챗봇 대화 세션 전체 상태 (세션 수/메모리, 만료·축출 수, 프롬프트 토큰 분포)
+@bp.get("/chat-sessions/stats")
+def chat_session_stats():
+    return jsonify(chat_sessions.snapshot_stats())
+
+
+# 세션 하나의 대화 기록 크기 (턴 수, 이전 대화 토큰 수, 요약, 메모리, 마지막 프롬프트 토큰 수)
+@bp.get("/chat-sessions/<session_id>")
+def get_chat_session(session_id):
+    session = chat_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "세션을 찾을 수 없습니다. (만료되었거나 잘못된 ID)"}), 404
+    return jsonify(session.snapshot())
+
+
+# SQLite 연결 풀 상태 (재사용률, 동시 사용 수)
+@bp.get("/db-stats")
+def db_stats():
+    return jsonify(db_pool.snapshot_stats())
+
+
+# Prometheus 텍스트 형식 지표 (단계별 처리 시간, 토큰 사용량, 캐시/라우터/연결 풀/외부 API 상태)
+@bp.get("/metrics")
+def prometheus_metrics():
+    lines = registry.render()
+
+    caches = {
+        "search": search_cache.snapshot_stats(),
+        "geocode": geocode_cache.snapshot_stats(),
+        "answer": answer_cache.snapshot_stats(),
+        "vision": vision_cache.snapshot_stats(),
+    }
+    lines.append("# TYPE smart_recycle_cache_events_total counter")
+    for cache, stats in caches.items():
+        for event, value in stats.items():
+            if event not in ("entries", "hit_ratio"):
+                lines.append(f'smart_recycle_cache_events_total{{cache="{cache}",event="{event}"}} {value}')
+    lines.append("# TYPE smart_recycle_cache_entries gauge")
+    for cache in ("answer", "vision"):
+        lines.append(f'smart_recycle_cache_entries{{cache="{cache}"}} {caches[cache]["entries"]}')
+
+    lines.append("# TYPE smart_recycle_chat_route_total counter")
+    for action, value in chat_router.snapshot_stats().items():
+        lines.append(f'smart_recycle_chat_route_total{{action="{action}"}} {value}')
+
+    lines.append("# TYPE smart_recycle_db_pool gauge")
+    for stat, value in db_pool.snapshot_stats().items():
+        lines.append(f'smart_recycle_db_pool{{stat="{stat}"}} {value}')
+
+    queue_stats = vision_jobs.snapshot_stats()
+    lines.append("# TYPE smart_recycle_vision_queue gauge")
+    for stat in ("depth", "running", "workers", "max_queue"):
+        lines.append(f'smart_recycle_vision_queue{{stat="{stat}"}} {queue_stats[stat]}')
+    lines.append("# TYPE smart_recycle_vision_jobs_total counter")
+    for outcome in ("submitted", "completed", "failed", "rejected"):
+        lines.append(f'smart_recycle_vision_jobs_total{{outcome="{outcome}"}} {queue_stats[outcome]}')
+    for name, key in (("wait", "wait_ms"), ("run", "run_ms")):
+        lines.append(f"# TYPE smart_recycle_vision_job_{name}_seconds histogram")
+        lines += histogram_lines(f"smart_recycle_vision_job_{name}_seconds", (), queue_stats[key])
+
+    sessions = chat_sessions.snapshot_stats()
+    lines.append("# TYPE smart_recycle_chat_sessions gauge")
+    for stat in ("sessions", "bytes"):
+        lines.append(f'smart_recycle_chat_sessions{{stat="{stat}"}} {sessions[stat]}')
+    lines.append("# TYPE smart_recycle_chat_session_events_total counter")
+    for event in ("created", "resumed", "expired", "evicted_lru", "evicted_memory"):
+        lines.append(f'smart_recycle_chat_session_events_total{{event="{event}"}} {sessions[event]}')
+    lines.append("# TYPE smart_recycle_chat_prompt_tokens histogram")
+    lines += histogram_lines("smart_recycle_chat_prompt_tokens", (), chat_sessions.prompt_tokens.snapshot(), scale=1)
+
+    admission = upstream_limits.snapshot_stats()
+    lines.append("# TYPE smart_recycle_upstream_in_flight gauge")
+    for name, stats in admission.items():
+        lines.append(f'smart_recycle_upstream_in_flight{{upstream="{name}"}} {stats["in_flight"]}')
+    lines.append("# TYPE smart_recycle_upstream_admission_rejected_total counter")
+    for name, stats in admission.items():
+        lines.append(f'smart_recycle_upstream_admission_rejected_total{{upstream="{name}"}} {stats["rejected"]}')
+
+    upstream = outbound.snapshot_stats()
+    lines.append("# TYPE smart_recycle_upstream_request_duration_seconds histogram")
+    for host, stats in upstream.items():
+        lines += histogram_lines("smart_recycle_upstream_request_duration_seconds", (("host", host),), stats["latency_ms"])
+    lines.append("# TYPE smart_recycle_upstream_errors_total counter")
+    for host, stats in upstream.items():
+        lines.append(f'smart_recycle_upstream_errors_total{{host="{host}"}} {stats["errors"]}')
+
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+# 가이드 전용 엔드포인트: ETag/Last-Modified 조건부 요청 지원 (304)
+@bp.get("/guide")
+def get_guide():
+    """가이드 스냅샷을 캐시 검증 헤더와 함께 반환 (gzip 지원 시 미리 압축된 본문 사용)"""
+    guide = guide_cache.get(get_db())
+
+    use_gzip = "gzip" in request.accept_encodings
+    response = Response(guide.gzip_body if use_gzip else guide.body, mimetype="application/json")
+    if use_gzip:
+        response.content_encoding = "gzip"
+    response.vary.add("Accept-Encoding")
+    response.set_etag(guide.etag)
+    response.last_modified = guide.last_modified
+    response.cache_control.no_cache = True  # 매번 재검증 (변경 없으면 304)
+    return response.make_conditional(request)
+
+
+# ----------------------------------------
+# ✅ 가이드 나눠 받기 (카테고리 목록 → 항목 페이지 → 항목 상세, fields= 로 필요한 필드만)
+# ----------------------------------------
+def guide_page_response(version_etag, build, key=()):
+    """ETag 가 클라이언트 것과 같으면 본문을 만들지 않고 304, 아니면 build() 결과(객체 또는 JSON 바이트)로 응답 (None 이면 404)
+
+    ETag 는 가이드 버전 + 자원(경로와 key - fields, cursor 등)이라, 다른 항목/페이지의 ETag 로는 304 가 나지 않습니다.
+    (같은 ETag 를 받았다면 그 버전에서 이 자원이 200 으로 존재했던 것)
+    """
+    resource = hashlib.sha256(repr((request.path, key)).encode("utf-8")).hexdigest()[:12]
+    etag = f"{version_etag}-{resource}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        payload = build()
+        if payload is None:
+            return jsonify({"error": "가이드 항목을 찾을 수 없습니다."}), 404
+        body = payload if isinstance(payload, bytes) else to_json_bytes(payload)
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # 매번 재검증 (가이드가 바뀌지 않았으면 304)
+    return response
+
+
+@bp.app_errorhandler(InvalidFields)
+def invalid_fields(error):
+    return jsonify({"error": str(error)}), 400
+
+
+@bp.get("/guide/categories")
+def guide_categories():
+    """카테고리 목록과 항목 수 (기본 필드: category_id, name, icon, item_count)"""
+    fields = parse_fields(request.args.get("fields"), CATEGORY_FIELDS, DEFAULT_CATEGORY_FIELDS)
+    index = category_index_cache.get(get_db())
+    if fields == DEFAULT_CATEGORY_FIELDS:
+        return guide_page_response(index.etag, lambda: index.body, fields)  # 미리 직렬화된 기본 목록
+    return guide_page_response(index.etag, lambda: {"categories": index.project(fields)}, fields)
+
+
+@bp.get("/guide/categories/<int:category_id>/items")
+def guide_category_items(category_id):
+    """카테고리 항목을 item_id 순으로 limit 개씩 (?cursor= 에 이전 응답의 next_cursor, 기본 필드에 설명 제외)"""
+    fields = parse_fields(request.args.get("fields"), ITEM_FIELDS, DEFAULT_LIST_FIELDS)
+    limit = min(max(request.args.get("limit", 20, type=int), 1), MAX_PAGE_SIZE)
+    cursor = request.args.get("cursor", 0, type=int)
+    db = get_db()
+    index = category_index_cache.get(db)
+
+    def build():
+        if category_id not in index.ids:
+            return None
+        items, next_cursor = load_category_items(db, category_id, fields, cursor, limit)
+        return {"category_id": category_id, "items": items, "next_cursor": next_cursor}
+
+    return guide_page_response(index.etag, build, (fields, cursor, limit))
+
+
+@bp.get("/guide/items/<int:item_id>")
+def guide_item_detail(item_id):
+    """항목 하나 (기본: 설명 포함 전체 필드)"""
+    fields = parse_fields(request.args.get("fields"), ITEM_FIELDS, DEFAULT_DETAIL_FIELDS)
+    db = get_db()
+    index = category_index_cache.get(db)
+    return guide_page_response(index.etag, lambda: load_item(db, item_id, fields), fields)
+
+
+# ----------------------------------------
+# ✅ 배출 가능 시간표 (시드 때 만든 주간 비트맵 - 지금 배출 가능 여부 / 다음 배출 시간 / 지금 수거하는 구)
+# ----------------------------------------
+def schedule_moment():
+    try:
+        return parse_moment(request.args.get("at")), None
+    except ValueError:
+        return None, (jsonify({"error": "at 은 ISO 8601 시각이어야 합니다. (예: 2025-01-06T21:30)"}), 400)
+
+
+def schedule_not_seeded(e):
+    """시간표 테이블이 없는 DB - 색인을 캐시하지 않으므로 init-db 후 다음 요청부터 정상 응답합니다."""
+    print(f"❌ 배출 시간표 조회 실패: {e}")
+    return jsonify({"error": str(e)}), 503
+
+
+@bp.get("/schedule/status")
+def schedule_status():
+    """?city=&district=&item= : 지금(또는 ?at=) 배출 가능한지와 현재/다음 배출 구간 (item 없으면 지역 배출시간 기준)"""
+    moment, error = schedule_moment()
+    if error:
+        return error
+    db = get_db()
+    city, district = request.args.get("city", ""), request.args.get("district", "")
+    district_id = district_directory.get(db).resolve(city, district)
+    try:
+        index = schedule_index.get(db)
+    except ScheduleNotSeeded as e:
+        return schedule_not_seeded(e)
+    status = index.status(district_id, request.args.get("item"), moment) if district_id else None
+    if status is None:
+        return jsonify({"error": f"{city} {district} 의 배출 시간표를 찾을 수 없습니다."}), 404
+    return jsonify({"city": city, "district": district, "at": moment.isoformat(timespec="minutes"), **status})
+
+
+@bp.get("/schedule/collecting")
+def schedule_collecting():
+    """?item=페트병 : 지금(또는 ?at=) 그 품목을 내놓을 수 있는 시/구 목록 (item 없으면 지역 배출시간 기준)"""
+    moment, error = schedule_moment()
+    if error:
+        return error
+    limit = min(max(request.args.get("limit", 100, type=int), 1), 1000)
+    item = normalize_item(request.args.get("item"))
+    try:
+        index = schedule_index.get(get_db())
+    except ScheduleNotSeeded as e:
+        return schedule_not_seeded(e)
+    total, districts = index.collecting_now(item, moment, limit)
+    return jsonify({
+        "item": item or None,
+        "at": moment.isoformat(timespec="minutes"),
+        "count": total,
+        "districts": [{"city": city, "district": district} for _, city, district in districts],
+    })
+
 
 # ----------------------------------------
 # ✅ 통합된 챗봇 엔드포인트 (/chatbot-unified-chat)
 # ----------------------------------------
-@app.post("/chatbot-unified-chat")
-def chatbot_unified_chat():
-    data = request.get_json()
-    user_message = data.get("message")
-    image_data_url = data.get("image_data_url") # Base64 이미지 데이터 (선택 사항)
-    user_location = data.get("location")       # 위치 정보 (선택 사항)
+@bp.app_errorhandler(413)
+def request_too_large(error):
+    return jsonify({"error": f"업로드 크기는 {settings['MAX_UPLOAD_BYTES'] // (1024 * 1024)}MB 를 넘을 수 없습니다."}), 413
 
-    if not user_message and not image_data_url:
-        return jsonify({"error": "메시지 또는 이미지가 없습니다."}), 400
-    
+
+def read_chat_request():
+    """JSON 또는 multipart/form-data 챗봇 요청에서 (메시지, 이미지 data URL, 이미지 dHash, 위치)를 읽습니다.
+
+    multipart 의 image 파일은 Werkzeug 가 임시 파일(spooled)로 받아 두며,
+    어느 경로든 이미지는 EXIF 회전 후 Vision 모델 해상도로 줄여 JPEG 로 다시 압축합니다.
+    """
+    if request.mimetype == "multipart/form-data":
+        user_message = request.form.get("message")
+        user_location = request.form.get("location")
+        upload = request.files.get("image")
+        image_file = upload.stream if upload and upload.filename else None
+    else:
+        data = request.get_json()
+        user_message = data.get("message")
+        user_location = data.get("location")
+        legacy_data_url = data.get("image_data_url") # Base64 이미지 데이터 (기존 클라이언트 호환)
+        image_file = io.BytesIO(decode_data_url(legacy_data_url)) if legacy_data_url else None
+
+    image_data_url = None
+    image_hash = None
+    if image_file is not None:
+        image, jpeg_bytes = prepare_vision_image(image_file, settings["MAX_IMAGE_PIXELS"])
+        image_data_url = to_data_url(jpeg_bytes)
+        image_hash = dhash(image)
+    return user_message, image_data_url, image_hash, user_location
+
+
+def read_chat_session():
+    """요청의 session_id (JSON 또는 form 필드) 로 대화 세션을 찾습니다. (없거나 만료되었으면 새 세션)"""
+    if request.mimetype == "multipart/form-data":
+        session_id = request.form.get("session_id")
+    else:
+        session_id = (request.get_json(silent=True) or {}).get("session_id")
+    return chat_sessions.get_or_create(session_id)
+
+
+class ChatbotError(Exception):
+    """OpenAI 호출 실패 - 사용자에게 돌려줄 출처(검색 실패 정보 등)를 함께 담습니다."""
+
+    def __init__(self, message, sources):
+        super().__init__(message)
+        self.sources = sources
+
+
+def build_chat_messages(user_message, image_data_url, user_location, local=None, history=None):
+    """검색(RAG)과 프롬프트 구성을 수행하고 (OpenAI messages, 출처)를 반환합니다.
+
+    local 은 라우터의 local_context 결정이며, 있으면 웹 검색 대신 가이드 항목을 컨텍스트로 씁니다.
+    history 는 세션의 이전 대화 messages (요약 + 최근 턴)이며 현재 질문 바로 앞에 넣습니다.
+    """
     # -----------------------------
     # 1. Google CSE 검색 (이미지가 없을 때만 수행 - 텍스트 질문에 대한 출처 확보)
     # -----------------------------
@@ -229,10 +1062,15 @@ def chatbot_unified_chat():
     sources_to_return = []
     context = ""
     
+    if not image_data_url and local is not None:
+        print(f"✅ Google 검색 건너뜀 (로컬 가이드 컨텍스트 사용)")
+        context = local["context"]
+        sources_to_return = local["sources"]
     # ✅ 수정된 조건: 이미지가 없고 메시지가 있으며, 메시지 길이가 3자 이상일 때만 검색 수행
-    if not image_data_url and user_message and len(user_message) >= 3:
+    elif not image_data_url and user_message and len(user_message) >= 3:
         print(f"✅ Google 검색 수행 (RAG)")
-        search_sources, search_error = get_google_search_results(user_message, count=3)
+        with span("search"):
+            search_sources, search_error = get_google_search_results(user_message, count=3)
     
         if search_sources:
             context = "다음은 웹 검색 결과입니다. 이 정보를 활용하여 답변을 작성하세요:\n\n"
@@ -251,6 +1089,7 @@ def chatbot_unified_chat():
     # -----------------------------
     # 2. 시스템 메시지 생성 (위치 정보 포함)
     # -----------------------------
+    prompt_started = time.perf_counter()
     system_content = "당신은 분리수거 전문가 챗봇입니다. 한국의 최신 분리수거 기준을 고려하여 답변해 주세요. "
     
     # 위치 정보 추가 (텍스트/이미지 분석 모두에 적용)
@@ -261,58 +1100,427 @@ def chatbot_unified_chat():
     system_content += context
         
     # -----------------------------
-    # 3. OpenAI API 호출 (이미지 유무에 따라 분기)
+    # 3. OpenAI 메시지 구성 (이미지 유무에 따라 분기)
     # -----------------------------
-    try:
-        messages = [{"role": "system", "content": system_content}]
-        user_content = []
+    messages = [{"role": "system", "content": system_content}]
+    user_content = []
 
-        if image_data_url:
-            print("✅ Vision API 호출 (이미지 분석 포함)")
-            # 이미지 분석 시스템 프롬프트 추가
-            image_system_prompt = "이미지 속 물품을 분석하고, 해당 물품의 정확한 분리수거 방법(씻기/분리/배출)을 한국어로 상세하게 안내해 주세요. 물품 인식이 어렵거나 분리수거 대상이 아닌 경우에도 간결하게 답변해 주세요."
-            messages[0]["content"] += image_system_prompt
-            
-            # 사용자 메시지에 이미지 URL과 텍스트 모두 추가
-            user_content.append({"type": "text", "text": user_message or "이 물건을 어떻게 분리수거해야 하나요?"})
-            user_content.append({"type": "image_url", "image_url": {"url": image_data_url}})
-        else:
-            print("✅ Standard Chat API 호출 (텍스트 기반)")
-            user_content.append({"type": "text", "text": user_message})
+    if image_data_url:
+        print("✅ Vision API 호출 (이미지 분석 포함)")
+        # 이미지 분석 시스템 프롬프트 추가
+        image_system_prompt = "이미지 속 물품을 분석하고, 해당 물품의 정확한 분리수거 방법(씻기/분리/배출)을 한국어로 상세하게 안내해 주세요. 물품 인식이 어렵거나 분리수거 대상이 아닌 경우에도 간결하게 답변해 주세요."
+        messages[0]["content"] += image_system_prompt
+        
+        # 사용자 메시지에 이미지 URL과 텍스트 모두 추가
+        user_content.append({"type": "text", "text": user_message or "이 물건을 어떻게 분리수거해야 하나요?"})
+        user_content.append({"type": "image_url", "image_url": {"url": image_data_url}})
+    else:
+        print("✅ Standard Chat API 호출 (텍스트 기반)")
+        user_content.append({"type": "text", "text": user_message})
 
-        messages.append({"role": "user", "content": user_content})
+    if history:
+        messages += history
+    messages.append({"role": "user", "content": user_content})
+
+    # 이미지 분석 시에는 출처가 없으므로 빈 배열을 반환
+    if image_data_url:
+        sources_to_return = []
+
+    record("prompt", prompt_started)
+    return messages, sources_to_return
 
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            max_tokens=1000,
-        )
+
+def record_token_usage(usage):
+    """OpenAI 응답의 토큰 사용량을 /metrics 카운터에 누적합니다."""
+    if usage is None:
+        return
+    registry.inc("openai_requests_total", model="gpt-4o")
+    for kind in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        registry.inc("openai_tokens_total", getattr(usage, kind) or 0, model="gpt-4o", kind=kind.split("_")[0])
+
+
+def generate_chat_answer(user_message, image_data_url, user_location, local=None, history=None):
+    """검색(RAG) → 프롬프트 구성 → OpenAI 호출을 수행하고 (답변, 출처, 프롬프트 토큰 수)를 반환합니다."""
+    messages, sources_to_return = build_chat_messages(user_message, image_data_url, user_location, local, history)
+
+    try:
+        with upstream_limits.slot("openai"), span("openai"):
+            response = openai_client().chat.completions.create(
+                model="gpt-4o",
+                messages=messages,
+                max_tokens=1000,
+            )
 
         chatbot_response = response.choices[0].message.content
-        
-        # 이미지 분석 시에는 출처가 없으므로 빈 배열을 반환
+        usage = getattr(response, "usage", None)
+        record_token_usage(usage)
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or estimate_prompt_tokens(messages)
+
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        print("❌ 챗봇 API 호출 중 오류:", e)
+        # 이미지 분석 시 발생한 오류라면 출처를 제공하지 않음 (build_chat_messages 에서 이미 비움)
+        raise ChatbotError(str(e), sources_to_return)
+
+    return chatbot_response, sources_to_return, prompt_tokens
+
+
+def answer_text_question(user_message, user_location, local=None, history=None):
+    """텍스트 질문에 답하고, 성공한 답변은 유사 질문 캐시에 저장합니다.
+
+    이전 대화(history)를 보고 만든 답변은 그 세션의 대화 내용이 섞일 수 있으므로 공유 캐시에 넣지 않습니다.
+    """
+    chatbot_response, sources_to_return, prompt_tokens = generate_chat_answer(
+        user_message, None, user_location, local, history)
+    if not history:
+        answer_cache.store(user_message, user_location, chatbot_response, sources_to_return)
+    return chatbot_response, sources_to_return, prompt_tokens
+
+
+def image_turn_question(user_message):
+    """대화 기록에 남길 이미지 질문 (사진은 저장하지 않음)"""
+    return f"[사진] {user_message or ''}".strip()
+
+
+def analyze_image(user_message, image_data_url, image_hash, user_location, session, history):
+    """Vision 작업 본문 (워커 스레드에서 실행) - 답변을 Vision 캐시와 대화 세션에 저장하고 결과 dict 를 반환합니다."""
+    chatbot_response, _, prompt_tokens = generate_chat_answer(
+        user_message, image_data_url, user_location, history=history)
+    if not history:  # 이전 대화를 본 답변은 다른 세션과 공유하지 않음
+        vision_cache.store(image_hash, user_message, user_location, chatbot_response)
+    chat_sessions.record_turn(session, image_turn_question(user_message), chatbot_response, prompt_tokens)
+    return {"response": chatbot_response, "sources": [], "cached": False, "session_id": session.id}
+
+
+def submit_vision_job(user_message, image_data_url, image_hash, user_location, session):
+    """Vision 캐시에 있으면 끝난 작업을, 없으면 대기열에 넣은 작업을 반환합니다. (가득 차면 QueueFull)"""
+    with span("cache"):
+        hit = vision_cache.lookup(image_hash, user_message, user_location)
+    if hit is not None:
+        print(f"✅ Vision 캐시 적중 (해밍 거리 {hit['distance']})")
+        chat_sessions.record_turn(session, image_turn_question(user_message), hit["response"])
+        return vision_jobs.add_finished(
+            {"response": hit["response"], "sources": [], "cached": True, "session_id": session.id})
+    history, _ = session.history_messages()
+    return vision_jobs.submit(
+        lambda: analyze_image(user_message, image_data_url, image_hash, user_location, session, history))
+
+
+def queue_full_response(error):
+    return jsonify({"error": str(error)}), 429, {"Retry-After": str(error.retry_after)}
+
+
+def vision_job_body(job, session):
+    """작업 상태 + 결과를 받을 주소 (POST /vision-jobs 응답, 끝나지 않은 채팅 이미지 요청의 202 응답)"""
+    return {
+        **job.snapshot(vision_jobs.position(job)),
+        "session_id": session.id,
+        "poll_url": f"/vision-jobs/{job.id}",
+        "events_url": f"/vision-jobs/{job.id}/events",
+    }
+
+
+def vision_job_accepted(job, session):
+    body = vision_job_body(job, session)
+    return jsonify(body), 202, {"Location": body["poll_url"]}
+
+
+def route_text_question(user_message, user_location):
+    """텍스트 질문을 로컬 가이드/지역 규정과 비교해 라우팅 결정을 반환합니다. (오류 시 기존 LLM 흐름)"""
+    location_label = user_location if user_location and user_location != "알수없음" else None
+    try:
+        db = get_db()
+        location_info = None
+        if location_label:
+            # 클라이언트는 districtOriginal("서울특별시 강남구")을 보냄 → city / districtKey 로 분리
+            city, _, district = location_label.partition(" ")
+            location_info = load_location_info(db, city, district.replace(" ", "") or city)
+        decision = chat_router.route(db, user_message, location_label, location_info)
+    except Exception as e:
+        print("❌ 챗봇 라우팅 중 오류:", e)
+        return {"action": "llm"}
+    return decision
+
+
+@bp.post("/chatbot-unified-chat")
+def chatbot_unified_chat():
+    try:
+        with span("parse"):
+            user_message, image_data_url, image_hash, user_location = read_chat_request()
+    except ImageTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except InvalidImage as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not user_message and not image_data_url:
+        return jsonify({"error": "메시지 또는 이미지가 없습니다."}), 400
+
+    session = read_chat_session()
+    cached = False
+    try:
         if image_data_url:
-            sources_to_return = []
+            # 기존 클라이언트 호환: 작업 큐를 거쳐(동시 호출 수 제한) 최대 VISION_JOB_MAX_WAIT 초 기다립니다.
+            # 그 안에 끝나지 않으면 웹 워커를 붙잡지 않도록 POST /vision-jobs 와 같은 202 (job_id / events_url) 로 넘깁니다.
+            try:
+                job = submit_vision_job(user_message, image_data_url, image_hash, user_location, session)
+            except QueueFull as e:
+                return queue_full_response(e)
+            with span("vision_job"):
+                status = vision_jobs.wait(job, settings["VISION_JOB_MAX_WAIT"])
+            if status not in ("done", "error"):
+                return vision_job_accepted(job, session)
+            if job.status == "error":
+                raise ChatbotError(job.error, [])
+            chatbot_response, sources_to_return, cached = job.result["response"], [], job.result["cached"]
+        else:
+            # 후속 질문("그럼 뚜껑은요?")은 앞 질문의 핵심어를 붙여 캐시/라우팅/검색에 씁니다.
+            question = session.effective_question(user_message)
+            prompt_tokens = None
+            # 텍스트 질문: 같은 지역의 비슷한 질문에 대한 답변이 있으면 그대로 반환
+            with span("cache"):
+                hit = answer_cache.lookup(question, user_location)
+            if hit is not None:
+                print(f"✅ 답변 캐시 적중 (유사도 {hit['similarity']})")
+                chatbot_response, sources_to_return, cached = hit["response"], hit["sources"], True
+            else:
+                with span("route"):
+                    decision = route_text_question(question, user_location)
+                if decision["action"] == "local_answer":
+                    chatbot_response, sources_to_return = decision["answer"], decision["sources"]
+                else:
+                    local = decision if decision["action"] == "local_context" else None
+                    history, _ = session.history_messages()
+                    if history:
+                        # 이전 대화를 보고 만드는 답변은 이 세션 전용 - 다른 세션의 같은 질문과 합치지 않습니다.
+                        chatbot_response, sources_to_return, prompt_tokens = answer_text_question(
+                            question, user_location, local, history)
+                    else:
+                        # 동일한 질문이 동시에 들어오면 OpenAI 호출 한 번을 함께 기다립니다.
+                        (chatbot_response, sources_to_return, prompt_tokens), cached = answer_cache.flight.do(
+                            answer_cache.entry_key(question, user_location),
+                            lambda: answer_text_question(question, user_location, local, history)
+                        )
+            chat_sessions.record_turn(session, question, chatbot_response, None if cached else prompt_tokens)
 
+    except ChatbotError as e:
+        return jsonify({
+            "error": f"챗봇 API 호출 중 오류가 발생했습니다: {str(e)}",
+            "sources": e.sources, # 텍스트 모드였으면 검색 실패 정보를 반환
+            "session_id": session.id
+        }), 500
+
+    with span("encode"):
         return jsonify({
             "response": chatbot_response,
             "sources": sources_to_return,
-            "status": "success"
+            "status": "success",
+            "cached": cached,
+            "session_id": session.id
         })
 
-    except Exception as e:
-        print("❌ 챗봇 API 호출 중 오류:", e)
-        # 이미지 분석 시 발생한 오류라면 출처를 제공하지 않음
-        sources_to_return = [] if image_data_url else sources_to_return
-        return jsonify({
-            "error": f"챗봇 API 호출 중 오류가 발생했습니다: {str(e)}",
-            "sources": sources_to_return # 텍스트 모드였으면 검색 실패 정보를 반환
-        }), 500
+# ----------------------------------------
+# ✅ 스트리밍 챗봇 엔드포인트 (Server-Sent Events)
+# ----------------------------------------
+def sse_event(event, payload):
+    """SSE 이벤트 한 개를 문자열로 만듭니다."""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@bp.post("/chatbot-unified-chat/stream")
+def chatbot_unified_chat_stream():
+    """/chatbot-unified-chat 과 같은 입력을 받아 답변을 토큰 단위로 스트리밍합니다.
+
+    이벤트 순서: sources → token (여러 번) → done (usage 포함). 실패 시 error 이벤트로 종료.
+    이미지 분석이 아직 끝나지 않았으면 sources → status (job_id / poll_url / events_url) 로 끝납니다.
+    """
+    try:
+        with span("parse"):
+            user_message, image_data_url, image_hash, user_location = read_chat_request()
+    except ImageTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except InvalidImage as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not user_message and not image_data_url:
+        return jsonify({"error": "메시지 또는 이미지가 없습니다."}), 400
+
+    session = read_chat_session()
+    job = None
+    if image_data_url:
+        # 이미지는 작업 큐에서 처리합니다. 캐시 적중(이미 끝난 작업)이면 답변을, 아니면 status 이벤트로 작업 주소를 보냅니다.
+        # (대기열이 가득 차면 스트림을 열기 전에 429)
+        try:
+            job = submit_vision_job(user_message, image_data_url, image_hash, user_location, session)
+        except QueueFull as e:
+            return queue_full_response(e)
+
+    def generate():
+        if job is not None:
+            yield sse_event("sources", {"sources": [], "session_id": session.id})
+            if job.status not in ("done", "error"):
+                # 스트림 안에서 기다리지 않고 작업 주소만 알립니다. (결과는 events_url 의 SSE 또는 poll_url 로)
+                yield sse_event("status", vision_job_body(job, session))
+                return
+            if job.status == "error":
+                yield sse_event("error", {"error": f"챗봇 API 호출 중 오류가 발생했습니다: {job.error}"})
+                return
+            yield sse_event("token", {"text": job.result["response"]})
+            yield sse_event("done", {"status": "success", "cached": job.result["cached"], "usage": None})
+            return
+
+        question = session.effective_question(user_message)
+        # 캐시 적중 시 저장된 답변을 한 번에 내보냅니다. (유사 질문)
+        hit = answer_cache.lookup(question, user_location)
+        if hit is not None:
+            print(f"✅ 답변 캐시 적중 (유사도 {hit['similarity']})")
+            chat_sessions.record_turn(session, question, hit["response"])
+            yield sse_event("sources", {"sources": hit["sources"], "session_id": session.id})
+            yield sse_event("token", {"text": hit["response"]})
+            yield sse_event("done", {"status": "success", "cached": True, "usage": None})
+            return
+
+        local = None
+        decision = route_text_question(question, user_location)
+        if decision["action"] == "local_answer":
+            chat_sessions.record_turn(session, question, decision["answer"])
+            yield sse_event("sources", {"sources": decision["sources"], "session_id": session.id})
+            yield sse_event("token", {"text": decision["answer"]})
+            yield sse_event("done", {"status": "success", "cached": False, "usage": None})
+            return
+        if decision["action"] == "local_context":
+            local = decision
+
+        history, _ = session.history_messages()
+        messages, sources_to_return = build_chat_messages(question, None, user_location, local, history)
+        yield sse_event("sources", {"sources": sources_to_return, "session_id": session.id})
+
+        parts = []
+        usage = None
+        openai_started = time.perf_counter()
+        try:
+            # 스트림이 끝나거나 클라이언트가 끊을 때(제너레이터 종료)까지 openai 자리를 차지합니다.
+            with upstream_limits.slot("openai"):
+                stream = openai_client().chat.completions.create(
+                    model="gpt-4o",
+                    messages=messages,
+                    max_tokens=1000,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                for chunk in stream:
+                    if chunk.usage is not None:
+                        record_token_usage(chunk.usage)
+                        usage = {
+                            "prompt_tokens": chunk.usage.prompt_tokens,
+                            "completion_tokens": chunk.usage.completion_tokens,
+                            "total_tokens": chunk.usage.total_tokens,
+                        }
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        text = chunk.choices[0].delta.content
+                        if not parts:
+                            record("first_token", openai_started)  # 첫 토큰까지 걸린 시간
+                        parts.append(text)
+                        yield sse_event("token", {"text": text})
+        except AdmissionRejected as e:
+            yield sse_event("error", {"error": str(e), "retry_after": e.retry_after})
+            return
+        except Exception as e:
+            print("❌ 챗봇 스트리밍 호출 중 오류:", e)
+            yield sse_event("error", {"error": f"챗봇 API 호출 중 오류가 발생했습니다: {str(e)}"})
+            return
+        record("openai", openai_started)
+
+        answer = "".join(parts)
+        if not history:  # 이전 대화를 본 답변은 공유 캐시에 넣지 않음
+            answer_cache.store(question, user_location, answer, sources_to_return)
+        chat_sessions.record_turn(session, question, answer,
+                                  usage["prompt_tokens"] if usage else estimate_prompt_tokens(messages))
+        yield sse_event("done", {"status": "success", "cached": False, "usage": usage})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ----------------------------------------
+# ✅ 비동기 이미지 분석 작업 (제출 → 롱 폴링 또는 SSE 로 결과 수신)
+# ----------------------------------------
+@bp.post("/vision-jobs")
+def create_vision_job():
+    """/chatbot-unified-chat 과 같은 입력(이미지 필수)을 받아 작업 ID 를 바로 반환합니다. (202, 캐시 적중 시 200)"""
+    try:
+        with span("parse"):
+            user_message, image_data_url, image_hash, user_location = read_chat_request()
+    except ImageTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except InvalidImage as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not image_data_url:
+        return jsonify({"error": "이미지가 없습니다."}), 400
+
+    session = read_chat_session()
+    try:
+        job = submit_vision_job(user_message, image_data_url, image_hash, user_location, session)
+    except QueueFull as e:
+        return queue_full_response(e)
+
+    body = vision_job_body(job, session)
+    with span("encode"):
+        return jsonify(body), (200 if job.status == "done" else 202), {"Location": body["poll_url"]}
+
+
+@bp.get("/vision-jobs/<job_id>")
+def get_vision_job(job_id):
+    """?wait=초 를 주면 작업이 끝날 때까지 최대 그만큼 기다렸다가 응답합니다. (롱 폴링, 상한 VISION_JOB_MAX_WAIT)"""
+    job = vision_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다. (만료되었거나 잘못된 ID)"}), 404
+
+    wait = min(max(request.args.get("wait", 0, type=float), 0), settings["VISION_JOB_MAX_WAIT"])
+    if wait:
+        vision_jobs.wait(job, wait)
+    return jsonify(job.snapshot(vision_jobs.position(job)))
+
+
+@bp.get("/vision-jobs/<job_id>/events")
+def vision_job_events(job_id):
+    """작업 상태를 SSE 로 보냅니다. 이벤트: status (queued/running, 바뀔 때마다) → done 또는 error"""
+    job = vision_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다. (만료되었거나 잘못된 ID)"}), 404
+
+    def generate():
+        status = None
+        while True:
+            if job.status != status:
+                status = job.status
+                if status == "done":
+                    yield sse_event("done", job.snapshot())
+                    return
+                if status == "error":
+                    yield sse_event("error", job.snapshot())
+                    return
+                yield sse_event("status", job.snapshot(vision_jobs.position(job)))
+            elif vision_jobs.wait(job, settings["VISION_JOB_MAX_WAIT"], seen_status=status) == status:
+                yield ": keep-alive\n\n"  # 프록시가 유휴 연결을 끊지 않도록
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Vision 작업 큐 상태 (대기열 길이, 처리 중인 작업 수, 대기/처리 시간 분포)
+@bp.get("/vision-jobs/stats")
+def vision_job_stats():
+    return jsonify(vision_jobs.snapshot_stats())
+
 
 if __name__ == "__main__":
-    # DB 초기화 및 데이터 삽입을 위해 db_init.py 호출
-    from static.data.db_init import init_db_with_data 
-    with app.app_context():
-        # 서버 시작 시 테이블 생성 및 데이터 삽입 (개발 환경용)
-        init_db_with_data() 
-    app.run(debug=True)
\ No newline at end of file
+    # 개발 서버. DB 마이그레이션/시드는 먼저 따로 실행합니다: flask --app app init-db
+    create_app().run(debug=True)
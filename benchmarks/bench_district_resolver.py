@@ -0,0 +1,108 @@
+# bench_district_resolver.py
+# 사용법: python benchmarks/bench_district_resolver.py [--geojson 경계파일.geojson] [--queries 100000]
+#  - --geojson 을 주지 않으면 한반도 범위에 250개 시/군/구 크기의 합성 경계를 만들어 측정합니다.
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from district_resolver import DistrictResolver  # noqa: E402
+
+KOREA_BBOX = (126.0, 34.3, 129.6, 38.6)  # (min_lon, min_lat, max_lon, max_lat)
+
+
+def synthetic_features(cols=10, rows=25, edge_points=120, seed=42):
+    """격자 꼭짓점을 흔들고 각 변을 잡음 섞인 꺾은선으로 만든, 서로 빈틈없이 맞물리는 경계 250개"""
+    rng = random.Random(seed)
+    min_lon, min_lat, max_lon, max_lat = KOREA_BBOX
+    dx = (max_lon - min_lon) / cols
+    dy = (max_lat - min_lat) / rows
+
+    corners = {}
+    for i in range(cols + 1):
+        for j in range(rows + 1):
+            jitter = 0.0 if i in (0, cols) or j in (0, rows) else 0.3
+            corners[i, j] = (min_lon + (i + rng.uniform(-jitter, jitter)) * dx,
+                             min_lat + (j + rng.uniform(-jitter, jitter)) * dy)
+
+    edges = {}
+
+    def edge(a, b):
+        # 이웃 구역이 같은 변을 같은 점열로 공유하도록 (정렬된 끝점 기준으로) 한 번만 생성
+        key = (min(a, b), max(a, b))
+        if key not in edges:
+            (x1, y1), (x2, y2) = corners[key[0]], corners[key[1]]
+            edge_rng = random.Random(hash(key))
+            points = []
+            for k in range(edge_points + 1):
+                t = k / edge_points
+                wobble = 0.0 if k in (0, edge_points) else edge_rng.uniform(-0.02, 0.02)
+                points.append((x1 + (x2 - x1) * t + wobble * (y2 - y1), y1 + (y2 - y1) * t - wobble * (x2 - x1)))
+            edges[key] = points
+        points = edges[key]
+        return points if key[0] == a else points[::-1]
+
+    features = []
+    for i in range(cols):
+        for j in range(rows):
+            a, b, c, d = (i, j), (i + 1, j), (i + 1, j + 1), (i, j + 1)
+            ring = edge(a, b)[:-1] + edge(b, c)[:-1] + edge(c, d)[:-1] + edge(d, a)
+            features.append({
+                "type": "Feature",
+                "properties": {"city_name": f"시{i:02d}", "district_name": f"구{j:02d}"},
+                "geometry": {"type": "Polygon", "coordinates": [[list(p) for p in ring]]},
+            })
+    return features
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DistrictResolver 조회 성능 측정")
+    parser.add_argument("--geojson", help="실제 시/군/구 경계 GeoJSON 경로")
+    parser.add_argument("--queries", type=int, default=100000)
+    parser.add_argument("--cell-size", type=float, default=0.05)
+    args = parser.parse_args()
+
+    if args.geojson:
+        with open(args.geojson, encoding="utf-8") as f:
+            features = json.load(f)["features"]
+    else:
+        features = synthetic_features()
+
+    started = time.perf_counter()
+    resolver = DistrictResolver(features, cell_size=args.cell_size)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(7)
+    min_lon, min_lat, max_lon, max_lat = KOREA_BBOX
+    points = [(rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)) for _ in range(args.queries)]
+
+    hits = 0
+    started = time.perf_counter()
+    for lat, lon in points:
+        if resolver.resolve(lat, lon) is not None:
+            hits += 1
+    elapsed = time.perf_counter() - started
+
+    vertices = 0
+    for feature in features:
+        geometry = feature["geometry"]
+        polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+        vertices += sum(len(ring) for rings in polygons for ring in rings)
+    print(json.dumps({
+        "districts": len(resolver),
+        "vertices": vertices,
+        "boundary_cells": len(resolver.grid),
+        "interior_cells": len(resolver.interior),
+        "build_ms": round(build_ms, 1),
+        "queries": args.queries,
+        "hit_rate": round(hits / args.queries, 4),
+        "us_per_lookup": round(elapsed / args.queries * 1e6, 2),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+# bench_endpoints.py
+# 사용법: python benchmarks/bench_endpoints.py [--districts 10000] [--guide-items 100000]
+#                                             [--requests 2000] [--concurrency 16]
+#                                             [--output report.json] [--baseline 이전report.json]
+#  - Nominatim / Google CSE / OpenAI 를 흉내 내는 로컬 스텁 서버(지연 시간, 오류율 지정)를 띄우고,
+#    db_init 의 삽입 함수로 만든 합성 DB를 쓰는 app.py 서버를 별도 프로세스로 실행해 부하를 겁니다.
+#  - 시나리오별 처리량과 p50/p95/p99 지연 시간을 JSON 으로 출력하며, --baseline 을 주면 비교해서
+#    허용 범위(--tolerance)를 넘게 느려진 시나리오가 있으면 종료 코드 1 을 반환합니다.
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from static.data.db_init import (  # noqa: E402
+    connect_writer, insert_disposal_guide, insert_recycle_info, migrate, write_transaction,
+)
+
+KOREA_BBOX = (126.0, 34.3, 129.6, 38.6)  # (min_lon, min_lat, max_lon, max_lat)
+MATERIALS = ["플라스틱", "유리", "종이", "캔", "비닐", "스티로폼", "섬유", "전자제품", "목재", "고무"]
+
+
+# ----------------------------------------
+# 외부 API 스텁 서버
+# ----------------------------------------
+
+class StubHandler(BaseHTTPRequestHandler):
+    """server.latency_ms(±20%) 만큼 기다린 뒤 server.error_rate 확률로 503, 아니면 server.respond() 결과"""
+
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        time.sleep(server.latency_ms * random.uniform(0.8, 1.2) / 1000)
+
+        with server.lock:
+            server.calls += 1
+        if random.random() < server.error_rate:
+            status, payload = 503, {"error": "stub injected error"}
+        else:
+            status, payload = 200, server.respond(urlparse(self.path), body)
+
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+def nominatim_response(url, body):
+    params = parse_qs(url.query)
+    lat, lon = float(params["lat"][0]), float(params["lon"][0])
+    district = f"동네{int(lat * 100) % 100}구"
+    return {
+        "lat": str(lat), "lon": str(lon),
+        "display_name": f"{district}, 도시{int(lon * 10) % 100}시, 대한민국",
+        "address": {"city": f"도시{int(lon * 10) % 100}시", "city_district": district, "country": "대한민국"},
+    }
+
+
+def cse_response(url, body):
+    query = parse_qs(url.query).get("q", [""])[0]
+    return {"items": [
+        {"title": f"{query} 배출 방법 {i}", "link": f"https://example.com/{i}", "snippet": f"{query} 관련 안내 {i}"}
+        for i in range(3)
+    ]}
+
+
+def openai_response(url, body):
+    text = "스텁 답변입니다. " * 20
+    return {
+        "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()), "model": body.get("model", "gpt-4o"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 200, "completion_tokens": 100, "total_tokens": 300},
+    }
+
+
+def start_stub(respond, latency_ms, error_rate):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.respond = respond
+    server.latency_ms = latency_ms
+    server.error_rate = error_rate
+    server.calls = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# ----------------------------------------
+# 합성 데이터셋 (db_init 삽입 함수 사용)
+# ----------------------------------------
+
+def synthetic_recycle_info(districts, per_city=100):
+    data = {}
+    for n in range(districts):
+        city = f"도시{n // per_city}시"
+        data.setdefault(city, {})[f"동네{n % per_city}구"] = {
+            "배출시간": "월~금 오후 8시 ~ 오전 5시",
+            "재활용품": {"페트병": "목요일", "비닐": "목요일", "기타": "월~금, 일 녹색 그물망"},
+            "봉투색상": {"소각용": "원색", "음식물용": "하늘색", "재사용": "연보라색"},
+        }
+    return data
+
+
+def synthetic_guide(items, categories=20):
+    rng = random.Random(7)
+    data = {"categories": [{"name": f"분류{c}", "icon": "📦", "items": []} for c in range(categories)]}
+    for n in range(items):
+        material = rng.choice(MATERIALS)
+        data["categories"][n % categories]["items"].append({
+            "name": f"{material} 품목{n}",
+            "image_path": f"/static/images/item{n}.jpg",
+            "description": f"{material} 재질의 품목{n} 입니다. 내용물을 비우고 {material}류로 분리 배출하세요.",
+        })
+    return data
+
+
+def build_database(db_path, districts, guide_items):
+    started = time.perf_counter()
+    conn = connect_writer(db_path)
+    try:
+        # 진행 메시지는 stderr 로 - stdout 에는 JSON 보고서만 나갑니다.
+        with contextlib.redirect_stdout(sys.stderr):
+            migrate(conn)
+            with write_transaction(conn):
+                insert_recycle_info(conn, synthetic_recycle_info(districts))
+                insert_disposal_guide(conn, synthetic_guide(guide_items))
+    finally:
+        conn.close()
+    return round(time.perf_counter() - started, 3)
+
+
+# ----------------------------------------
+# 부하 생성 / 통계
+# ----------------------------------------
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[index], 2)
+
+
+def run_scenario(make_request, total, concurrency, warmup):
+    """make_request(session, i) -> requests.Response 를 total 번(동시 concurrency) 실행한 통계"""
+    local = threading.local()
+
+    def timed(i):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            status = make_request(session, i).status_code
+        except requests.RequestException:
+            status = "exception"
+        return (time.perf_counter() - started) * 1000, status
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(timed, range(warmup)))
+        started = time.perf_counter()
+        results = list(pool.map(timed, range(warmup, warmup + total)))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(ms for ms, _ in results)
+    status_codes = {}
+    for _, status in results:
+        status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+    errors = sum(count for status, count in status_codes.items() if not status.startswith("2"))
+    return {
+        "requests": total,
+        "errors": errors,
+        "status_codes": status_codes,
+        "throughput_rps": round(total / elapsed, 1),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": round(latencies[-1], 2),
+        },
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(env, log_path):
+    port = free_port()
+    log = open(log_path, "w")
+    process = subprocess.Popen(
+        [sys.executable, "-c", f"from app import create_app; create_app().run(host='127.0.0.1', port={port}, threaded=True)"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        if process.poll() is not None:
+            raise RuntimeError(f"app.py 서버가 시작되지 않았습니다. 로그: {log_path}")
+        try:
+            requests.get(base + "/db-stats", timeout=1)
+            return process, base
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("app.py 서버 시작 대기 시간 초과")
+
+
+def compare(report, baseline, tolerance):
+    """p95 가 (1 + tolerance) 배를 넘거나 처리량이 (1 - tolerance) 배 아래로 떨어진 시나리오 목록"""
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        p95, old_p95 = current["latency_ms"]["p95"], previous["latency_ms"]["p95"]
+        rps, old_rps = current["throughput_rps"], previous["throughput_rps"]
+        print(f"{name:>18}: p95 {old_p95:>9.2f} → {p95:>9.2f} ms, 처리량 {old_rps:>8.1f} → {rps:>8.1f} rps",
+              file=sys.stderr)
+        if p95 > old_p95 * (1 + tolerance) or rps < old_rps * (1 - tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="app.py 엔드포인트 부하 테스트 (로컬 스텁 업스트림)")
+    parser.add_argument("--districts", type=int, default=10000)
+    parser.add_argument("--guide-items", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000, help="시나리오별 요청 수")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--nominatim-latency", type=float, default=80.0, help="ms")
+    parser.add_argument("--cse-latency", type=float, default=150.0, help="ms")
+    parser.add_argument("--openai-latency", type=float, default=800.0, help="ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="스텁 세 곳 공통 503 비율 (0~1)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON 보고서 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 보고서")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 성능 저하 비율")
+    parser.add_argument("--keep-workdir", action="store_true", help="합성 DB 와 app.log 를 지우지 않음")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix="bench_endpoints_")
+    db_path = os.path.join(workdir, "bench.db")
+    seed_seconds = build_database(db_path, args.districts, args.guide_items)
+
+    nominatim, nominatim_url = start_stub(nominatim_response, args.nominatim_latency, args.error_rate)
+    cse, cse_url = start_stub(cse_response, args.cse_latency, args.error_rate)
+    openai, openai_url = start_stub(openai_response, args.openai_latency, args.error_rate)
+
+    env = dict(
+        os.environ,
+        DATABASE=db_path,
+        CACHE_DATABASE=os.path.join(workdir, "cache.db"),
+        DISTRICT_GEOJSON=os.path.join(workdir, "none.geojson"),
+        NOMINATIM_REVERSE_URL=nominatim_url + "/reverse",
+        NOMINATIM_RATE_LIMIT="100000",  # 스텁에는 이용 정책 제한이 없음
+        RATE_LIMITS="off",  # 부하 발생기는 클라이언트 하나 - 클라이언트별 한도를 끄고 서버 처리량만 측정
+        UPSTREAM_MAX_INFLIGHT_OPENAI="1000", UPSTREAM_MAX_INFLIGHT_GOOGLE_CSE="1000", UPSTREAM_MAX_INFLIGHT_NOMINATIM="1000",
+        GOOGLE_SEARCH_URL=cse_url + "/customsearch/v1",
+        GOOGLE_API_KEY="bench", GOOGLE_CSE_CX="bench",
+        OPENAI_API_KEY="bench", OPENAI_BASE_URL=openai_url + "/v1",
+    )
+    app_process, base = start_app(env, os.path.join(workdir, "app.log"))
+
+    cities = max(1, args.districts // 100)
+    rng = random.Random(args.seed)
+    # 클라이언트는 가이드를 한 번 받은 뒤 ETag 로 재사용 (main.js 와 같은 방식)
+    guide_etag = requests.post(base + "/get-recycle-info", json={"city": "도시0시", "districtKey": "동네0구"}).json()["guide_etag"]
+
+    def recycle_info(session, i):
+        n = rng.randrange(args.districts)
+        return session.post(base + "/get-recycle-info", json={
+            "city": f"도시{min(n // 100, cities - 1)}시", "districtKey": f"동네{n % 100}구", "guideEtag": guide_etag,
+        })
+
+    def reverse_geocode(session, i):
+        min_lon, min_lat, max_lon, max_lat = KOREA_BBOX
+        return session.post(base + "/reverse-geocode", json={
+            "latitude": rng.uniform(min_lat, max_lat), "longitude": rng.uniform(min_lon, max_lon),
+        })
+
+    def chatbot_guide(session, i):
+        n = rng.randrange(args.guide_items)
+        return session.post(base + "/chatbot-unified-chat", json={
+            "message": f"{rng.choice(MATERIALS)} 품목{n} 어떻게 버려요?", "location": "도시0시 동네0구",
+        })
+
+    def chatbot_llm(session, i):
+        # 무작위 음절로 만든 서로 다른 질문 → 유사 질문 캐시/로컬 라우터를 지나 CSE + OpenAI 스텁까지 호출
+        words = "".join(chr(0xAC00 + rng.randrange(11172)) for _ in range(6))
+        return session.post(base + "/chatbot-unified-chat", json={
+            "message": f"{words[:3]} {words[3:]} 어떻게 처리해요?", "location": "도시0시 동네0구",
+        })
+
+    scenarios = {
+        "get_recycle_info": recycle_info,
+        "reverse_geocode": reverse_geocode,
+        "chatbot_guide": chatbot_guide,
+        "chatbot_llm": chatbot_llm,
+    }
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "keep_workdir")},
+        "dataset": {"districts": args.districts, "guide_items": args.guide_items, "seed_seconds": seed_seconds},
+        "scenarios": {},
+    }
+    try:
+        for name, make_request in scenarios.items():
+            print(f"➡️ {name} ...", file=sys.stderr)
+            report["scenarios"][name] = run_scenario(make_request, args.requests, args.concurrency, args.warmup)
+        report["server"] = {
+            path.strip("/"): requests.get(base + path).json() for path in ("/cache-stats", "/db-stats", "/upstream-stats")
+        }
+        report["upstream_calls"] = {"nominatim": nominatim.calls, "cse": cse.calls, "openai": openai.calls}
+    finally:
+        app_process.terminate()
+        app_process.wait()
+        for server in (nominatim, cse, openai):
+            server.shutdown()
+        if args.keep_workdir:
+            print(f"💡 작업 디렉터리: {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ 성능 저하: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
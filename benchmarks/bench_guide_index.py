@@ -0,0 +1,201 @@
+# bench_guide_index.py
+# 사용법: python benchmarks/bench_guide_index.py [--guide-items 100000] [--queries 2000] [--batch 32]
+#                                               [--postings-budget 8192] [--output report.json] [--baseline 이전report.json]
+#  - bench_endpoints 와 같은 합성 가이드 DB 로 유사도 색인(guide_index)의 전체 생성 / 증분 재구성 /
+#    저장·메모리 매핑 시간과 단건·배치 질의 지연 시간(p50/p95/p99)을 잽니다.
+#  - 같은 질의로 기존 라우터 후보 검색(단어마다 FTS)과, 항목별 원본 빈도로 모든 항목을 채점한 기준값과의 1위 일치율도 봅니다.
+#    기본(정확한 검색)에서 일치율이 1.0 이 아니면 종료 코드 1 을 반환합니다. (--postings-budget: 근사 모드 측정)
+#  - --baseline 을 주면 허용 범위(--tolerance)를 넘게 느려진 항목이 있을 때 종료 코드 1 을 반환합니다.
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_endpoints import MATERIALS, ROOT, build_database, percentile  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+import guide_index  # noqa: E402
+from guide_index import GuideVectorIndex, load_guide_rows  # noqa: E402
+from guide_search import search_guide_items  # noqa: E402
+
+
+def make_queries(rows, count, seed=11):
+    """물품 이름 그대로 / 일부 / 자연어 질문 / 오타 섞인 이름을 고르게 섞은 질의"""
+    rng = random.Random(seed)
+    queries = []
+    for n in range(count):
+        name = rng.choice(rows)[1]
+        kind = n % 4
+        if kind == 0:
+            queries.append(name)
+        elif kind == 1:
+            queries.append(name[:-1])
+        elif kind == 2:
+            queries.append(f"{rng.choice(MATERIALS)} {name.split()[-1]} 어떻게 버려요?")
+        else:
+            i = rng.randrange(len(name))
+            queries.append(name[:i] + name[i + 1:])
+    return queries
+
+
+def timed_ms(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - started) * 1000, result
+
+
+def latency_summary(samples):
+    samples = sorted(samples)
+    return {"p50": percentile(samples, 50), "p95": percentile(samples, 95), "p99": percentile(samples, 99),
+            "mean": round(sum(samples) / len(samples), 3)}
+
+
+def measure_queries(index, queries, batch):
+    for query in queries[:100]:
+        index.search(query)  # 워밍업
+    single = [timed_ms(index.search, query)[0] for query in queries]
+    batched = []
+    for start in range(0, len(queries) - batch + 1, batch):
+        elapsed, _ = timed_ms(index.search_batch, queries[start:start + batch])
+        batched.append(elapsed / batch)
+    return {"single_ms": latency_summary(single), "batch_per_query_ms": latency_summary(batched)}
+
+
+def fts_candidates(conn, query, limit=5):
+    """기존 라우터 후보 검색: 질문의 단어마다 FTS 검색"""
+    candidates = {}
+    for token in query.split():
+        for row in search_guide_items(conn, token, limit=limit):
+            candidates[row["item_id"]] = row
+    return candidates
+
+
+def exhaustive_scores(index, query):
+    """열(CSC)을 쓰지 않고 모든 항목의 원본 빈도(CSR)로 다시 계산한 코사인 점수 (기준값)"""
+    features, weights = index.query_vector(query)
+    if not len(features):
+        return np.zeros(len(index))
+    return index._exact_scores(np.arange(len(index)), features, weights)
+
+
+def top1_agreement(index, queries):
+    """색인 검색의 1위 항목이 전수 채점에서도 1위 점수를 받는 비율 (동점 항목은 같은 것으로)"""
+    rows = {item_id: row for row, item_id in enumerate(index.item_ids.tolist())}
+    same = 0
+    for query in queries:
+        scores = exhaustive_scores(index, query)
+        found = index.search(query, 1)
+        got = scores[rows[found[0][0]]] if found else 0.0
+        if got >= scores.max() - 1e-4:
+            same += 1
+    return round(same / len(queries), 4)
+
+
+def compare(report, baseline, tolerance):
+    """(1 + tolerance) 배를 넘게 느려진 항목 목록"""
+    regressions = []
+    pairs = [("build_ms", report["build"]["full_ms"], baseline.get("build", {}).get("full_ms")),
+             ("incremental_ms", report["build"]["incremental_ms"], baseline.get("build", {}).get("incremental_ms"))]
+    for name in ("single_ms", "batch_per_query_ms"):
+        pairs.append((f"{name}.p95", report["in_memory"][name]["p95"],
+                      baseline.get("in_memory", {}).get(name, {}).get("p95")))
+    for name, current, previous in pairs:
+        if previous is None:
+            continue
+        print(f"{name:>26}: {previous:>10.3f} → {current:>10.3f}", file=sys.stderr)
+        if current > previous * (1 + tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가이드 유사도 색인 생성 / 질의 성능 측정")
+    parser.add_argument("--guide-items", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--changed", type=int, default=100, help="증분 재구성 측정 때 바꿀 항목 수")
+    parser.add_argument("--postings-budget", type=int, help="근사 모드로 측정 (질의당 1단계 읽기 상한, 기본: 정확한 검색)")
+    parser.add_argument("--output", help="JSON 보고서 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 보고서")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="허용 성능 저하 비율")
+    parser.add_argument("--keep-workdir", action="store_true", help="합성 DB 와 저장된 색인을 지우지 않음")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_guide_index_")
+    db_path = os.path.join(workdir, "bench.db")
+    index_dir = os.path.join(workdir, "guide_index")
+    report = {"config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "keep_workdir")},
+              "index": {"dimension": guide_index.DIMENSION, "ngrams": list(guide_index.NGRAM_SIZES),
+                        "postings_budget": args.postings_budget, "rescore_factor": guide_index.RESCORE_FACTOR}}
+    try:
+        report["dataset"] = {"guide_items": args.guide_items,
+                             "seed_seconds": build_database(db_path, 1, args.guide_items)}
+        conn = sqlite3.connect(db_path)
+        rows = load_guide_rows(conn)
+        queries = make_queries(rows, args.queries)
+
+        print("➡️ 색인 생성 ...", file=sys.stderr)
+        full_ms, index = timed_ms(GuideVectorIndex.build, 1, rows)
+        changed = list(rows)
+        for n in random.Random(5).sample(range(len(rows)), min(args.changed, len(rows))):
+            item_id, name, description = changed[n]
+            changed[n] = (item_id, name + " 뚜껑", description)
+        incremental_ms, updated = timed_ms(GuideVectorIndex.build, 2, changed, index)
+        save_ms, _ = timed_ms(updated.save, index_dir)
+        load_ms, mapped = timed_ms(GuideVectorIndex.load, index_dir, 2)
+        updated.postings_budget = mapped.postings_budget = args.postings_budget
+        report["build"] = {
+            "full_ms": round(full_ms, 1),
+            "incremental_ms": round(incremental_ms, 1),
+            "incremental_vectorized": updated.stats["vectorized"],
+            "save_ms": round(save_ms, 1),
+            "mmap_load_ms": round(load_ms, 2),
+            "nnz": updated.stats["nnz"],
+            "megabytes": round(updated.nbytes / 1e6, 1),
+        }
+
+        print("➡️ 질의 ...", file=sys.stderr)
+        report["in_memory"] = measure_queries(updated, queries, args.batch)
+        report["memory_mapped"] = measure_queries(mapped, queries, args.batch)
+        report["in_memory"]["top1_agreement_with_exact"] = top1_agreement(updated, queries[:300])
+        fts = [timed_ms(fts_candidates, conn, query)[0] for query in queries[:500]]
+        report["fts_router_candidates_ms"] = latency_summary(fts)
+        conn.close()
+    finally:
+        if args.keep_workdir:
+            print(f"💡 작업 디렉터리: {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+    failed = False
+    if args.postings_budget is None and report["in_memory"]["top1_agreement_with_exact"] < 1.0:
+        print("❌ 정확한 검색의 1위가 전수 채점과 다릅니다.", file=sys.stderr)
+        failed = True
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ 유사도 색인 성능 저하: {', '.join(regressions)}", file=sys.stderr)
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# bench_startup.py
+# 사용법: python benchmarks/bench_startup.py [--runs 10] [--districts 10000] [--guide-items 100000]
+#                                            [--output report.json] [--baseline 이전report.json]
+#  - 새 파이썬 프로세스에서 `import app` 시간, create_app() 시간, 첫 요청(/get-recycle-info) 처리 시간을 재고,
+#    실제 서버 프로세스를 띄워 실행부터 첫 응답까지 걸린 시간(콜드 스타트)을 잽니다.
+#  - WARM_CACHES=0 (첫 요청이 캐시를 채움) / 1 (create_app 에서 예열) 두 가지를 각각 --runs 번 측정합니다.
+#  - --baseline 을 주면 중앙값이 허용 범위(--tolerance)를 넘게 느려진 항목이 있을 때 종료 코드 1 을 반환합니다.
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_endpoints import ROOT, build_database, free_port, percentile  # noqa: E402
+
+# 측정용 자식 프로세스 (결과를 JSON 한 줄로 출력)
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+response = application.test_client().post("/get-recycle-info", json={"city": "도시0시", "districtKey": "동네0구"})
+assert response.status_code == 200, response.status_code
+answered = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (answered - created) * 1000,
+    "openai_imported": "openai" in sys.modules,
+}))
+"""
+
+
+def run_probe(env):
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"측정 프로세스 실패:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def time_to_first_response(env, log_path):
+    """서버 프로세스 실행 → 첫 /get-recycle-info 200 응답까지 (인터프리터 시작 포함)"""
+    port = free_port()
+    started = time.perf_counter()
+    with open(log_path, "a") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-c", f"from app import create_app; create_app().run(host='127.0.0.1', port={port}, threaded=True)"],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"app.py 서버가 시작되지 않았습니다. 로그: {log_path}")
+            if time.perf_counter() - started > 60:
+                raise RuntimeError("app.py 서버 시작 대기 시간 초과")
+            try:
+                response = requests.post(f"http://127.0.0.1:{port}/get-recycle-info",
+                                         json={"city": "도시0시", "districtKey": "동네0구"}, timeout=5)
+                if response.status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.005)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def summarize(values):
+    values = sorted(values)
+    return {"median": round(statistics.median(values), 1), "p95": percentile(values, 95), "max": round(values[-1], 1)}
+
+
+def compare(report, baseline, tolerance):
+    """중앙값이 (1 + tolerance) 배를 넘은 (모드, 항목) 목록"""
+    regressions = []
+    for mode, metrics in report["modes"].items():
+        for name, current in metrics.items():
+            previous = baseline.get("modes", {}).get(mode, {}).get(name)
+            if not isinstance(current, dict) or previous is None:
+                continue
+            print(f"{mode:>5} {name:>22}: {previous['median']:>8.1f} → {current['median']:>8.1f} ms", file=sys.stderr)
+            if current["median"] > previous["median"] * (1 + tolerance):
+                regressions.append(f"{mode}.{name}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="app.py 시작 시간 측정 (import / create_app / 첫 요청 / 콜드 스타트)")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--districts", type=int, default=10000)
+    parser.add_argument("--guide-items", type=int, default=100000)
+    parser.add_argument("--output", help="JSON 보고서 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 보고서")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="허용 성능 저하 비율")
+    parser.add_argument("--keep-workdir", action="store_true", help="합성 DB 와 app.log 를 지우지 않음")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    db_path = os.path.join(workdir, "bench.db")
+    seed_seconds = build_database(db_path, args.districts, args.guide_items)
+    base_env = dict(
+        os.environ,
+        DATABASE=db_path,
+        CACHE_DATABASE=os.path.join(workdir, "cache.db"),
+        DISTRICT_GEOJSON=os.path.join(workdir, "none.geojson"),
+        RATE_LIMITS="off",
+        OPENAI_API_KEY="bench", GOOGLE_API_KEY="bench", GOOGLE_CSE_CX="bench",
+    )
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "keep_workdir")},
+        "dataset": {"districts": args.districts, "guide_items": args.guide_items, "seed_seconds": seed_seconds},
+        "modes": {},
+    }
+    try:
+        for mode, warm in (("cold", "0"), ("warm", "1")):
+            env = dict(base_env, WARM_CACHES=warm)
+            print(f"➡️ WARM_CACHES={warm} ...", file=sys.stderr)
+            probes = [run_probe(env) for _ in range(args.runs)]
+            served = [time_to_first_response(env, os.path.join(workdir, "app.log")) for _ in range(args.runs)]
+            metrics = {name: summarize([p[name] for p in probes])
+                       for name in ("import_ms", "create_app_ms", "first_request_ms")}
+            metrics["create_to_first_response_ms"] = summarize(
+                [p["create_app_ms"] + p["first_request_ms"] for p in probes])
+            metrics["spawn_to_first_response_ms"] = summarize(served)
+            metrics["openai_imported_at_first_request"] = any(p["openai_imported"] for p in probes)
+            report["modes"][mode] = metrics
+    finally:
+        if args.keep_workdir:
+            print(f"💡 작업 디렉터리: {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ 시작 시간 저하: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
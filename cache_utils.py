@@ -0,0 +1,196 @@
+# cache_utils.py
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ----------------------------------------
+# ✅ 공용 캐시 도구 (LRU+TTL / SQLite 공유 저장소 / single-flight / 토큰 버킷)
+# ----------------------------------------
+
+_MISSING = object()
+
+
+class TTLCache:
+    """크기 제한(LRU)과 항목별 만료 시간(TTL)을 갖는 스레드 안전 메모리 캐시"""
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteTTLStore:
+    """여러 워커 프로세스가 공유하는 SQLite 기반 키-값 캐시 (값은 JSON, 항목별 만료 시각)"""
+
+    def __init__(self, db_path, table, purge_every=1000):
+        self.db_path = db_path
+        self.table = table
+        self.purge_every = purge_every  # set() 이 횟수마다 만료된 항목을 지웁니다. (읽을 때 건너뛰기만 하면 테이블이 계속 커짐)
+        self._sets = 0
+        conn = self._connect()
+        try:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    cache_key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def get(self, key):
+        """(값, 남은 TTL 초)를 반환합니다. 없거나 만료되었으면 None."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT payload, expires_at FROM {self.table} WHERE cache_key = ?", (key,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        remaining = row[1] - time.time()
+        if remaining <= 0:
+            return None
+        return json.loads(row[0]), remaining
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        try:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (cache_key, payload, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time() + ttl)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        self._sets += 1
+        if self._sets % self.purge_every == 0:
+            self.purge_expired()
+
+    def purge_expired(self):
+        """만료된 항목을 지웁니다. 지운 행 수를 반환합니다."""
+        conn = self._connect()
+        try:
+            deleted = conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)).rowcount
+            conn.commit()
+            return deleted
+        finally:
+            conn.close()
+
+
+class SingleFlight:
+    """같은 키에 대한 동시 호출을 하나의 실행으로 합칩니다. (나머지는 결과를 기다려 공유)"""
+
+    def __init__(self):
+        self._calls = {}  # key -> [event, result, error]
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """fn() 결과를 반환합니다. 두 번째 값은 다른 호출의 결과를 공유했는지 여부입니다."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None, None]
+
+        if not leader:
+            call[0].wait()
+            if call[2] is not None:
+                raise call[2]
+            return call[1], True
+
+        try:
+            call[1] = fn()
+            return call[1], False
+        except Exception as e:
+            call[2] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call[0].set()
+
+
+class TokenBucket:
+    """초당 rate 개의 토큰을 채우는 토큰 버킷 (최대 capacity 개까지 누적)"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """토큰 하나를 예약하고, 사용 가능해질 때까지 기다려야 할 시간(초)을 반환합니다."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def try_acquire(self):
+        """토큰이 있으면 즉시 소비하고 True, 없으면 소비하지 않고 False 를 반환합니다."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, max_wait=None):
+        """토큰을 얻을 때까지 대기합니다. max_wait 를 넘겨야 하면 대기하지 않고 False 를 반환합니다."""
+        wait = self._reserve()
+        if max_wait is not None and wait > max_wait:
+            with self._lock:
+                self._tokens += 1  # 예약 취소
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
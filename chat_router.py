@@ -0,0 +1,166 @@
+# chat_router.py
+import json
+import re
+import threading
+
+from answer_cache import jaccard, question_tokens, shingles
+from guide_search import search_guide_items
+
+# ----------------------------------------
+# ✅ 로컬 지식 라우터 (가이드 DB / 지역 규정으로 답할 수 있으면 LLM 생략)
+# ----------------------------------------
+
+# 지역 규정(배출 시간 / 봉투 색상)을 묻는 표현 - 물품 매칭 점수 계산에서는 제외합니다.
+TIME_KEYWORDS = ("언제", "요일", "시간", "몇시")
+BAG_KEYWORDS = ("봉투", "색깔", "색상", "무슨색")
+RULE_FILLER_TOKENS = {"몇", "시", "시에", "무슨", "몇요일", "무슨요일"}
+
+
+def name_variants(item_name):
+    """'휴대폰 배터리/보조배터리' → ['휴대폰 배터리/보조배터리', '휴대폰 배터리', '보조배터리']"""
+    parts = [part.strip() for part in re.split(r"[/(),]", item_name) if part.strip()]
+    return [item_name] + [part for part in parts if part != item_name]
+
+
+class ChatRouter:
+    """질문을 가이드 항목/지역 규정과 비교해 처리 방식을 정합니다.
+
+    - local_answer : 점수가 answer_threshold 이상 → LLM 없이 템플릿 답변
+    - local_context: context_threshold 이상 → 웹 검색 대신 로컬 항목을 컨텍스트로 LLM 호출
+    - llm          : 그 외 → 기존 흐름 (웹 검색 + LLM)
+
+    retriever(conn, text, k) 를 주면 후보 항목을 (단어마다 FTS 검색하는 대신) 유사도 색인 한 번으로 찾습니다.
+    """
+
+    def __init__(self, answer_threshold=0.6, context_threshold=0.25, max_candidates=5, retriever=None):
+        self.answer_threshold = answer_threshold
+        self.context_threshold = context_threshold
+        self.max_candidates = max_candidates
+        self.retriever = retriever
+        self.stats = {"local_answer": 0, "local_context": 0, "llm": 0}
+        self._stats_lock = threading.Lock()
+
+    def _item_tokens(self, question):
+        tokens = []
+        for token in question_tokens(question):
+            if token in RULE_FILLER_TOKENS or any(k in token for k in TIME_KEYWORDS + BAG_KEYWORDS):
+                continue
+            tokens.append(token)
+        return tokens
+
+    def _best_item(self, conn, tokens):
+        """질문의 핵심 토큰과 가장 비슷한 가이드 항목과 점수 (문자 n-gram Jaccard)"""
+        if not tokens:
+            return None, 0.0
+
+        candidates = {}
+        if self.retriever is not None:
+            try:
+                candidates = {row["item_id"]: row for row in self.retriever(conn, " ".join(tokens), self.max_candidates)}
+            except Exception as e:
+                print(f"❌ 유사도 색인 검색 실패, FTS 검색으로 대체: {e}")
+        if not candidates:
+            for token in tokens:
+                for row in search_guide_items(conn, token, limit=self.max_candidates):
+                    candidates[row["item_id"]] = row
+
+        question_shingles = shingles(" ".join(tokens))
+        best, best_score = None, 0.0
+        for item_id, row in candidates.items():
+            score = max(jaccard(question_shingles, shingles(variant)) for variant in name_variants(row["name"]))
+            if score > best_score:
+                best, best_score = item_id, score
+        if best is None:
+            return None, 0.0
+
+        item = conn.execute("""
+            SELECT i.item_id, i.name, i.description, c.name
+            FROM guide_item i JOIN guide_category c ON c.category_id = i.category_id
+            WHERE i.item_id = ?
+        """, (best,)).fetchone()
+        return {"item_id": item[0], "name": item[1], "description": item[2], "category": item[3]}, best_score
+
+    @staticmethod
+    def _matching_rules(question, tokens, item, location_info):
+        """질문/매칭 항목과 관련된 지역 규정 줄 목록"""
+        if not location_info:
+            return []
+        normalized = question.replace(" ", "")
+        rules = []
+
+        if any(k in normalized for k in TIME_KEYWORDS):
+            rules.append(f"배출시간: {location_info['배출시간']}")
+
+        names = tokens + ([item["name"]] if item else [])
+        for rule_name, value in location_info["재활용품"].items():
+            if any(rule_name in name or (len(name) >= 2 and name in rule_name) for name in names):
+                rules.append(f"{rule_name} 배출: {value}")
+
+        if any(k in normalized for k in BAG_KEYWORDS):
+            # 특정 봉투("음식물용" → "음식물")를 물으면 그 봉투만, 아니면 전체 안내
+            bags = location_info["봉투색상"]
+            named = [name for name in bags if name.rstrip("용") in normalized]
+            rules.extend(f"{name} 봉투: {bags[name]}" for name in (named or bags))
+        return rules
+
+    def route(self, conn, question, location_label, location_info):
+        """라우팅 결정을 dict 로 반환합니다. (action, score, answer/context, sources, item, rules)"""
+        tokens = self._item_tokens(question)
+        item, score = self._best_item(conn, tokens)
+        rules = self._matching_rules(question, tokens, item, location_info)
+
+        # 물품 없이 지역 규정만 묻는 질문 ("음식물 봉투 무슨 색이에요?")은 규정이 있으면 바로 답합니다.
+        if not tokens or (item is None and rules):
+            score = 1.0 if rules else 0.0
+
+        if score >= self.answer_threshold and (item is not None or rules):
+            action = "local_answer"
+        elif score >= self.context_threshold and item is not None:
+            action = "local_context"
+        else:
+            action = "llm"
+
+        decision = {"action": action, "score": round(score, 3), "item": item, "rules": rules,
+                    "answer": None, "context": None, "sources": []}
+        if item is not None and action != "llm":
+            # 사람이 볼 수 있는 링크 - 메인 페이지의 가이드 항목 상세 창 (/guide/* 는 JSON API)
+            decision["sources"] = [{"title": f"분리배출 가이드: {item['name']}", "url": f"/final#guide-item-{item['item_id']}"}]
+        if action == "local_answer":
+            decision["answer"] = self._template_answer(item if score >= self.answer_threshold else None,
+                                                       rules, location_label)
+        elif action == "local_context":
+            decision["context"] = self._context(item, rules, location_label)
+
+        with self._stats_lock:
+            self.stats[action] += 1
+        # 임계값 조정을 위한 결정 로그 (한 줄 JSON)
+        print("🔀 챗봇 라우팅:", json.dumps({
+            "question": question, "action": action, "score": decision["score"],
+            "item": item["name"] if item else None, "rules": len(rules),
+        }, ensure_ascii=False))
+        return decision
+
+    @staticmethod
+    def _template_answer(item, rules, location_label):
+        lines = []
+        if item is not None:
+            lines.append(f"[{item['name']}] 분리배출 방법입니다.\n")
+            lines.append(item["description"])
+        if rules:
+            if lines:
+                lines.append("")
+            lines.append(f"📍 {location_label or '현재 지역'} 기준")
+            lines.extend(f"- {rule}" for rule in rules)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _context(item, rules, location_label):
+        context = "다음은 이 서비스의 분리배출 가이드와 지역 규정입니다. 이 정보를 우선 활용하여 답변을 작성하세요:\n\n"
+        context += f"[가이드] {item['name']} ({item['category']}): {item['description']}\n"
+        for rule in rules:
+            context += f"[{location_label or '지역'} 규정] {rule}\n"
+        return context
+
+    def snapshot_stats(self):
+        with self._stats_lock:
+            return dict(self.stats)
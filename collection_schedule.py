@@ -0,0 +1,301 @@
+# collection_schedule.py
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from district_aliases import read_district_version
+
+# ----------------------------------------
+# ✅ 배출 시간 규칙 → 주간 시간표 비트맵 (7일 × 48칸, 30분 단위)
+# ----------------------------------------
+#  "월~금 오후 8시 ~ 오전 5시" 처럼 자유 텍스트로 된 배출시간/품목별 요일을 시드 때 한 번 해석해
+#  월요일 0시부터 30분 칸마다 비트 하나(배출 가능 = 1)인 336비트 정수로 저장합니다.
+#  "지금 내놓아도 되나 / 다음은 언제" 는 비트 하나 확인과 비트 연산으로, "지금 페트병 수거하는 구" 는
+#  (품목, 칸)별 구 비트 집합 조회 한 번으로 답합니다.
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+FULL_WEEK = (1 << WEEK_SLOTS) - 1
+BITMAP_BYTES = WEEK_SLOTS // 8
+
+TIMEZONE = ZoneInfo("Asia/Seoul")
+SUNSET_MINUTES = 18 * 60  # "일몰 후" 는 계절과 관계없이 오후 6시로 근사합니다.
+GENERAL = ""              # 품목 없이 지역 배출시간 전체를 뜻하는 item_name
+
+# 품목 이름 별칭 (질의용)
+ITEM_ALIASES = {"pet": "페트병", "페트": "페트병", "vinyl": "비닐", "plastic bag": "비닐"}
+
+_DAYS = "월화수목금토일"  # datetime.weekday() 순서 (월 = 0)
+_DAY = r"[월화수목금토일](?:요일)?"
+_DAY_TOKEN = re.compile(rf"\s*[,·/]?\s*(매일|{_DAY}(?:\s*~\s*{_DAY})?)(?=[\s,·/~]|$)")
+_TIME = re.compile(r"(오전|오후)?\s*(\d{1,2})(?:\s*:\s*(\d{2})|\s*시(?:\s*(\d{1,2})\s*분|\s*(반))?)")
+_NOTE = re.compile(r"\(([^)]*)\)")
+
+
+class ScheduleParseError(ValueError):
+    """배출시간 문자열을 시간 구간으로 해석하지 못한 경우"""
+
+
+def parse_days(text):
+    """문자열 앞부분의 요일 표현 → (요일 번호 집합, 나머지 문자열)  예) "월~금, 일 녹색 그물망" → ({0..4, 6}, "녹색 그물망")
+
+    "수거", "일몰" 처럼 요일 글자로 시작하는 단어는 요일로 보지 않습니다.
+    """
+    days = set()
+    pos = 0
+    while True:
+        match = _DAY_TOKEN.match(text, pos)
+        if not match:
+            break
+        token = match.group(1)
+        if token == "매일":
+            days.update(range(7))
+        else:
+            first, _, last = (part.strip().replace("요일", "") for part in token.partition("~"))
+            start = _DAYS.index(first)
+            end = _DAYS.index(last) if last else start
+            days.update((start + i) % 7 for i in range((end - start) % 7 + 1))
+        pos = match.end()
+    return days, text[pos:].strip(" ,·/")
+
+
+def parse_time(text):
+    """"오후 8시" / "오전 5시 30분" / "20:00" / "일몰 후" → 0시부터의 분"""
+    if "일몰" in text:
+        return SUNSET_MINUTES
+    if "자정" in text:
+        return 0
+    match = _TIME.search(text)
+    if not match:
+        raise ScheduleParseError(f"시각을 찾을 수 없음: {text!r}")
+    meridiem, hour, colon_minute, minute, half = match.groups()
+    hour = int(hour) % 12 + (12 if meridiem == "오후" else 0) if meridiem else int(hour) % 24
+    minute = int(colon_minute or minute or 0) + (30 if half else 0)
+    return hour * 60 + minute
+
+
+class WeeklyWindow:
+    """요일 집합 + 시작/끝 시각 (끝이 시작보다 이르면 다음 날 새벽까지)"""
+
+    __slots__ = ("days", "start", "end")
+
+    def __init__(self, days, start, end):
+        self.days = frozenset(days)
+        self.start = start
+        self.end = end
+
+    def with_days(self, days):
+        return WeeklyWindow(days, self.start, self.end)
+
+    def with_start(self, start):
+        return WeeklyWindow(self.days, start, self.end)
+
+    def bitmap(self):
+        first = self.start // SLOT_MINUTES
+        length = (-(-self.end // SLOT_MINUTES) - first) % SLOTS_PER_DAY or SLOTS_PER_DAY
+        bits = 0
+        for day in self.days:
+            origin = day * SLOTS_PER_DAY + first
+            for offset in range(length):
+                bits |= 1 << ((origin + offset) % WEEK_SLOTS)  # 일요일 밤 → 월요일 새벽으로 이어짐
+        return bits
+
+
+def parse_discharge_time(text):
+    """city_district.discharge_time → (WeeklyWindow, 부가 설명 또는 None)
+
+    예) "월~금 일몰 후 ~ 오전 5시 (토요일 부분 수거)" → 월~금 18:00~05:00, "토요일 부분 수거"
+    """
+    notes = _NOTE.findall(text)
+    days, rest = parse_days(_NOTE.sub("", text).strip())
+    start_text, sep, end_text = rest.partition("~")
+    if not sep:
+        raise ScheduleParseError(f"시작 ~ 끝 구간이 없음: {text!r}")
+    window = WeeklyWindow(days or range(7), parse_time(start_text), parse_time(end_text))
+    return window, "; ".join(notes) or None
+
+
+def parse_item_rule(value, base):
+    """recycle_detail 의 품목 규칙("목요일", "월~금, 일 녹색 그물망", "수거 전날 일몰 후 배출")을 지역 배출시간 base 에 적용합니다.
+
+    요일이 있으면 그 요일에 시작하는 배출시간만, "일몰" 이 있으면 시작 시각만 바꾸고, 나머지 글은 부가 설명으로 남깁니다.
+    """
+    notes = _NOTE.findall(value)
+    days, rest = parse_days(_NOTE.sub("", value).strip())
+    window = base.with_days(days) if days else base
+    if "일몰" in rest:
+        window = window.with_start(SUNSET_MINUTES)
+    if rest and not days:
+        notes.insert(0, rest)  # 요일 없는 규칙 - 지역 배출시간 기준 (원문을 설명으로)
+    elif rest:
+        notes.append(rest)
+    return window, "; ".join(notes) or None
+
+
+def compile_district_schedule(discharge_time, recyclables):
+    """한 구의 배출시간과 {품목: 규칙} → [(item_name, 비트맵 bytes, 원문, 설명)]  (item_name "" 는 지역 배출시간 전체)"""
+    base, note = parse_discharge_time(discharge_time)
+    rows = [(GENERAL, to_bytes(base.bitmap()), discharge_time, note)]
+    for item, value in recyclables.items():
+        window, item_note = parse_item_rule(value, base)
+        rows.append((item, to_bytes(window.bitmap()), value, item_note))
+    return rows
+
+
+def to_bytes(bits):
+    return bits.to_bytes(BITMAP_BYTES, "little")
+
+
+def from_bytes(blob):
+    return int.from_bytes(blob, "little")
+
+
+# ----------------------------------------
+# ✅ 시간표 조회 (비트 연산)
+# ----------------------------------------
+
+def slot_of(moment):
+    """시각(aware datetime) → 한국 시간 기준 주간 칸 번호"""
+    local = moment.astimezone(TIMEZONE)
+    return local.weekday() * SLOTS_PER_DAY + (local.hour * 60 + local.minute) // SLOT_MINUTES
+
+
+def _lowest_bit(bits):
+    return (bits & -bits).bit_length() - 1
+
+
+def window_at(bits, slot):
+    """slot 부터 보아 현재(또는 다음) 배출 가능 구간 → (시작까지 칸 수, 구간 길이 칸 수), 가능한 때가 없으면 None"""
+    if not bits:
+        return None
+    rotated = ((bits >> slot) | (bits << (WEEK_SLOTS - slot))) & FULL_WEEK
+    start = _lowest_bit(rotated)
+    closed = ~(rotated >> start) & ((1 << (WEEK_SLOTS - start)) - 1)
+    length = _lowest_bit(closed) if closed else WEEK_SLOTS - start
+    return start, length
+
+
+def describe_window(bits, moment):
+    """moment 기준 허용 여부와 현재/다음 구간(ISO 시각)을 반환합니다."""
+    slot = slot_of(moment)
+    window = window_at(bits, slot)
+    local = moment.astimezone(TIMEZONE)
+    slot_start = local.replace(second=0, microsecond=0) - timedelta(minutes=local.minute % SLOT_MINUTES)
+    result = {"allowed_now": bool(window and window[0] == 0), "window": None}
+    if window:
+        # 지금 열려 있으면 window 는 지금부터 닫힐 때까지, 아니면 다음에 열리는 구간
+        start = slot_start + timedelta(minutes=window[0] * SLOT_MINUTES)
+        end = start + timedelta(minutes=window[1] * SLOT_MINUTES)
+        result["window"] = {
+            "start": (local if window[0] == 0 else start).isoformat(timespec="minutes"),
+            "end": end.isoformat(timespec="minutes"),
+            "always": window[1] >= WEEK_SLOTS,
+        }
+    return result
+
+
+def parse_moment(raw):
+    """?at= 값(ISO 8601) → aware datetime (없으면 지금, 시간대가 없으면 한국 시간으로 봄, 형식이 틀리면 ValueError)"""
+    if not raw:
+        return datetime.now(TIMEZONE)
+    moment = datetime.fromisoformat(raw)
+    return moment if moment.tzinfo else moment.replace(tzinfo=TIMEZONE)
+
+
+def normalize_item(item):
+    item = (item or "").strip()
+    return ITEM_ALIASES.get(item.lower(), item)
+
+
+class ScheduleNotSeeded(Exception):
+    """collection_schedule 테이블이 없는 DB (마이그레이션 4 이전) - `flask --app app init-db` 가 필요합니다."""
+
+
+class ScheduleIndex:
+    """collection_schedule 테이블 전체를 메모리에 올린 조회용 색인
+
+    - schedules[district_id][item] = (비트맵 int, 원문, 설명)
+    - collecting[item][slot] = 그 칸에 배출 가능한 구들의 비트 집합 (비트 번호 = districts 목록의 순번)
+    """
+
+    def __init__(self, rows, districts):
+        self.districts = districts  # [(district_id, city, district)]
+        ordinal = {district_id: i for i, (district_id, _, _) in enumerate(districts)}
+        self.schedules = {}
+        self.collecting = {}
+        for district_id, item, blob, rule, note in rows:
+            bits = from_bytes(blob)
+            self.schedules.setdefault(district_id, {})[item] = (bits, rule, note)
+            slots = self.collecting.setdefault(item, [0] * WEEK_SLOTS)
+            mask = 1 << ordinal[district_id]
+            while bits:
+                low = bits & -bits
+                slots[low.bit_length() - 1] |= mask
+                bits ^= low
+
+    @classmethod
+    def load(cls, conn):
+        districts = conn.execute(
+            "SELECT district_id, city_name, district_name FROM city_district ORDER BY district_id"
+        ).fetchall()
+        try:
+            rows = conn.execute(
+                "SELECT district_id, item_name, slots, rule, note FROM collection_schedule"
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ScheduleNotSeeded(f"배출 시간표가 없습니다. `flask --app app init-db` 로 DB 를 마이그레이션하세요. ({e})") from e
+        return cls(rows, [tuple(d) for d in districts])
+
+    def status(self, district_id, item, moment):
+        """구/품목의 배출 가능 여부와 구간. 품목 규칙이 없으면 지역 배출시간 기준 (구 자체가 없으면 None)"""
+        schedule = self.schedules.get(district_id)
+        if schedule is None:
+            return None
+        item = normalize_item(item)
+        entry = schedule.get(item) if item else None
+        basis = "item" if entry else "district"
+        bits, rule, note = entry or schedule[GENERAL]
+        return {"item": item or None, "basis": basis, "rule": rule, "note": note, **describe_window(bits, moment)}
+
+    def collecting_now(self, item, moment, limit=None):
+        """moment 에 item 을 내놓을 수 있는 구 → (총 개수, [(district_id, 시, 구)] 최대 limit 개)"""
+        slots = self.collecting.get(normalize_item(item) or GENERAL)
+        if slots is None:
+            return 0, []
+        members = slots[slot_of(moment)]
+        total = members.bit_count()
+        found = []
+        while members and (limit is None or len(found) < limit):
+            low = members & -members
+            found.append(self.districts[low.bit_length() - 1])
+            members ^= low
+        return total, found
+
+
+class ScheduleIndexCache:
+    """모든 요청이 공유하는 시간표 색인. district_meta 버전이 바뀌면(다른 프로세스의 init-db / 가져오기 포함) 다시 만듭니다."""
+
+    def __init__(self):
+        self._entry = None  # (버전, ScheduleIndex)
+        self._lock = threading.Lock()
+
+    def get(self, conn):
+        """현재 지역 데이터 버전에 맞는 색인을 반환합니다. (버전 확인 쿼리 1회)"""
+        version = read_district_version(conn)
+        entry = self._entry
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        with self._lock:
+            if self._entry is None or self._entry[0] != version:
+                self._entry = (version, ScheduleIndex.load(conn))
+            return self._entry[1]
+
+    def invalidate(self):
+        with self._lock:
+            self._entry = None
+
+
+schedule_index = ScheduleIndexCache()
@@ -0,0 +1,255 @@
+# conversation.py
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from answer_cache import question_tokens
+from http_client import LatencyHistogram
+
+# ----------------------------------------
+# ✅ 챗봇 대화 세션 (세션별 링 버퍼 + 토큰 예산 + 오래된 턴 요약, 전체는 LRU + 메모리 상한)
+# ----------------------------------------
+
+PROMPT_TOKEN_BUCKETS = (250, 500, 1000, 1500, 2000, 3000, 4000, 8000)
+MESSAGE_OVERHEAD_TOKENS = 4  # 메시지 하나당 역할/구분자 토큰 (대략값)
+TURN_OVERHEAD_BYTES = 200    # Turn 객체 / deque 칸 / 숫자 필드 (sys.getsizeof 로 잰 대략값)
+
+# 앞 질문에 기대는 짧은 후속 질문 ("그럼 뚜껑은요?", "이건요?")
+FOLLOW_UP_PREFIXES = ("그럼", "그러면", "그건", "그거", "그것", "이건", "이거", "저건", "저거", "그리고", "근데", "또")
+_FOLLOW_UP_TAIL = re.compile(r"(은|는|이|가|도)요\s*[?？]?$")
+_HANGUL = re.compile(r"[가-힣ㄱ-ㆎ]")
+_SENTENCE_END = re.compile(r"(?<=[.!?。])\s|\n")
+
+
+def estimate_tokens(text):
+    """gpt-4o 토큰 수 어림값: 한글은 글자당 1, 그 밖의 문자는 4글자당 1 (토크나이저 없이 예산 계산용)"""
+    if not text:
+        return 0
+    hangul = len(_HANGUL.findall(text))
+    return hangul + -(-(len(text) - hangul) // 4)
+
+
+def estimate_prompt_tokens(messages):
+    """OpenAI messages 전체의 토큰 수 어림값 (응답에 usage 가 없을 때 - 이미지 파트는 세지 않음)"""
+    total = 0
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, str):
+            total += estimate_tokens(content)
+        else:
+            total += sum(estimate_tokens(part.get("text")) for part in content if part.get("type") == "text")
+        total += MESSAGE_OVERHEAD_TOKENS
+    return total
+
+
+def is_follow_up(message):
+    message = (message or "").strip()
+    return message.startswith(FOLLOW_UP_PREFIXES) or (len(message) <= 12 and bool(_FOLLOW_UP_TAIL.search(message)))
+
+
+def _clip(text, limit):
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+class Turn:
+    """질문 하나와 그 답변"""
+
+    __slots__ = ("question", "answer", "tokens", "size")
+
+    def __init__(self, question, answer):
+        self.question = question
+        self.answer = answer
+        self.tokens = estimate_tokens(question) + estimate_tokens(answer) + 2 * MESSAGE_OVERHEAD_TOKENS
+        self.size = sys.getsizeof(question) + sys.getsizeof(answer) + TURN_OVERHEAD_BYTES
+
+    def summary_line(self):
+        """요약에 남길 한 줄 (질문 + 답변 첫 문장)"""
+        first_sentence = _SENTENCE_END.split(self.answer.strip(), 1)[0] if self.answer else ""
+        return f"- Q: {_clip(self.question, 60)} → A: {_clip(first_sentence, 90)}"
+
+
+class ConversationSession:
+    """최근 턴은 max_turns 칸 링 버퍼에 원문으로, 밀려난 턴은 summary_budget 토큰 안의 요약 줄로 남깁니다.
+
+    history_budget 을 넘지 않게 오래된 턴부터 요약으로 옮기므로, 대화가 길어져도 프롬프트에 붙는
+    이전 대화 크기는 (요약 + 최근 턴) 예산 안에서 일정합니다. 요약은 LLM 호출 없이 질문/답변 첫 문장을 줄여 만듭니다.
+    """
+
+    def __init__(self, session_id, max_turns, history_budget, summary_budget):
+        self.id = session_id
+        self.history_budget = history_budget
+        self.summary_budget = summary_budget
+        self.turns = deque(maxlen=max_turns)
+        self.summary_lines = deque()
+        self.summary_tokens = 0
+        self.topic = ""                # 후속 질문에 붙일 앞 질문의 핵심어
+        self.compactions = 0
+        self.last_prompt_tokens = None
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()   # 같은 세션의 동시 요청이 턴 순서를 섞지 않도록
+
+    @property
+    def history_tokens(self):
+        return sum(turn.tokens for turn in self.turns)
+
+    @property
+    def size(self):
+        return (sys.getsizeof(self) + sum(turn.size for turn in self.turns)
+                + sum(sys.getsizeof(line) for line in self.summary_lines) + sys.getsizeof(self.topic))
+
+    def effective_question(self, message):
+        """후속 질문이면 앞 질문의 핵심어를 붙여 검색/캐시/라우팅에 쓸 질문을 만듭니다. ("그럼 뚜껑은요?" → "페트병 뚜껑은요?")"""
+        if not self.topic or not is_follow_up(message):
+            return message
+        stripped = message.strip()
+        for prefix in FOLLOW_UP_PREFIXES:
+            if stripped.startswith(prefix):
+                stripped = stripped[len(prefix):].strip()
+                break
+        return f"{self.topic} {stripped}".strip()
+
+    def _compact(self, turn):
+        self.summary_lines.append(turn.summary_line())
+        self.summary_tokens += estimate_tokens(self.summary_lines[-1]) + 1
+        while self.summary_tokens > self.summary_budget and len(self.summary_lines) > 1:
+            self.summary_tokens -= estimate_tokens(self.summary_lines.popleft()) + 1
+        self.compactions += 1
+
+    def append(self, question, answer):
+        """턴을 추가하고, 링 버퍼에서 밀려나거나 예산을 넘은 오래된 턴을 요약으로 옮깁니다. (세션 크기 변화량 반환)"""
+        before = self.size
+        turn = Turn(question, answer)
+        if len(self.turns) == self.turns.maxlen:
+            self._compact(self.turns[0])  # append 가 밀어낼 턴
+        self.turns.append(turn)
+        while len(self.turns) > 1 and self.history_tokens > self.history_budget:
+            self._compact(self.turns.popleft())
+        self.topic = " ".join(question_tokens(question)[:6])
+        self.last_used = time.monotonic()
+        return self.size - before
+
+    def history_messages(self):
+        """OpenAI messages 에 넣을 이전 대화 (요약 system 메시지 + 최근 턴 user/assistant) 와 그 토큰 수"""
+        with self.lock:
+            messages = []
+            if self.summary_lines:
+                messages.append({"role": "system", "content": "이전 대화 요약:\n" + "\n".join(self.summary_lines)})
+            for turn in self.turns:
+                messages.append({"role": "user", "content": turn.question})
+                messages.append({"role": "assistant", "content": turn.answer})
+            tokens = self.history_tokens + (self.summary_tokens + MESSAGE_OVERHEAD_TOKENS if self.summary_lines else 0)
+        return messages, tokens
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "session_id": self.id,
+                "turns": len(self.turns),
+                "history_tokens": self.history_tokens,
+                "summary_lines": len(self.summary_lines),
+                "summary_tokens": self.summary_tokens,
+                "compactions": self.compactions,
+                "topic": self.topic,
+                "bytes": self.size,
+                "last_prompt_tokens": self.last_prompt_tokens,
+                "idle_seconds": round(time.monotonic() - self.last_used, 1),
+            }
+
+
+class SessionStore:
+    """대화 세션 전체 (LRU). 세션 수가 max_sessions 를, 세션 메모리 합이 max_bytes 를 넘으면 가장 오래 안 쓰인
+    세션부터 지우고, ttl 초 동안 쓰이지 않은 세션은 다음 접근 때 지웁니다. (프로세스 단위 - 워커끼리 공유하지 않음)"""
+
+    def __init__(self, max_sessions=10000, max_bytes=64 * 1024 * 1024, ttl=3600,
+                 max_turns=8, history_budget=1500, summary_budget=300):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.history_budget = history_budget
+        self.summary_budget = summary_budget
+
+        self._sessions = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.prompt_tokens = LatencyHistogram(PROMPT_TOKEN_BUCKETS)  # 이전 대화를 붙인 프롬프트 토큰 수 분포
+        self.stats = {"created": 0, "resumed": 0, "expired": 0, "evicted_lru": 0, "evicted_memory": 0}
+
+    def _drop(self, session_id, reason):
+        self._sessions.pop(session_id)
+        self._bytes -= self._sizes.pop(session_id)
+        self.stats[reason] += 1
+
+    def _evict(self, keep=None):
+        now = time.monotonic()
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if oldest_id == keep:
+                break
+            if now - oldest.last_used > self.ttl:
+                self._drop(oldest_id, "expired")
+            elif len(self._sessions) > self.max_sessions:
+                self._drop(oldest_id, "evicted_lru")
+            elif self._bytes > self.max_bytes:
+                self._drop(oldest_id, "evicted_memory")
+            else:
+                break
+
+    def get_or_create(self, session_id=None):
+        """세션 ID 가 살아 있으면 그 세션을, 없거나 만료되었으면 새 세션(새 ID)을 반환합니다."""
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None and time.monotonic() - session.last_used > self.ttl:
+                self._drop(session_id, "expired")
+                session = None
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                self.stats["resumed"] += 1
+                return session
+            session = ConversationSession(uuid.uuid4().hex, self.max_turns, self.history_budget, self.summary_budget)
+            self._sessions[session.id] = session
+            self._sizes[session.id] = session.size
+            self._bytes += self._sizes[session.id]
+            self.stats["created"] += 1
+            self._evict(keep=session.id)
+            return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def record_turn(self, session, question, answer, prompt_tokens=None):
+        """답변이 끝난 턴을 세션에 넣고 메모리 합계/프롬프트 토큰 분포를 갱신합니다."""
+        with session.lock:
+            session.append(question, answer)
+            if prompt_tokens is not None:
+                session.last_prompt_tokens = prompt_tokens
+            size = session.size
+        if prompt_tokens is not None:
+            self.prompt_tokens.observe(prompt_tokens)
+        with self._lock:
+            if session.id not in self._sessions:
+                return  # 답변을 만드는 사이에 밀려난 세션
+            self._bytes += size - self._sizes[session.id]
+            self._sizes[session.id] = size
+            self._sessions.move_to_end(session.id)
+            self._evict(keep=session.id)
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({"sessions": len(self._sessions), "bytes": self._bytes})
+        stats.update({
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "history_budget": self.history_budget,
+            "summary_budget": self.summary_budget,
+        })
+        histogram = self.prompt_tokens.snapshot()
+        stats["prompt_tokens"] = {"count": histogram["count"], "sum": histogram["sum_ms"], "buckets": histogram["buckets"]}
+        return stats
@@ -0,0 +1,108 @@
+# db_pool.py
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# ----------------------------------------
+# ✅ SQLite 연결 재사용 (읽기 전용 연결 풀 + 시드용 쓰기 연결 1개)
+# ----------------------------------------
+
+class ConnectionPool:
+    """요청마다 열고 닫던 연결을 재사용합니다.
+
+    요청이 끝나면 연결을 닫지 않고 유휴 목록에 돌려놓으며, 다음 요청이 가장 최근에 반납된 연결(LIFO)을
+    가져갑니다. 스레드 풀 서버에서는 같은 워커 스레드가 같은 연결을 계속 쓰게 되고, 요청마다 스레드를
+    새로 만드는 개발 서버에서도 연결 수는 동시 요청 수를 넘지 않습니다. 한 연결은 한 번에 한 스레드만
+    사용하므로 check_same_thread 검사는 끕니다.
+    """
+
+    def __init__(self, db_path, mmap_size=256 * 1024 * 1024, cache_size_kib=16 * 1024,
+                 cached_statements=512, max_idle=16, busy_timeout=5.0):
+        self.db_path = db_path
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.cached_statements = cached_statements
+        self.max_idle = max_idle
+        self.busy_timeout = busy_timeout
+
+        self._idle = []
+        self._lock = threading.Lock()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.stats = {"opened": 0, "reused": 0, "released": 0, "closed": 0, "in_use": 0, "max_in_use": 0}
+
+    def _open_reader(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            cached_statements=self.cached_statements,  # 연결을 재사용하므로 컴파일된 문장 캐시가 계속 유효
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            # WAL 은 DB 파일에 기록되는 설정 - 보통 시드 때 이미 켜져 있고, 아니면 여기서 한 번 켭니다.
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError as e:
+            print(f"❌ WAL 모드 전환 실패 (기존 저널 모드 유지): {e}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")  # 음수: KiB 단위
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA query_only=ON")  # 요청 처리 경로는 읽기만 합니다.
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            self.stats["reused" if conn is not None else "opened"] += 1
+            self.stats["in_use"] += 1
+            self.stats["max_in_use"] = max(self.stats["max_in_use"], self.stats["in_use"])
+        if conn is None:
+            try:
+                conn = self._open_reader()
+            except Exception:
+                with self._lock:
+                    self.stats["in_use"] -= 1
+                raise
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self.stats["in_use"] -= 1
+            self.stats["released"] += 1
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self.stats["closed"] += 1
+        conn.close()
+
+    @contextmanager
+    def writer(self):
+        """시드/가져오기용 쓰기 연결 (프로세스당 1개, 한 번에 한 스레드). 트랜잭션은 호출한 쪽에서 관리합니다."""
+        with self._writer_lock:
+            if self._writer is None:
+                conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                self._writer = conn
+            yield self._writer
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.stats["closed"] += len(idle)
+        for conn in idle:
+            conn.close()
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["idle"] = len(self._idle)
+        acquired = stats["opened"] + stats["reused"]
+        stats["reuse_ratio"] = round(stats["reused"] / acquired, 4) if acquired else 0.0
+        return stats
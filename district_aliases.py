@@ -0,0 +1,174 @@
+# district_aliases.py
+import bisect
+import re
+import sqlite3
+import threading
+import unicodedata
+
+# ----------------------------------------
+# ✅ 시/군/구 이름 정규화와 별칭 생성
+# ----------------------------------------
+
+CITY_SUFFIXES = ("특별자치시", "특별자치도", "특별시", "광역시", "시", "군", "도")
+DISTRICT_SUFFIXES = ("시", "군", "구")
+ENGLISH_SUFFIXES = ("si", "gun", "gu", "do")
+MIN_BASE_LENGTH = 2  # "중구" → "중" 처럼 너무 짧아지는 축약은 만들지 않습니다.
+
+
+def normalize_name(name):
+    """NFC 정규화 후 공백/하이픈/마침표를 없애고 소문자로 ("Gangnam-gu" → "gangnamgu")"""
+    return re.sub(r"[\s\-.·]", "", unicodedata.normalize("NFC", name or "")).lower()
+
+
+def name_variants(name, suffixes):
+    """정규화한 이름과 행정구역 접미사를 뗀 이름 ("서울특별시" → {"서울특별시", "서울", "서울시"})"""
+    key = normalize_name(name)
+    variants = {key} if key else set()
+    for suffix in suffixes:
+        if key.endswith(suffix) and len(key) - len(suffix) >= MIN_BASE_LENGTH:
+            base = key[:-len(suffix)]
+            variants.add(base)
+            if suffixes is CITY_SUFFIXES and suffix != "시":
+                variants.add(base + "시")  # "부산광역시" → "부산시"
+            break
+    return variants
+
+
+def english_variants(name):
+    """영문 표기와 접미사를 뗀 형태 ("Seongnam-si" → {"seongnamsi", "seongnam"})"""
+    variants = {normalize_name(name)}
+    parts = re.split(r"[\s\-]+", name.strip().lower())
+    if len(parts) > 1 and parts[-1] in ENGLISH_SUFFIXES:
+        variants.add("".join(parts[:-1]))
+    return variants
+
+
+def district_alias_rows(district, extra_aliases=()):
+    """(별칭, 종류) 목록 - 표준 이름이 가장 앞에 옵니다. 추가 별칭 중 한글이 없는 것은 영문 표기로 봅니다."""
+    rows = [(normalize_name(district), "name")]
+    rows += [(v, "variant") for v in sorted(name_variants(district, DISTRICT_SUFFIXES)) if v != rows[0][0]]
+    for alias in extra_aliases:
+        if re.search(r"[가-힣]", alias):
+            rows += [(v, "legacy") for v in sorted(name_variants(alias, DISTRICT_SUFFIXES))]
+        else:
+            rows += [(v, "english") for v in sorted(english_variants(alias))]
+    return rows
+
+
+def city_alias_rows(city, extra_aliases=()):
+    rows = [(v, "variant") for v in sorted(name_variants(city, CITY_SUFFIXES))]
+    for alias in extra_aliases:
+        if re.search(r"[가-힣]", alias):
+            rows += [(v, "legacy") for v in sorted(name_variants(alias, CITY_SUFFIXES))]
+        else:
+            rows += [(v, "english") for v in sorted(english_variants(alias))]
+    return rows
+
+
+# ----------------------------------------
+# ✅ 메모리 상주 별칭 사전 (정확 일치: dict, 접두어: 정렬 배열 + 이진 탐색)
+# ----------------------------------------
+
+class DistrictDirectory:
+    """(시, 구 별칭) → district_id. 정확 일치는 O(1), 접두어 일치는 O(log n) 입니다.
+
+    접두어가 여러 구에 걸치면(예: "서" → 서초구/서대문구) 모호하므로 None 을 반환합니다.
+    """
+
+    def __init__(self, city_aliases, district_aliases):
+        self._cities = dict(city_aliases)  # 정규화 별칭 → 표준 시 이름
+        self._exact = {}
+        by_city = {}
+        for city_name, alias, district_id in district_aliases:
+            self._exact.setdefault((city_name, alias), district_id)
+            by_city.setdefault(city_name, {}).setdefault(alias, district_id)
+        # 시별로 별칭을 정렬해 두고 bisect 로 접두어 범위를 찾습니다.
+        self._sorted = {
+            city_name: (sorted(aliases), [aliases[a] for a in sorted(aliases)])
+            for city_name, aliases in by_city.items()
+        }
+
+    def __len__(self):
+        return len(self._exact)
+
+    def resolve_city(self, city):
+        return self._cities.get(normalize_name(city))
+
+    def resolve(self, city, district):
+        """시 이름과 구 이름(어떤 표기든)으로 district_id 를 찾습니다. 없거나 모호하면 None."""
+        city_name = self.resolve_city(city)
+        if city_name is None:
+            return None
+        key = normalize_name(district) or normalize_name(city)
+
+        district_id = self._exact.get((city_name, key))
+        if district_id is not None:
+            return district_id
+
+        keys, ids = self._sorted.get(city_name, ((), ()))
+        index = bisect.bisect_left(keys, key)
+        found = None
+        while index < len(keys) and keys[index].startswith(key):
+            if found is not None and ids[index] != found:
+                return None  # 모호한 접두어
+            found = ids[index]
+            index += 1
+        return found
+
+    @classmethod
+    def load(cls, conn):
+        """city_alias / district_alias 테이블에서 사전을 만듭니다. (별칭 테이블이 없는 구버전 DB는 city_district 에서 생성)"""
+        try:
+            city_aliases = conn.execute("SELECT alias, city_name FROM city_alias").fetchall()
+            district_aliases = conn.execute("SELECT city_name, alias, district_id FROM district_alias").fetchall()
+            return cls([tuple(row) for row in city_aliases], [tuple(row) for row in district_aliases])
+        except sqlite3.OperationalError as e:
+            print(f"❌ 별칭 테이블 없음, city_district 에서 별칭 생성: {e}")
+
+        city_aliases, names, variants = [], [], []
+        for district_id, city_name, district_name in conn.execute(
+            "SELECT district_id, city_name, district_name FROM city_district"
+        ).fetchall():
+            city_aliases += [(alias, city_name) for alias, _ in city_alias_rows(city_name)]
+            for alias, alias_type in district_alias_rows(district_name):
+                (names if alias_type == "name" else variants).append((city_name, alias, district_id))
+        # 표준 이름이 다른 구의 축약형보다 우선하도록 먼저 등록합니다.
+        return cls(city_aliases, names + variants)
+
+
+def read_district_version(conn):
+    """지역 데이터(시/구, 상세 규정, 별칭, 시간표)의 변경 버전. 가져오기/시드가 district_meta 를 올립니다.
+
+    district_meta 가 없는 구버전 DB 는 0 - 지역 데이터를 넣는 쪽이 먼저 마이그레이션하므로 그때 버전이 바뀝니다.
+    """
+    try:
+        row = conn.execute("SELECT version FROM district_meta WHERE id = 1").fetchone()
+        return row[0] if row else 0
+    except sqlite3.OperationalError:
+        return 0
+
+
+class DistrictDirectoryCache:
+    """모든 요청이 공유하는 별칭 사전. district_meta 버전이 바뀌면(다른 프로세스의 init-db / 가져오기 포함) 다시 만듭니다."""
+
+    def __init__(self):
+        self._entry = None  # (버전, DistrictDirectory)
+        self._lock = threading.Lock()
+
+    def get(self, conn):
+        """현재 지역 데이터 버전에 맞는 사전을 반환합니다. (버전 확인 쿼리 1회)"""
+        version = read_district_version(conn)
+        entry = self._entry
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        with self._lock:
+            if self._entry is None or self._entry[0] != version:
+                self._entry = (version, DistrictDirectory.load(conn))
+            return self._entry[1]
+
+    def invalidate(self):
+        with self._lock:
+            self._entry = None
+
+
+district_directory = DistrictDirectoryCache()
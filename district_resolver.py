@@ -0,0 +1,152 @@
+# district_resolver.py
+import json
+import math
+import os
+import re
+
+# ----------------------------------------
+# ✅ 오프라인 행정구역 판별기 (GeoJSON 경계 + 격자 버킷 인덱스)
+# ----------------------------------------
+
+class DistrictResolver:
+    """시/군/구 경계 폴리곤을 격자 버킷에 색인해 좌표 → (city_name, district_name)을 판별합니다.
+
+    폴리곤 내부에 완전히 들어가는 셀은 사전 조회 한 번으로, 경계선이 지나는 셀만
+    후보 폴리곤에 대한 점-다각형 판정으로 답합니다.
+
+    GeoJSON 각 Feature 의 properties 에는 city_key / district_key 로 지정한
+    이름 필드가 있어야 하며, geometry 는 Polygon 또는 MultiPolygon 이어야 합니다.
+    """
+
+    def __init__(self, features=(), cell_size=0.05, city_key="city_name", district_key="district_name"):
+        self.cell_size = cell_size
+        self.city_key = city_key
+        self.district_key = district_key
+        self.districts = []  # [(city_name, district_name, bbox, strips)]
+        self.grid = {}       # 경계선이 지나가는 셀: (cx, cy) -> [district index, ...]
+        self.interior = {}   # 폴리곤 안에 완전히 들어간 셀: (cx, cy) -> district index
+        for feature in features:
+            self.add_feature(feature)
+
+    @classmethod
+    def from_geojson(cls, path, **kwargs):
+        with open(path, encoding="utf-8") as f:
+            collection = json.load(f)
+        return cls(collection.get("features", []), **kwargs)
+
+    def __len__(self):
+        return len(self.districts)
+
+    def _cell(self, lon, lat):
+        return math.floor(lon / self.cell_size), math.floor(lat / self.cell_size)
+
+    def add_feature(self, feature):
+        props = feature.get("properties") or {}
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") == "Polygon":
+            raw_polygons = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiPolygon":
+            raw_polygons = geometry["coordinates"]
+        else:
+            return
+
+        # 외곽 링과 구멍 링의 모든 변을 한데 모아 교차 횟수의 홀짝으로 판정합니다. (구멍은 자동으로 제외됨)
+        # 변은 셀 높이의 가로 띠(strip)별로 나눠 두어, 판정 시 점이 속한 띠의 변만 확인합니다.
+        strips = {}       # cy -> [(x1, y1, x2, y2), ...]
+        boundary_cells = set()
+        xs = []
+        ys = []
+        for rings in raw_polygons:
+            for ring in rings:
+                points = [(float(p[0]), float(p[1])) for p in ring]
+                xs.extend(x for x, _ in points)
+                ys.extend(y for _, y in points)
+                x1, y1 = points[-1]
+                for x2, y2 in points:
+                    cx0, cy0 = self._cell(min(x1, x2), min(y1, y2))
+                    cx1, cy1 = self._cell(max(x1, x2), max(y1, y2))
+                    for cy in range(cy0, cy1 + 1):
+                        strips.setdefault(cy, []).append((x1, y1, x2, y2))
+                        for cx in range(cx0, cx1 + 1):
+                            boundary_cells.add((cx, cy))
+                    x1, y1 = x2, y2
+        bbox = (min(xs), min(ys), max(xs), max(ys))
+
+        index = len(self.districts)
+        self.districts.append((props.get(self.city_key), props.get(self.district_key), bbox, strips))
+
+        # 경계선이 걸치는 셀은 후보 목록에 넣어 정밀 판정합니다.
+        for cell in boundary_cells:
+            self.grid.setdefault(cell, []).append(index)
+
+        # 경계선이 지나지 않는 셀은 통째로 안 또는 밖이므로, 중심점 하나로 판정해 둡니다.
+        x0, y0 = self._cell(bbox[0], bbox[1])
+        x1, y1 = self._cell(bbox[2], bbox[3])
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                if (cx, cy) in boundary_cells:
+                    continue
+                lon = (cx + 0.5) * self.cell_size
+                lat = (cy + 0.5) * self.cell_size
+                if _crossings_odd(lon, lat, strips.get(cy, ())):
+                    self.interior[cx, cy] = index
+
+    def resolve(self, lat, lon):
+        """좌표가 속한 (city_name, district_name)을 반환합니다. 해당 폴리곤이 없으면 None."""
+        lat = float(lat)
+        lon = float(lon)
+        cell = self._cell(lon, lat)
+
+        index = self.interior.get(cell)
+        if index is not None:
+            return self.districts[index][:2]
+
+        for index in self.grid.get(cell, ()):
+            city_name, district_name, bbox, strips = self.districts[index]
+            if not (bbox[0] <= lon <= bbox[2] and bbox[1] <= lat <= bbox[3]):
+                continue
+            if _crossings_odd(lon, lat, strips.get(cell[1], ())):
+                return city_name, district_name
+        return None
+
+
+def _crossings_odd(x, y, segments):
+    """Ray casting: 점에서 오른쪽으로 그은 반직선이 변과 홀수 번 만나면 내부"""
+    inside = False
+    for x1, y1, x2, y2 in segments:
+        if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+            inside = not inside
+    return inside
+
+
+def load_district_resolver(path):
+    """GeoJSON 파일이 있으면 판별기를 만들고, 없으면 None 을 반환합니다. (Nominatim 으로만 동작)"""
+    if not path or not os.path.exists(path):
+        return None
+    return DistrictResolver.from_geojson(path)
+
+
+# ----------------------------------------
+# ✅ 지역 키 생성 (main.js 의 getAddress 규칙과 동일)
+# ----------------------------------------
+
+def make_location(city, district_name):
+    """city / districtKey / districtOriginal 형태의 위치 정보를 만듭니다."""
+    district_name = district_name or city
+    return {
+        "city": city,
+        "districtKey": re.sub(r"\s", "", district_name),
+        "districtOriginal": re.sub(r"\s+", " ", f"{city} {district_name}".strip()),
+    }
+
+
+def location_from_nominatim(data):
+    """Nominatim reverse 응답의 address 에서 city/district 를 뽑습니다. (county → city → town, city_district → suburb)"""
+    address = data.get("address") or {}
+    city = address.get("county") or address.get("city") or address.get("town") or "알수없음"
+    district_gu = address.get("city_district") or address.get("suburb") or ""
+
+    if not district_gu and "분당구" in (data.get("display_name") or ""):
+        district_gu = "분당구"
+
+    return make_location(city, district_gu)
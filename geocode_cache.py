@@ -0,0 +1,207 @@
+# geocode_cache.py
+import json
+import math
+import sqlite3
+import threading
+import time
+
+from cache_utils import TTLCache, SingleFlight, TokenBucket
+
+# ----------------------------------------
+# ✅ Geohash (좌표 → 격자 셀 문자열)
+# ----------------------------------------
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat, lon, precision=7):
+    """위도/경도를 geohash 문자열로 변환합니다. (precision 7 ≈ 150m 격자)"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # 짝수 번째 비트는 경도, 홀수 번째는 위도
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                bits = (bits << 1) | 1
+                lon_lo = mid
+            else:
+                bits <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_center(geohash):
+    """geohash 셀의 중심 좌표 (lat, lon)를 반환합니다."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for ch in geohash:
+        value = _BASE32.index(ch)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                if bit:
+                    lon_lo = mid
+                else:
+                    lon_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+
+# ----------------------------------------
+# ✅ Reverse Geocoding 캐시 (메모리 LRU+TTL → SQLite → Nominatim)
+# ----------------------------------------
+
+class UpstreamRateLimited(Exception):
+    """토큰 버킷 대기 한도를 넘었거나 외부 API 가 429 로 거절한 경우 (retry_after: 응답 Retry-After 헤더에 쓸 초)"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after)) if retry_after is not None else 1
+
+
+class GeocodeCache:
+    """geohash 셀 단위로 역지오코딩 결과를 캐싱합니다.
+
+    같은 셀에 대한 동시 요청은 한 번의 외부 호출로 합쳐지며,
+    외부 호출은 토큰 버킷(기본 1 req/s)을 통과해야 합니다.
+    """
+
+    def __init__(self, fetch, db_path, precision=7, memory_size=4096,
+                 memory_ttl=86400, db_ttl=30 * 86400, rate=1.0, max_wait=5.0, purge_every=1000):
+        self.fetch = fetch  # fetch(lat, lon) -> dict (Nominatim JSON)
+        self.db_path = db_path
+        self.precision = precision
+        self.db_ttl = db_ttl
+        self.max_wait = max_wait
+        self.memory = TTLCache(maxsize=memory_size, ttl=memory_ttl)
+        self.flight = SingleFlight()
+        self.bucket = TokenBucket(rate=rate, capacity=1)
+        self.purge_every = purge_every  # 이 횟수만큼 저장할 때마다 db_ttl 이 지난 행을 지웁니다.
+        self._stores = 0
+        self.stats = {"memory_hits": 0, "db_hits": 0, "upstream_calls": 0, "shared": 0}
+        self._stats_lock = threading.Lock()
+        self._ensure_table()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def snapshot_stats(self):
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _ensure_table(self):
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS geocode_cache (
+                    geohash TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _db_get(self, cell):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT payload, fetched_at FROM geocode_cache WHERE geohash = ?", (cell,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or row[1] + self.db_ttl <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def _db_set(self, cell, result):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO geocode_cache (geohash, payload, fetched_at) VALUES (?, ?, ?)",
+                (cell, json.dumps(result, ensure_ascii=False), time.time())
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        with self._stats_lock:
+            self._stores += 1
+            purge = self._stores % self.purge_every == 0
+        if purge:
+            self.purge_expired()
+
+    def purge_expired(self):
+        """db_ttl 이 지난 행을 지웁니다. (읽을 때 건너뛰기만 하면 테이블이 계속 커짐) 지운 행 수를 반환합니다."""
+        conn = self._connect()
+        try:
+            deleted = conn.execute(
+                "DELETE FROM geocode_cache WHERE fetched_at <= ?", (time.time() - self.db_ttl,)
+            ).rowcount
+            conn.commit()
+            return deleted
+        finally:
+            conn.close()
+
+    def _load(self, cell):
+        """SQLite 확인 후 없으면 (토큰 버킷을 통과해) 셀 중심 좌표로 외부 호출"""
+        result = self.memory.get(cell)  # 직전 single-flight 가 방금 채웠을 수 있음
+        if result is not None:
+            return result
+        result = self._db_get(cell)
+        if result is not None:
+            self._count("db_hits")
+        else:
+            if not self.bucket.acquire(max_wait=self.max_wait):
+                raise UpstreamRateLimited("역지오코딩 요청이 많아 잠시 후 다시 시도해 주세요.")
+            self._count("upstream_calls")
+            lat, lon = geohash_center(cell)
+            result = self.fetch(lat, lon)
+            self._db_set(cell, result)
+        self.memory.set(cell, result)
+        return result
+
+    def lookup(self, lat, lon):
+        """좌표(float, 범위 확인은 호출하는 쪽)에 해당하는 역지오코딩 결과를 반환합니다."""
+        cell = geohash_encode(lat, lon, self.precision)
+        result = self.memory.get(cell)
+        if result is not None:
+            self._count("memory_hits")
+            return result
+
+        result, shared = self.flight.do(cell, lambda: self._load(cell))
+        if shared:
+            self._count("shared")
+        return result
@@ -0,0 +1,103 @@
+# guide_cache.py
+import gzip
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# ----------------------------------------
+# ✅ 가이드 스냅샷 (불변, 직렬화/압축 완료 상태)
+# ----------------------------------------
+
+class GuideSnapshot:
+    """가이드 트리 한 벌을 JSON/gzip 바이트와 ETag로 고정해 둔 불변 객체"""
+
+    __slots__ = ("version", "data", "body", "gzip_body", "etag", "last_modified")
+
+    def __init__(self, version, data, last_modified):
+        self.version = version
+        self.data = data  # 읽기 전용으로만 사용 (응답은 body 바이트를 그대로 전송)
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.last_modified = last_modified
+
+
+def read_guide_version(conn):
+    """가이드 테이블의 변경 버전을 반환합니다. (guide_meta 트리거가 없으면 행 지문으로 대체)"""
+    try:
+        row = conn.execute("SELECT version FROM guide_meta WHERE id = 1").fetchone()
+        return row[0] if row else 0
+    except sqlite3.OperationalError:
+        # 트리거가 없는 구버전 DB: 행 수와 최대 ID로 변경 여부를 추정
+        return tuple(conn.execute("""
+            SELECT (SELECT count(*) FROM guide_category),
+                   (SELECT max(category_id) FROM guide_category),
+                   (SELECT count(*) FROM guide_item),
+                   (SELECT max(item_id) FROM guide_item)
+        """).fetchone())
+
+
+def load_guide_tree(conn):
+    """GUIDE_CATEGORY + GUIDE_ITEM 을 한 번의 JOIN 으로 읽어 기존 guide_data 형태로 만듭니다."""
+    rows = conn.execute("""
+        SELECT c.category_id, c.name AS category_name, c.icon,
+               i.item_id, i.name, i.description, i.image_path
+        FROM guide_category c
+        LEFT JOIN guide_item i ON i.category_id = c.category_id
+        ORDER BY c.category_id, i.item_id
+    """).fetchall()
+
+    categories_list = []
+    current_id = None
+    for row in rows:
+        if row[0] != current_id:
+            current_id = row[0]
+            categories_list.append({"name": row[1], "icon": row[2], "items": []})
+        if row[3] is not None:
+            categories_list[-1]["items"].append({
+                "name": row[4],
+                "description": row[5],
+                "image_path": row[6]
+            })
+    return {"categories": categories_list}
+
+
+# ----------------------------------------
+# ✅ 프로세스 단위 스냅샷 캐시
+# ----------------------------------------
+
+class GuideCache:
+    """가이드 스냅샷을 보관하고, DB 버전이 바뀌면 새 스냅샷으로 원자적으로 교체합니다."""
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get(self, conn):
+        """현재 DB 버전에 맞는 스냅샷을 반환합니다. (버전 확인 쿼리 1회)"""
+        version = read_guide_version(conn)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+            data = load_guide_tree(conn)
+            fresh = GuideSnapshot(version, data, time.time())
+            # 내용이 같으면 Last-Modified 를 유지해 조건부 요청이 계속 304 로 끝나도록 합니다.
+            if snapshot is not None and snapshot.etag == fresh.etag:
+                fresh.last_modified = snapshot.last_modified
+            self._snapshot = fresh  # 참조 교체 한 번으로 원자적 반영
+            return fresh
+
+    def invalidate(self):
+        """스냅샷을 버립니다. 다음 get() 호출 시 DB에서 다시 읽습니다."""
+        with self._lock:
+            self._snapshot = None
+
+
+guide_cache = GuideCache()
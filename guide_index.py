@@ -0,0 +1,450 @@
+# guide_index.py
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from guide_cache import read_guide_version
+from guide_pages import guide_version_tag
+
+# ----------------------------------------
+# ✅ 가이드 항목 유사도 색인 (문자 n-gram TF-IDF, NumPy 희소 행렬)
+# ----------------------------------------
+#
+# 항목마다 이름/설명의 문자 n-gram 을 해시(crc32, 프로세스가 달라도 같은 값)해 DIMENSION 칸 특성으로 만들고
+# TF-IDF 가중치를 L2 정규화해 둡니다. 10만 항목 × 수십만 칸의 밀집 행렬은 수백 MB 라서,
+# 특성별로 (항목 번호, 가중치)를 이어 붙인 희소 열(CSC) 배열 세 개에 담습니다.
+# 질의는 질의 벡터의 0 이 아닌 특성 열만 모아 np.bincount 한 번으로 행렬-벡터 곱을 하고,
+# 여러 질의는 (질의 번호 × 항목 수) 오프셋을 더해 같은 bincount 한 번으로 처리합니다.
+# 기본은 질의 특성 열을 끝까지 읽는 정확한 곱입니다. POSTINGS_BUDGET 을 정하면(선택) 흔한 특성의 긴 열은 가중치 큰
+# 앞부분만 읽고 (못 읽은 뒷부분은 상한 가중치로 어림), 상위 후보는 항목별 원본 빈도로 정확한 점수를 다시 매깁니다.
+
+DIMENSION = 1 << 18
+NGRAM_SIZES = (2, 3)
+NAME_WEIGHT = 3.0             # 이름 n-gram 의 tf 가중치 (설명보다 이름 일치를 우선)
+MAX_DF_RATIO = 0.3            # 근사 모드: 항목의 30% 넘게 나오는 흔한 특성은 건너뜀 (전부 흔하면 그대로 사용)
+POSTINGS_BUDGET = None        # None: 정확한 점수 (기본). 정수: 근사 모드 - 질의 하나가 1단계에서 읽는 항목 수 상한
+BATCH_SCORE_CELLS = 1 << 20   # 배치 질의를 묶을 때 점수 배열 (질의 수 × 항목 수) 상한
+EXACT_BATCH_SCORE_CELLS = 1 << 18  # 정확한 검색은 열 전체를 흩뿌리므로 점수 배열이 CPU 캐시에 머물 만큼만 묶음 (1<<20 이면 질의당 2배 느림)
+RESCORE_FACTOR = 8            # 2단계에서 정확한 점수를 다시 매길 후보 수 = RESCORE_FACTOR × k
+INDEX_FORMAT = 1
+
+_NON_WORD = re.compile(r"[^0-9a-z가-힣]+")
+
+# 디스크에 저장하는 배열 (np.load(mmap_mode="r") 로 워커끼리 페이지 캐시를 공유)
+ARRAY_NAMES = ("item_ids", "digests", "doc_indptr", "doc_features", "doc_tf",
+               "norms", "idf", "col_indptr", "col_rows", "col_weights")
+
+
+def normalize_text(text):
+    return " ".join(_NON_WORD.sub(" ", (text or "").lower()).split())
+
+
+def ngram_counts(text, weight=1.0, counts=None, hashes=None):
+    """text 의 단어별 문자 n-gram (앞뒤 공백 포함) 해시 → 가중 빈도 dict 에 더합니다."""
+    counts = {} if counts is None else counts
+    hashes = {} if hashes is None else hashes
+    for word in normalize_text(text).split():
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                gram = padded[i:i + n]
+                feature = hashes.get(gram)
+                if feature is None:
+                    feature = hashes[gram] = zlib.crc32(gram.encode("utf-8")) & (DIMENSION - 1)
+                counts[feature] = counts.get(feature, 0.0) + weight
+    return counts
+
+
+def item_digest(name, description):
+    return zlib.crc32(f"{name}\0{description or ''}".encode("utf-8"))
+
+
+def _ranges(starts, lengths):
+    """[starts[i], starts[i] + lengths[i]) 구간들을 차례로 이어 붙인 위치 배열"""
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(int(lengths.sum()), dtype=np.int64)
+
+
+def _gather(indptr, rows):
+    """CSR 의 rows 행들을 이어 붙일 원소 위치 배열과 각 행 길이"""
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    return _ranges(starts, lengths), lengths
+
+
+def _column_order(features, weights):
+    """(특성 오름차순, 같은 특성 안에서는 가중치 내림차순) 정렬 순서.
+
+    키를 16비트 이하로 나눠 안정 정렬을 거듭하면 NumPy 가 기수 정렬을 써서 int32 argsort 보다 몇 배 빠릅니다.
+    """
+    order = np.argsort(np.round((1.0 - weights) * 0xFFFF).astype(np.uint16), kind="stable")
+    for shift in range(0, DIMENSION.bit_length() - 1, 9):
+        order = order[np.argsort(((features[order] >> shift) & 0x1FF).astype(np.uint16), kind="stable")]
+    return order
+
+
+class GuideVectorIndex:
+    """가이드 버전 하나에 대한 색인 (불변). 항목별 원본 빈도(CSR)는 증분 재구성에, 정규화된 열(CSC)은 질의에 씁니다."""
+
+    def __init__(self, version, arrays, stats=None):
+        self.version = version
+        self.tag = guide_version_tag(version)
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self.stats = stats or {}
+        self.postings_budget = POSTINGS_BUDGET  # GuideIndexCache 가 설정값(GUIDE_INDEX_POSTINGS_BUDGET)으로 바꿈
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    @classmethod
+    def build(cls, version, rows, previous=None):
+        """rows: (item_id, name, description) 목록. previous 색인에서 내용이 같은 항목은 n-gram 을 다시 세지 않고 재사용합니다."""
+        started = time.perf_counter()
+        previous_rows, previous_digests = {}, []
+        if previous is not None and len(previous):
+            previous_rows = dict(zip(previous.item_ids.tolist(), range(len(previous))))
+            previous_digests = previous.digests.tolist()
+
+        reused_ids, reused_rows, reused_digests = [], [], []
+        new_ids, new_digests, new_lengths, new_features, new_tf = [], [], [], [], []
+        hashes = {}
+        for item_id, name, description in rows:
+            digest = item_digest(name, description)
+            row = previous_rows.get(item_id)
+            if row is not None and previous_digests[row] == digest:
+                reused_ids.append(item_id)
+                reused_rows.append(row)
+                reused_digests.append(digest)
+                continue
+            counts = ngram_counts(name, NAME_WEIGHT, hashes=hashes)
+            ngram_counts(description, 1.0, counts, hashes)
+            new_ids.append(item_id)
+            new_digests.append(digest)
+            new_lengths.append(len(counts))
+            new_features.extend(counts.keys())
+            new_tf.extend(counts.values())
+
+        # 1. 항목별 원본 빈도 (재사용 행 + 새로 센 행)
+        lengths = [np.asarray(new_lengths, dtype=np.int64)]
+        features = [np.asarray(new_features, dtype=np.int32)]
+        tf = [np.asarray(new_tf, dtype=np.float32)]
+        if reused_rows:
+            positions, reused_lengths = _gather(previous.doc_indptr, np.asarray(reused_rows, dtype=np.int64))
+            lengths.insert(0, reused_lengths)
+            features.insert(0, previous.doc_features[positions])
+            tf.insert(0, previous.doc_tf[positions])
+        lengths = np.concatenate(lengths)
+        doc_indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=doc_indptr[1:])
+        doc_features = np.concatenate(features)
+        doc_tf = np.concatenate(tf)
+        item_count = len(lengths)
+
+        # 2. IDF 와 L2 정규화한 TF-IDF 가중치
+        df = np.bincount(doc_features, minlength=DIMENSION)
+        idf = (np.log((1.0 + item_count) / (1.0 + df)) + 1.0).astype(np.float32)
+        entry_rows = np.repeat(np.arange(item_count, dtype=np.int32), lengths)
+        weights = (1.0 + np.log(doc_tf)) * idf[doc_features]
+        norms = np.sqrt(np.bincount(entry_rows, weights=weights * weights, minlength=item_count))
+        norms = norms.astype(np.float32)
+        norms[norms == 0] = 1.0
+        weights = (weights / norms[entry_rows]).astype(np.float32)
+
+        # 3. 특성별 열 (CSC) - 질의 특성의 항목 목록을 연속 구간으로 읽도록
+        order = _column_order(doc_features, weights)
+        col_indptr = np.zeros(DIMENSION + 1, dtype=np.int64)
+        np.cumsum(df, out=col_indptr[1:])
+
+        arrays = {
+            "item_ids": np.asarray(reused_ids + new_ids, dtype=np.int64),
+            "digests": np.asarray(reused_digests + new_digests, dtype=np.uint32),
+            "doc_indptr": doc_indptr,
+            "doc_features": doc_features,
+            "doc_tf": doc_tf,
+            "norms": norms,
+            "idf": idf,
+            "col_indptr": col_indptr,
+            "col_rows": entry_rows[order],
+            "col_weights": weights[order],
+        }
+        stats = {"items": item_count, "reused": len(reused_ids), "vectorized": len(new_ids),
+                 "nnz": int(len(doc_features)), "build_ms": round((time.perf_counter() - started) * 1000, 1)}
+        return cls(version, arrays, stats)
+
+    def query_vector(self, text, drop_common=False):
+        """질의의 (특성 배열, L2 정규화 가중치 배열). 색인에 없는 특성은 뺍니다. (drop_common: 근사 모드의 흔한 특성 생략)"""
+        counts = ngram_counts(text)
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        features = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        df = self.col_indptr[features + 1] - self.col_indptr[features]
+        keep = df > 0
+        common = df > MAX_DF_RATIO * len(self)
+        if drop_common and (keep & ~common).any():
+            keep &= ~common
+        features, tf = features[keep], tf[keep]
+        weights = (1.0 + np.log(tf)) * self.idf[features]
+        norm = math.sqrt(float(weights @ weights)) or 1.0
+        return features, (weights / norm).astype(np.float32)
+
+    def _exact_scores(self, rows, features, query_weights):
+        """rows 항목들과 질의 벡터의 정확한 코사인 점수 (항목별 원본 빈도에서 다시 계산)"""
+        order = np.argsort(features)
+        features, query_weights = features[order], query_weights[order]
+        positions, lengths = _gather(self.doc_indptr, rows)
+        item_features = self.doc_features[positions]
+        slots = np.minimum(np.searchsorted(features, item_features), len(features) - 1)
+        match = features[slots] == item_features
+        owners = np.repeat(np.arange(len(rows)), lengths)[match]
+        positions = positions[match]
+        item_weights = (1.0 + np.log(self.doc_tf[positions])) * self.idf[item_features[match]] / self.norms[rows[owners]]
+        return np.bincount(owners, weights=item_weights * query_weights[slots[match]], minlength=len(rows))
+
+    def _posting_limits(self, features, budget):
+        """질의 특성별 (열 길이, 1단계에서 읽을 항목 수). 드문 특성 열은 끝까지, 남은 budget 은 흔한 특성에 고르게 나눕니다."""
+        lengths = self.col_indptr[features + 1] - self.col_indptr[features]
+        limits = lengths.copy()
+        remaining = budget
+        order = np.argsort(lengths, kind="stable")
+        for i, feature in enumerate(order.tolist()):
+            limits[feature] = min(int(lengths[feature]), remaining // (len(order) - i))
+            remaining -= int(limits[feature])
+        return lengths, limits
+
+    def _search_exact(self, texts, k):
+        """질의 특성 열 전체를 이어 붙여 bincount 한 번 = 희소 행렬 × 질의 벡터(들), 점수가 곧 코사인 유사도"""
+        item_count = len(self)
+        rows, weights = [], []
+        for offset, text in enumerate(texts):
+            features, query_weights = self.query_vector(text)
+            starts, ends = self.col_indptr[features].tolist(), self.col_indptr[features + 1].tolist()
+            for start, end, weight in zip(starts, ends, query_weights.tolist()):
+                # 열은 연속 구간이라 조각 복사 + concatenate 가 위치 배열로 모으는 것보다 빠릅니다.
+                rows.append(self.col_rows[start:end] + offset * item_count if offset else self.col_rows[start:end])
+                weights.append(self.col_weights[start:end] * weight)
+        if not rows:
+            return [[] for _ in texts]
+        scores = np.bincount(np.concatenate(rows), weights=np.concatenate(weights), minlength=len(texts) * item_count)
+
+        results = []
+        for offset in range(len(texts)):
+            query_scores = scores[offset * item_count:(offset + 1) * item_count]
+            top = np.argpartition(-query_scores, k - 1)[:k]
+            top = top[np.argsort(-query_scores[top], kind="stable")]
+            results.append([(int(self.item_ids[i]), round(float(query_scores[i]), 4))
+                            for i in top.tolist() if query_scores[i] > 0])
+        return results
+
+    def _search_budgeted(self, texts, k, budget):
+        """근사 모드 (postings_budget 을 정했을 때만): 잘라 읽은 열로 후보를 고르고 후보만 정확히 다시 채점"""
+        item_count = len(self)
+        queries = [self.query_vector(text, drop_common=True) for text in texts]
+        features = np.concatenate([query[0] for query in queries])
+        query_weights = np.concatenate([query[1] for query in queries])
+        starts = self.col_indptr[features]
+        lengths, limits = (np.concatenate(parts) for parts in zip(
+            *(self._posting_limits(query[0], budget) for query in queries)))
+        positions = _ranges(starts, limits)
+        # 질의별 구간 경계 (positions 안에서)
+        feature_bounds = np.cumsum([0] + [len(query[0]) for query in queries])
+        bounds = np.concatenate(([0], np.cumsum(limits)))[feature_bounds]
+
+        # 덜 읽은 열은 못 읽은 항목도 그 열의 다음 가중치(상한)만큼 가졌다고 보고, 읽은 항목은 그보다 큰 만큼만 더합니다.
+        # (모든 항목에 같은 상수를 더한 것과 같아서 순위만 바뀜 - 이름 끝 숫자처럼 드문 특성으로 찾은 항목이 흔한 특성에 밀리지 않게)
+        tails = np.where(limits < lengths, self.col_weights[np.minimum(starts + limits, len(self.col_weights) - 1)], 0)
+
+        # 잘라 읽은 희소 행렬 × 질의 벡터(들) = 질의별 어림 점수 (질의 번호 × 항목 수 오프셋으로 한 배열에)
+        hits = self.col_rows[positions] + np.repeat(np.arange(len(texts), dtype=np.int64) * item_count, np.diff(bounds))
+        weights = (self.col_weights[positions] - np.repeat(tails, limits)) * np.repeat(query_weights, limits)
+        scores = np.bincount(hits, weights=weights, minlength=len(texts) * item_count)
+
+        results = []
+        for offset, (features, query_weights) in enumerate(queries):
+            query_hits = hits[bounds[offset]:bounds[offset + 1]]
+            if not len(query_hits):
+                results.append([])
+                continue
+            # 한 항목이 특성 수만큼 겹쳐 나오므로 넉넉히 고른 뒤 중복을 없애고 상위 후보만 남깁니다.
+            wanted = min(len(query_hits), RESCORE_FACTOR * k * len(features))
+            hit_scores = scores[query_hits]
+            picked = np.unique(query_hits[np.argpartition(-hit_scores, wanted - 1)[:wanted]])
+            if len(picked) > RESCORE_FACTOR * k:
+                picked = picked[np.argpartition(-scores[picked], RESCORE_FACTOR * k - 1)[:RESCORE_FACTOR * k]]
+            rows = picked - offset * item_count
+            exact = self._exact_scores(rows, features, query_weights)
+            ranked = np.argsort(-exact, kind="stable")[:k]
+            results.append([(int(self.item_ids[rows[i]]), round(float(exact[i]), 4)) for i in ranked if exact[i] > 0])
+        return results
+
+    def search_batch(self, texts, k=5):
+        """질의마다 코사인 유사도 상위 k개 [(item_id, score), ...] 목록 (점수 0 은 제외)
+
+        기본(postings_budget 이 None): 질의 특성 열 전체를 bincount 한 번으로 곱한 정확한 점수에서 상위 k개.
+        근사 모드(postings_budget 정수):
+          1단계: 질의 특성 열을 가중치 큰 순으로 (질의당 postings_budget 개 안에서) 모아 bincount 한 번으로 점수 계산
+          2단계: 질의별 상위 RESCORE_FACTOR × k 개 후보만 정확한 점수로 다시 매겨 순위를 정합니다.
+        점수 배열이 (EXACT_)BATCH_SCORE_CELLS 칸을 넘지 않는 만큼의 질의를 한 번에 묶습니다.
+        """
+        item_count = len(self)
+        if not texts or not item_count:
+            return [[] for _ in texts]
+        k = min(k, item_count)
+        cells = EXACT_BATCH_SCORE_CELLS if self.postings_budget is None else BATCH_SCORE_CELLS
+        chunk = max(1, cells // item_count)
+        results = []
+        for start in range(0, len(texts), chunk):
+            if self.postings_budget is None:
+                results += self._search_exact(texts[start:start + chunk], k)
+            else:
+                results += self._search_budgeted(texts[start:start + chunk], k, self.postings_budget)
+        return results
+
+    def search(self, text, k=5):
+        return self.search_batch([text], k)[0]
+
+    # ----------------------------------------
+    # 디스크 저장 / 메모리 매핑
+    # ----------------------------------------
+
+    def save(self, directory):
+        """directory/<버전 태그>/ 에 배열을 .npy 로 쓰고 CURRENT 파일을 원자적으로 바꿉니다."""
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(directory, self.tag)
+        if not os.path.isdir(target):
+            staging = f"{target}.{os.getpid()}.tmp"
+            os.makedirs(staging, exist_ok=True)
+            for name in ARRAY_NAMES:
+                np.save(os.path.join(staging, f"{name}.npy"), getattr(self, name))
+            try:
+                os.rename(staging, target)
+            except OSError:
+                shutil.rmtree(staging, ignore_errors=True)  # 다른 워커가 같은 버전을 먼저 저장함
+        meta = {"format": INDEX_FORMAT, "dimension": DIMENSION, "ngrams": list(NGRAM_SIZES),
+                "name_weight": NAME_WEIGHT, "tag": self.tag, "stats": self.stats}
+        pointer = os.path.join(directory, f"CURRENT.{os.getpid()}.tmp")
+        with open(pointer, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(pointer, os.path.join(directory, "CURRENT"))
+
+        # 예전 버전은 지웁니다. (이미 매핑한 워커는 POSIX 에서 계속 읽을 수 있음)
+        for entry in os.listdir(directory):
+            path = os.path.join(directory, entry)
+            if entry != self.tag and os.path.isdir(path) and not entry.endswith(".tmp"):
+                shutil.rmtree(path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory, version=None):
+        """저장된 색인을 메모리 매핑으로 엽니다. (없거나 설정이 다르면 None, version 을 주면 그 버전일 때만)"""
+        pointer = os.path.join(directory, "CURRENT")
+        if not os.path.exists(pointer):
+            return None
+        try:
+            with open(pointer, encoding="utf-8") as f:
+                meta = json.load(f)
+            if (meta["format"], meta["dimension"], meta["ngrams"], meta["name_weight"]) != \
+                    (INDEX_FORMAT, DIMENSION, list(NGRAM_SIZES), NAME_WEIGHT):
+                return None
+            if version is not None and meta["tag"] != guide_version_tag(version):
+                return None
+            path = os.path.join(directory, meta["tag"])
+            arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAY_NAMES}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ 저장된 가이드 색인을 열 수 없습니다: {e}")
+            return None
+        return cls(version, arrays, dict(meta.get("stats") or {}, memory_mapped=True))
+
+
+def load_guide_rows(conn):
+    return conn.execute("SELECT item_id, name, description FROM guide_item ORDER BY item_id").fetchall()
+
+
+def describe_matches(conn, matches):
+    """[(item_id, score), ...] → 가이드 항목 목록 (search_guide_items 와 같은 키, 점수 순서 유지)"""
+    if not matches:
+        return []
+    ids = [item_id for item_id, _ in matches]
+    rows = {row[0]: row for row in conn.execute(f"""
+        SELECT i.item_id, i.name, i.image_path, c.name, c.icon
+        FROM guide_item i JOIN guide_category c ON c.category_id = i.category_id
+        WHERE i.item_id IN ({",".join("?" * len(ids))})
+    """, ids)}
+    return [{
+        "item_id": item_id,
+        "name": rows[item_id][1],
+        "image_path": rows[item_id][2],
+        "category": rows[item_id][3],
+        "icon": rows[item_id][4],
+        "score": score,
+    } for item_id, score in matches if item_id in rows]  # 색인을 만든 뒤 지워진 항목은 건너뜀
+
+
+# ----------------------------------------
+# ✅ 프로세스 단위 색인 캐시
+# ----------------------------------------
+
+class GuideIndexCache:
+    """가이드 버전이 바뀌면 색인을 (바뀐 항목만 다시 세어) 새로 만들어 참조 교체로 반영합니다.
+
+    directory 를 주면 만든 색인을 저장해 두고, 다른 워커/재시작한 프로세스는 같은 버전이면 메모리 매핑으로 엽니다.
+    postings_budget 을 주면 근사 검색(GuideVectorIndex.search_batch 참고), 없으면 정확한 검색입니다.
+    """
+
+    def __init__(self, directory=None, postings_budget=None):
+        self.directory = directory or None
+        self.postings_budget = postings_budget
+        self._index = None
+        self._lock = threading.Lock()
+        self.stats = {"builds": 0, "mapped": 0}
+
+    def get(self, conn):
+        version = read_guide_version(conn)
+        index = self._index
+        if index is not None and index.version == version:
+            return index
+        with self._lock:
+            index = self._index
+            if index is not None and index.version == version:
+                return index
+            fresh = GuideVectorIndex.load(self.directory, version) if self.directory else None
+            if fresh is not None:
+                self.stats["mapped"] += 1
+            else:
+                previous = index
+                if previous is None and self.directory:
+                    previous = GuideVectorIndex.load(self.directory)  # 이전 버전 저장본에서 증분으로
+                fresh = GuideVectorIndex.build(version, load_guide_rows(conn), previous)
+                self.stats["builds"] += 1
+                print(f"✅ 가이드 유사도 색인: 항목 {fresh.stats['items']}개 (재사용 {fresh.stats['reused']}), "
+                      f"{fresh.stats['build_ms']}ms")
+                if self.directory:
+                    try:
+                        fresh.save(self.directory)
+                    except OSError as e:
+                        print(f"❌ 가이드 색인 저장 실패: {e}")
+            fresh.postings_budget = self.postings_budget
+            self._index = fresh
+            return fresh
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+    def snapshot_stats(self):
+        index = self._index
+        stats = dict(self.stats)
+        if index is not None:
+            stats.update(index.stats, bytes=index.nbytes)
+        return stats
@@ -0,0 +1,133 @@
+# guide_pages.py
+import hashlib
+import json
+import threading
+
+from guide_cache import read_guide_version
+
+# ----------------------------------------
+# ✅ 가이드 나눠 읽기 (카테고리 목록 → 카테고리별 항목 페이지 → 항목 상세)
+# ----------------------------------------
+
+# 응답에 넣을 수 있는 필드와 SQL 식 (fields= 로 고른 열만 SELECT - 설명 본문은 요청할 때만 읽음)
+CATEGORY_FIELDS = {
+    "category_id": "c.category_id",
+    "name": "c.name",
+    "icon": "c.icon",
+    "item_count": "(SELECT count(*) FROM guide_item i WHERE i.category_id = c.category_id)",
+}
+ITEM_FIELDS = {
+    "item_id": "i.item_id",
+    "category_id": "i.category_id",
+    "name": "i.name",
+    "description": "i.description",
+    "image_path": "i.image_path",
+}
+DEFAULT_CATEGORY_FIELDS = ("category_id", "name", "icon", "item_count")
+DEFAULT_LIST_FIELDS = ("item_id", "name", "image_path")  # 목록에는 설명 제외
+DEFAULT_DETAIL_FIELDS = tuple(ITEM_FIELDS)
+MAX_PAGE_SIZE = 100
+
+
+class InvalidFields(ValueError):
+    """fields= 에 없는 필드 이름이 들어온 경우"""
+
+
+def parse_fields(raw, allowed, default):
+    """"name,icon" → ("name", "icon")  (비어 있으면 default, 모르는 필드는 InvalidFields)"""
+    if not raw:
+        return tuple(default)
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise InvalidFields(f"알 수 없는 필드: {', '.join(unknown)} (사용 가능: {', '.join(allowed)})")
+    return fields
+
+
+def _select(fields, columns):
+    return ", ".join(f"{columns[f]} AS {f}" for f in fields)
+
+
+def load_categories(conn, fields=DEFAULT_CATEGORY_FIELDS):
+    rows = conn.execute(f"""
+        SELECT {_select(fields, CATEGORY_FIELDS)}
+        FROM guide_category c
+        ORDER BY c.category_id
+    """).fetchall()
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def load_category_items(conn, category_id, fields=DEFAULT_LIST_FIELDS, after=0, limit=20):
+    """category_id 의 항목을 item_id 순으로 after 다음부터 limit 개 읽습니다. (키셋 페이지 - 페이지 깊이와 무관하게 색인 탐색 1회)
+
+    (항목 목록, 다음 페이지 커서 또는 None) 을 반환합니다.
+    """
+    select_fields = fields if "item_id" in fields else fields + ("item_id",)
+    rows = conn.execute(f"""
+        SELECT {_select(select_fields, ITEM_FIELDS)}
+        FROM guide_item i
+        WHERE i.category_id = ? AND i.item_id > ?
+        ORDER BY i.item_id
+        LIMIT ?
+    """, (category_id, after, limit + 1)).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][select_fields.index("item_id")]
+    return [dict(zip(fields, row)) for row in rows], next_cursor
+
+
+def load_item(conn, item_id, fields=DEFAULT_DETAIL_FIELDS):
+    row = conn.execute(f"""
+        SELECT {_select(fields, ITEM_FIELDS)}
+        FROM guide_item i
+        WHERE i.item_id = ?
+    """, (item_id,)).fetchone()
+    return dict(zip(fields, row)) if row else None
+
+
+def guide_version_tag(version):
+    """가이드 버전 → ETag 재료 (버전이 튜플인 구버전 DB 도 같은 방식으로)"""
+    return hashlib.sha256(repr(version).encode("utf-8")).hexdigest()[:16]
+
+
+class CategoryIndex:
+    """가이드 버전 하나에 대한 카테고리 목록 (불변)"""
+
+    __slots__ = ("version", "categories", "ids", "body", "etag")
+
+    def __init__(self, version, categories):
+        self.version = version
+        self.categories = categories
+        self.ids = {c["category_id"] for c in categories}
+        self.body = json.dumps({"categories": categories}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = guide_version_tag(version)
+
+    def project(self, fields):
+        return [{f: c[f] for f in fields} for c in self.categories]
+
+
+class CategoryIndexCache:
+    """첫 화면용 카테고리 목록(항목 수 포함)을 가이드 버전별로 만들어 둡니다.
+
+    항목 수 집계는 가이드가 바뀔 때만 다시 하므로, 요청마다 드는 DB 작업은 버전 확인 쿼리 1회입니다.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._lock = threading.Lock()
+
+    def get(self, conn):
+        version = read_guide_version(conn)
+        index = self._index
+        if index is not None and index.version == version:
+            return index
+        with self._lock:
+            index = self._index
+            if index is None or index.version != version:
+                index = self._index = CategoryIndex(version, load_categories(conn))
+            return index
+
+
+category_index_cache = CategoryIndexCache()
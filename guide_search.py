@@ -0,0 +1,105 @@
+# guide_search.py
+import sqlite3
+
+# ----------------------------------------
+# ✅ 가이드 물품 검색 (FTS5 trigram, 짧은 검색어는 LIKE)
+# ----------------------------------------
+
+# trigram 토크나이저는 3글자 미만 검색어를 색인으로 찾을 수 없습니다. ("비닐" 등은 LIKE 로 처리)
+MIN_FTS_QUERY_LENGTH = 3
+
+NAME_WEIGHT = 10.0         # bm25 가중치: 이름 일치를 설명 일치보다 우선
+DESCRIPTION_WEIGHT = 1.0
+
+
+def fts_phrase_query(terms):
+    """검색어 목록을 FTS5 질의로 바꿉니다. 각 단어를 따옴표 구문으로 감싸 AND 검색"""
+    return " AND ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def _like_filters(short_terms):
+    """짧은 검색어마다 이름 또는 설명에 포함되어야 한다는 조건 (SQL 조각, 파라미터)"""
+    sql = "".join(" AND (i.name LIKE ? OR i.description LIKE ?)" for _ in short_terms)
+    params = [value for term in short_terms for value in (f"%{term}%", f"%{term}%")]
+    return sql, params
+
+
+def search_guide_items(conn, query, limit=20):
+    """guide_item 을 검색해 관련도 순으로 반환합니다. (name/snippet 에 <mark> 강조 포함)
+
+    3글자 이상 단어는 FTS5 색인으로 찾고, 짧은 단어는 그 결과를 LIKE 조건으로 거릅니다.
+    모든 단어가 짧으면 LIKE 검색만 수행합니다.
+    """
+    terms = (query or "").split()
+    if not terms:
+        return []
+
+    long_terms = [term for term in terms if len(term) >= MIN_FTS_QUERY_LENGTH]
+    short_terms = [term for term in terms if len(term) < MIN_FTS_QUERY_LENGTH]
+
+    if long_terms:
+        try:
+            return _search_fts(conn, long_terms, short_terms, limit)
+        except sqlite3.OperationalError as e:
+            # FTS 테이블이 없는 구버전 DB 또는 FTS5 미지원 SQLite
+            print(f"❌ FTS 검색 불가, LIKE 검색으로 대체: {e}")
+    return _search_like(conn, terms, limit)
+
+
+def _search_fts(conn, long_terms, short_terms, limit):
+    filter_sql, filter_params = _like_filters(short_terms)
+    rows = conn.execute(f"""
+        SELECT i.item_id, i.name, i.image_path, c.name AS category_name, c.icon,
+               highlight(guide_item_fts, 0, '<mark>', '</mark>') AS name_highlight,
+               snippet(guide_item_fts, 1, '<mark>', '</mark>', '…', 24) AS snippet,
+               bm25(guide_item_fts, ?, ?) AS score
+        FROM guide_item_fts
+        JOIN guide_item i ON i.item_id = guide_item_fts.rowid
+        JOIN guide_category c ON c.category_id = i.category_id
+        WHERE guide_item_fts MATCH ?{filter_sql}
+        ORDER BY score
+        LIMIT ?
+    """, (NAME_WEIGHT, DESCRIPTION_WEIGHT, fts_phrase_query(long_terms), *filter_params, limit)).fetchall()
+
+    return [{
+        "item_id": row[0],
+        "name": row[1],
+        "image_path": row[2],
+        "category": row[3],
+        "icon": row[4],
+        "name_highlight": row[5],
+        "snippet": row[6],
+        "score": round(-row[7], 4),  # bm25 는 작을수록 관련도가 높음 → 부호를 바꿔 큰 값이 상위
+    } for row in rows]
+
+
+def _search_like(conn, terms, limit):
+    """짧은 검색어용: 이름에 포함된 단어가 많은 항목을 앞에 둡니다."""
+    filter_sql, filter_params = _like_filters(terms)
+    name_score_sql = " + ".join("(i.name LIKE ?)" for _ in terms)
+    rows = conn.execute(f"""
+        SELECT i.item_id, i.name, i.image_path, c.name AS category_name, c.icon,
+               ({name_score_sql}) AS name_matches
+        FROM guide_item i
+        JOIN guide_category c ON c.category_id = i.category_id
+        WHERE 1 = 1{filter_sql}
+        ORDER BY name_matches DESC, i.item_id
+        LIMIT ?
+    """, (*[f"%{term}%" for term in terms], *filter_params, limit)).fetchall()
+
+    results = []
+    for row in rows:
+        name_highlight = row[1]
+        for term in terms:
+            name_highlight = name_highlight.replace(term, f"<mark>{term}</mark>")
+        results.append({
+            "item_id": row[0],
+            "name": row[1],
+            "image_path": row[2],
+            "category": row[3],
+            "icon": row[4],
+            "name_highlight": name_highlight,
+            "snippet": None,
+            "score": float(row[5]),
+        })
+    return results
@@ -0,0 +1,233 @@
+# http_client.py
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# ----------------------------------------
+# ✅ 외부 API 호출 공용 클라이언트 (연결 재사용 / 타임아웃 / 재시도 / 서킷 브레이커)
+# ----------------------------------------
+
+# 429 는 재시도하지 않고 그대로 반환합니다. (호출 측이 Retry-After 와 함께 사용자에게 알림 - 다시 보내면 이용 정책 위반)
+RETRY_STATUSES = {500, 502, 503, 504}
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class UpstreamUnavailable(Exception):
+    """서킷 브레이커가 열려 있어 외부 호출을 시도하지 않은 경우"""
+
+
+def retry_after_seconds(response):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 반환합니다. 없거나 읽을 수 없으면 None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """연속 실패가 failure_threshold 회 이상이면 reset_timeout 초 동안 호출을 막습니다.
+
+    시간이 지나면 한 번의 시험 호출(half-open)을 허용하고, 성공하면 다시 닫힙니다.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """성공도 실패도 아닌 응답(429 등) - 상태는 그대로 두고 시험 호출 자리만 돌려줍니다."""
+        with self._lock:
+            self._trial_running = False
+
+
+class LatencyHistogram:
+    """호스트별 응답 시간 분포 (Prometheus 형식과 같은 누적 버킷)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self.count = 0
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += ms
+
+    def snapshot(self):
+        with self._lock:
+            cumulative = []
+            running = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+                running += count
+                cumulative.append((bound, running))
+            return {"count": self.count, "sum_ms": round(self.total_ms, 1), "buckets": cumulative}
+
+
+class OutboundClient:
+    """호스트별 keep-alive 연결 풀을 공유하는 외부 HTTP 클라이언트"""
+
+    def __init__(self, connect_timeout=3.0, read_timeout=10.0, max_retries=2, backoff_base=0.2,
+                 backoff_max=2.0, pool_maxsize=10, failure_threshold=5, reset_timeout=30.0):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.pool_maxsize = pool_maxsize
+
+        self._session = None
+        self.breakers = {}
+        self.histograms = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """requests 세션은 첫 외부 호출 때 만듭니다. (import 시간 절약, 프리포크 서버에서는 워커마다 따로 생성)"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize, max_retries=0)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def _host_state(self, host):
+        with self._lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self.histograms[host] = LatencyHistogram()
+                self.errors[host] = 0
+            return self.breakers[host], self.histograms[host]
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        time.sleep(delay * random.uniform(0.5, 1.5))  # jitter: 동시 재시도가 몰리지 않도록
+
+    def get(self, url, params=None, headers=None, timeout=None, max_retries=None):
+        """GET 요청을 보냅니다. 연결 오류/타임아웃/재시도 대상 상태 코드는 max_retries 회까지 재시도합니다.
+
+        재시도 대상 응답에 Retry-After 가 있으면 그만큼 기다리고, backoff_max 보다 길면 재시도하지 않고 반환합니다.
+        호출 횟수 제한이 있는 API(Nominatim 등)는 max_retries=0 으로 한 번만 보냅니다.
+        최종 응답을 그대로 반환하므로 상태 코드 확인(raise_for_status)은 호출하는 쪽에서 합니다.
+        """
+        import requests
+
+        host = urlsplit(url).netloc
+        breaker, histogram = self._host_state(host)
+        retries = self.max_retries if max_retries is None else max_retries
+
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                raise UpstreamUnavailable(f"{host} 호출이 일시 중단되었습니다. (연속 실패로 서킷 열림)")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+            except requests.RequestException as e:
+                # 어떤 요청 오류든 실패로 기록해야 half-open 시험 호출 자리가 풀립니다.
+                histogram.observe((time.perf_counter() - started) * 1000)
+                breaker.record_failure()
+                with self._lock:
+                    self.errors[host] += 1
+                retryable = isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                if not retryable or attempt == retries:
+                    raise
+                self._backoff(attempt)
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+
+            histogram.observe((time.perf_counter() - started) * 1000)
+            if response.status_code >= 500:
+                breaker.record_failure()
+                with self._lock:
+                    self.errors[host] += 1
+            elif response.status_code == 429:
+                breaker.release()
+            else:
+                breaker.record_success()
+
+            if response.status_code in RETRY_STATUSES and attempt < retries:
+                wait = retry_after_seconds(response)
+                if wait is not None and wait > self.backoff_max:
+                    return response
+                response.close()
+                if wait is None:
+                    self._backoff(attempt)
+                else:
+                    time.sleep(wait)
+                continue
+            return response
+
+    def snapshot_stats(self):
+        """호스트별 서킷 상태, 오류 수, 지연 시간 히스토그램"""
+        with self._lock:
+            hosts = list(self.breakers)
+        return {
+            host: {
+                "circuit": self.breakers[host].state,
+                "errors": self.errors[host],
+                "latency_ms": self.histograms[host].snapshot(),
+            }
+            for host in hosts
+        }
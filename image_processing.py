@@ -0,0 +1,85 @@
+# image_processing.py
+import base64
+import binascii
+import io
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# ----------------------------------------
+# ✅ Vision 요청용 이미지 전처리 (EXIF 회전 → 축소 → JPEG 재압축)
+# ----------------------------------------
+
+# gpt-4o 는 이미지를 2048x2048 안으로 맞춘 뒤 짧은 변을 768px 로 줄여 분석하므로,
+# 그보다 큰 해상도는 전송 비용만 늘립니다.
+VISION_MAX_LONG_SIDE = 2048
+VISION_MAX_SHORT_SIDE = 768
+JPEG_QUALITY = 85
+
+
+class InvalidImage(Exception):
+    """이미지로 해석할 수 없는 업로드"""
+
+
+class ImageTooLarge(Exception):
+    """픽셀 수 제한을 넘는 이미지 (디코딩 전에 헤더만 보고 거부)"""
+
+
+def load_image(fileobj, max_pixels):
+    """헤더로 크기를 먼저 확인한 뒤 이미지를 디코딩합니다."""
+    try:
+        image = Image.open(fileobj)  # 이 시점에는 헤더만 읽음
+    except Image.DecompressionBombError:
+        raise ImageTooLarge("이미지 해상도가 너무 큽니다.")
+    except (UnidentifiedImageError, OSError):
+        raise InvalidImage("이미지 파일 형식을 인식할 수 없습니다.")
+
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ImageTooLarge(f"이미지 해상도가 너무 큽니다. ({width}x{height})")
+
+    try:
+        image.load()
+    except (OSError, Image.DecompressionBombError) as e:
+        raise InvalidImage(f"이미지 파일을 읽을 수 없습니다: {e}")
+    return image
+
+
+def downscale_for_vision(image):
+    """EXIF 방향을 적용하고 Vision 모델이 실제로 쓰는 해상도까지 줄인 RGB 이미지를 반환합니다."""
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    long_side, short_side = max(image.size), min(image.size)
+    scale = min(1.0, VISION_MAX_LONG_SIDE / long_side, VISION_MAX_SHORT_SIDE / short_side)
+    if scale < 1.0:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+    return image
+
+
+def encode_jpeg(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def prepare_vision_image(fileobj, max_pixels):
+    """업로드된 이미지 파일 → (축소된 RGB 이미지, JPEG 바이트)"""
+    image = downscale_for_vision(load_image(fileobj, max_pixels))
+    return image, encode_jpeg(image)
+
+
+def decode_data_url(data_url):
+    """data:image/...;base64,... 문자열을 바이트로 디코딩합니다. (기존 JSON 업로드 경로용)"""
+    header, _, payload = (data_url or "").partition(",")
+    if not header.startswith("data:") or ";base64" not in header:
+        raise InvalidImage("지원하지 않는 이미지 데이터 형식입니다.")
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidImage(f"이미지 데이터를 디코딩할 수 없습니다: {e}")
+
+
+def to_data_url(jpeg_bytes):
+    return "data:image/jpeg;base64," + base64.b64encode(jpeg_bytes).decode("ascii")
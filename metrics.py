@@ -0,0 +1,106 @@
+# metrics.py
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+from http_client import LatencyHistogram
+
+# ----------------------------------------
+# ✅ 단계별 처리 시간 / 카운터 (Prometheus 텍스트 형식, Server-Timing 헤더)
+# ----------------------------------------
+
+STAGE_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PREFIX = "smart_recycle"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels)
+    return "{" + body + "}"
+
+
+def histogram_lines(name, labels, snapshot, scale=1000):
+    """LatencyHistogram.snapshot() (ms) → 초 단위 Prometheus 히스토그램 줄 (scale=1 이면 관측값 단위 그대로 - 예: 토큰 수)"""
+    lines = []
+    for bound, count in snapshot["buckets"]:
+        le = "+Inf" if bound == "+Inf" else repr(bound / scale)
+        lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {count}")
+    lines.append(f"{name}_sum{_labels(labels)} {snapshot['sum_ms'] / scale}")
+    lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+class MetricsRegistry:
+    """(엔드포인트, 단계)별 처리 시간 히스토그램과 이름/라벨별 누적 카운터"""
+
+    def __init__(self, buckets=STAGE_BUCKETS_MS):
+        self.buckets = buckets
+        self._stages = {}    # (endpoint, stage) -> LatencyHistogram
+        self._counters = {}  # (name, ((label, value), ...)) -> 값
+        self._lock = threading.Lock()
+
+    def observe_stage(self, endpoint, stage, ms):
+        key = (endpoint, stage)
+        histogram = self._stages.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._stages.setdefault(key, LatencyHistogram(self.buckets))
+        histogram.observe(ms)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self):
+        with self._lock:
+            stages = sorted(self._stages.items())
+            counters = sorted(self._counters.items())
+
+        lines = [
+            f"# HELP {PREFIX}_stage_duration_seconds Time spent in each stage of a request.",
+            f"# TYPE {PREFIX}_stage_duration_seconds histogram",
+        ]
+        for (endpoint, stage), histogram in stages:
+            lines += histogram_lines(f"{PREFIX}_stage_duration_seconds",
+                                     (("endpoint", endpoint), ("stage", stage)), histogram.snapshot())
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {PREFIX}_{name} counter")
+                typed.add(name)
+            lines.append(f"{PREFIX}_{name}{_labels(labels)} {value}")
+        return lines
+
+
+registry = MetricsRegistry()
+
+
+def record(stage, started):
+    """started(perf_counter)부터 지금까지를 현재 요청의 stage 시간으로 기록합니다."""
+    ms = (time.perf_counter() - started) * 1000
+    if has_request_context():
+        registry.observe_stage(request.endpoint or "unknown", stage, ms)
+        g.setdefault("_spans", []).append((stage, ms))
+    return ms
+
+
+@contextmanager
+def span(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, started)
+
+
+def server_timing_header():
+    """현재 요청에서 기록된 단계들 → Server-Timing 헤더 값 (없으면 None)"""
+    spans = g.get("_spans")
+    if not spans:
+        return None
+    return ", ".join(f"{stage};dur={ms:.1f}" for stage, ms in spans)
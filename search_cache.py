@@ -0,0 +1,86 @@
+# search_cache.py
+import re
+import threading
+import unicodedata
+
+from cache_utils import TTLCache, SQLiteTTLStore
+
+# ----------------------------------------
+# ✅ 검색어 정규화
+# ----------------------------------------
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """캐시 키용 검색어 정규화: 한글 NFC 결합, 소문자, 문장부호 제거, 공백 정리
+
+    "페트병  버리는 법?" 과 "페트병 버리는 법" 이 같은 키가 됩니다.
+    """
+    text = unicodedata.normalize("NFC", query or "").lower()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+# ----------------------------------------
+# ✅ Google CSE 결과 캐시 (메모리 LRU → SQLite 공유 계층)
+# ----------------------------------------
+
+class SearchCache:
+    """정규화된 검색어 단위로 (sources, error) 결과를 캐싱합니다.
+
+    성공 결과는 ttl 동안, 실패 결과(오류 또는 빈 결과)는 negative_ttl 동안 보관해
+    같은 질문이 짧은 시간에 반복될 때 API 할당량을 다시 쓰지 않게 합니다.
+    """
+
+    def __init__(self, db_path, memory_size=2048, ttl=7 * 86400, negative_ttl=300):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.memory = TTLCache(maxsize=memory_size, ttl=ttl)
+        self.store = SQLiteTTLStore(db_path, "search_cache")
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "negative_hits": 0, "stores": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def make_key(query, count):
+        return f"{count}:{normalize_query(query)}"
+
+    def get(self, query, count):
+        """캐시된 (sources, error)를 반환합니다. 없으면 None."""
+        key = self.make_key(query, count)
+        entry = self.memory.get(key)
+        if entry is not None:
+            self._count("memory_hits")
+        else:
+            found = self.store.get(key)
+            if found is None:
+                self._count("misses")
+                return None
+            entry, remaining = found
+            self._count("db_hits")
+            self.memory.set(key, entry, ttl=remaining)  # 메모리 계층도 같은 시각에 만료
+
+        if entry["error"] is not None or not entry["sources"]:
+            self._count("negative_hits")
+        return entry["sources"], entry["error"]
+
+    def set(self, query, count, sources, error):
+        key = self.make_key(query, count)
+        entry = {"sources": sources, "error": error}
+        ttl = self.ttl if error is None and sources else self.negative_ttl
+        self.memory.set(key, entry, ttl=ttl)
+        self.store.set(key, entry, ttl)
+        self._count("stores")
+
+    def snapshot_stats(self):
+        """카운터 복사본과 적중률(hit_ratio)을 반환합니다."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
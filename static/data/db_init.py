@@ -1,8 +1,25 @@
 # db_init.py
+import argparse
+import csv
+import hashlib
+import json
 import os
 import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from collection_schedule import ScheduleParseError, compile_district_schedule  # noqa: E402
+from district_aliases import city_alias_rows, district_alias_rows  # noqa: E402
+from static_assets import load_manifest, rewrite_image_path  # noqa: E402
 
 DATABASE = 'smart_recycle.db'
+# static_assets.py 빌드 결과 - 있으면 image_path 를 /assets/img/<hash>-<최대 너비> 로 바꿔 넣습니다.
+STATIC_DIST_DIR = os.environ.get(
+    "STATIC_DIST_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dist")
+)
 
 # --------------------
 # ⚠️ DATA 정의: 기존 recycle_info.json 및 disposal_guide.json의 전체 내용
@@ -47,6 +64,22 @@ RECYCLE_INFO_DATA = {
   }
 }
 
+# 시/구 추가 별칭 (옛 이름, 도 이름을 붙인 표기, 영문 표기) - 접미사 생략형("서울", "분당")은 자동 생성
+CITY_ALIAS_DATA = {
+  "서울특별시": ["Seoul"],
+  "부산광역시": ["Busan"],
+  "성남시": ["경기도 성남시", "Seongnam-si"],
+  "수원시": ["경기도 수원시", "Suwon-si"],
+}
+
+DISTRICT_ALIAS_DATA = {
+  ("서울특별시", "강남구"): ["Gangnam-gu"],
+  ("서울특별시", "서초구"): ["Seocho-gu"],
+  ("성남시", "분당구"): ["성남시 분당구", "Bundang-gu"],
+  ("수원시", "영통구"): ["수원시 영통구", "Yeongtong-gu"],
+  ("부산광역시", "해운대구"): ["Haeundae-gu"],
+}
+
 DISPOSAL_GUIDE_DATA = {
   "categories": [
     {
@@ -174,6 +207,23 @@ DISPOSAL_GUIDE_DATA = {
 }
 
 
+# 대량 적재 시 삭제 후 마지막에 한 번에 다시 만드는 보조 색인
+SECONDARY_INDEXES = {
+    "idx_recycle_detail_district": "recycle_detail (district_id, info_type)",
+    "idx_district_alias_district": "district_alias (district_id)",
+}
+
+
+def create_secondary_indexes(conn):
+    for name, target in SECONDARY_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+def drop_secondary_indexes(conn):
+    for name in SECONDARY_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
 def create_tables(conn):
     """DB 테이블 생성 (DDL)"""
     cursor = conn.cursor()
@@ -183,8 +233,9 @@ def create_tables(conn):
         CREATE TABLE IF NOT EXISTS city_district (
             district_id INTEGER PRIMARY KEY AUTOINCREMENT,
             city_name TEXT NOT NULL,         
-            district_name TEXT NOT NULL UNIQUE,     
-            discharge_time TEXT NOT NULL
+            district_name TEXT NOT NULL,     
+            discharge_time TEXT NOT NULL,
+            UNIQUE (city_name, district_name)  -- "중구"처럼 여러 시에 같은 구 이름이 있음
         );
     """)
 
@@ -200,6 +251,26 @@ def create_tables(conn):
         );
     """)
 
+    # 2-1. CITY_ALIAS / DISTRICT_ALIAS 테이블 (정규화된 별칭 → 표준 시 이름 / district_id)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS city_alias (
+            alias TEXT PRIMARY KEY,
+            city_name TEXT NOT NULL,
+            alias_type TEXT NOT NULL
+        ) WITHOUT ROWID;
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS district_alias (
+            city_name TEXT NOT NULL,
+            alias TEXT NOT NULL,
+            district_id INTEGER NOT NULL,
+            alias_type TEXT NOT NULL,        -- name / variant / legacy / english
+            PRIMARY KEY (city_name, alias),
+            FOREIGN KEY (district_id) REFERENCES city_district(district_id)
+        ) WITHOUT ROWID;
+    """)
+    create_secondary_indexes(conn)
+
     # 3. GUIDE_CATEGORY 테이블
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS guide_category (
@@ -220,95 +291,478 @@ def create_tables(conn):
             FOREIGN KEY (category_id) REFERENCES guide_category(category_id)
         );
     """)
-    conn.commit()
+
+    # 5. GUIDE_META 테이블 (가이드 변경 버전 - 서버의 가이드 스냅샷 무효화용)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS guide_meta (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        );
+    """)
+    # 새 DB 파일마다 시작 버전을 무작위로 잡아, 재생성 후 버전 번호가 우연히 겹치지 않게 합니다.
+    cursor.execute("INSERT OR IGNORE INTO guide_meta (id, version) VALUES (1, abs(random() % 1000000000))")
+
+    for table in ("guide_category", "guide_item"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_bump_version
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE guide_meta SET version = version + 1 WHERE id = 1;
+                END;
+            """)
+
+    # 6. GUIDE_ITEM_FTS 가상 테이블 (가이드 검색용 FTS5 - trigram 토크나이저로 한글 부분 일치 지원)
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS guide_item_fts USING fts5(
+            name,
+            description,
+            content='guide_item',
+            content_rowid='item_id',
+            tokenize='trigram'
+        );
+    """)
+    # guide_item 변경 시 색인을 함께 갱신하는 트리거 (external content 테이블 표준 방식)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS guide_item_fts_insert AFTER INSERT ON guide_item BEGIN
+            INSERT INTO guide_item_fts (rowid, name, description) VALUES (new.item_id, new.name, new.description);
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS guide_item_fts_delete AFTER DELETE ON guide_item BEGIN
+            INSERT INTO guide_item_fts (guide_item_fts, rowid, name, description) VALUES ('delete', old.item_id, old.name, old.description);
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS guide_item_fts_update AFTER UPDATE ON guide_item BEGIN
+            INSERT INTO guide_item_fts (guide_item_fts, rowid, name, description) VALUES ('delete', old.item_id, old.name, old.description);
+            INSERT INTO guide_item_fts (rowid, name, description) VALUES (new.item_id, new.name, new.description);
+        END;
+    """)
+    # 트리거 이전에 들어간 행이 있으면 색인을 다시 만듭니다.
+    cursor.execute("INSERT INTO guide_item_fts (guide_item_fts) VALUES ('rebuild')")
+
+    # 7. SEED_STATE 테이블 (데이터셋별 마지막 시드 내용 해시 - 바뀌지 않았으면 시드 생략)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS seed_state (
+            name TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            seeded_at TEXT NOT NULL
+        );
+    """)
     print("✅ DB 테이블 생성 완료.")
 
 
-def insert_recycle_info(conn, data):
-    """CityDistrict와 RecycleDetail 데이터 삽입 (Pure SQL DML)"""
-    cursor = conn.cursor()
+def rebuild_city_district_unique_key(conn):
+    """구버전 DB: district_name 단독 UNIQUE → (city_name, district_name) UNIQUE 로 테이블을 다시 만듭니다."""
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'city_district'").fetchone()[0]
+    if "UNIQUE (city_name, district_name)" in sql:
+        return
+    conn.execute("""
+        CREATE TABLE city_district_new (
+            district_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            city_name TEXT NOT NULL,
+            district_name TEXT NOT NULL,
+            discharge_time TEXT NOT NULL,
+            UNIQUE (city_name, district_name)  -- "중구"처럼 여러 시에 같은 구 이름이 있음
+        );
+    """)
+    conn.execute("""
+        INSERT INTO city_district_new (district_id, city_name, district_name, discharge_time)
+        SELECT district_id, city_name, district_name, discharge_time FROM city_district
+    """)
+    conn.execute("DROP TABLE city_district")
+    conn.execute("ALTER TABLE city_district_new RENAME TO city_district")
+
+
+def create_guide_item_category_index(conn):
+    """카테고리별 항목 페이지(WHERE category_id = ? AND item_id > ? ORDER BY item_id)와 항목 수 집계용 색인.
+
+    item_id 는 rowid 이므로 (category_id) 색인 항목에 이미 item_id 순서가 들어 있습니다.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_guide_item_category ON guide_item (category_id)")
+
+
+def schedule_rows(district_id, discharge_time, recyclables):
+    """구 하나의 배출시간/품목 규칙 → collection_schedule 행 (해석하지 못하면 빈 목록 - 조회 시 "시간표 없음")"""
+    try:
+        rows = compile_district_schedule(discharge_time, recyclables)
+    except ScheduleParseError as e:
+        print(f"❌ 배출시간 해석 실패 (district_id={district_id}): {e}")
+        return []
+    return [(district_id, *row) for row in rows]
+
+
+def insert_collection_schedules(conn, rows):
+    conn.executemany("""
+        INSERT OR REPLACE INTO collection_schedule (district_id, item_name, slots, rule, note)
+        VALUES (?, ?, ?, ?, ?)
+    """, rows)
+
+
+def create_collection_schedule(conn):
+    """배출 가능 시간표 테이블을 만들고 기존 city_district / recycle_detail 로 채웁니다."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS collection_schedule (
+            district_id INTEGER NOT NULL,
+            item_name TEXT NOT NULL,         -- '' 는 지역 배출시간 전체
+            slots BLOB NOT NULL,             -- 월요일 0시부터 30분 단위 7×48 비트 (42바이트, 리틀 엔디언)
+            rule TEXT NOT NULL,              -- 해석한 원문
+            note TEXT,                       -- 시간으로 바꾸지 못한 부가 설명 (예: "녹색 그물망")
+            PRIMARY KEY (district_id, item_name),
+            FOREIGN KEY (district_id) REFERENCES city_district(district_id)
+        ) WITHOUT ROWID;
+    """)
+    recyclables = {}
+    for district_id, item, value in conn.execute(
+        "SELECT district_id, item_name, info_value FROM recycle_detail WHERE info_type = '재활용품' ORDER BY detail_id"
+    ):
+        recyclables.setdefault(district_id, {})[item] = value
+    rows = [
+        row
+        for district_id, discharge_time in conn.execute("SELECT district_id, discharge_time FROM city_district")
+        for row in schedule_rows(district_id, discharge_time, recyclables.get(district_id, {}))
+    ]
+    insert_collection_schedules(conn, rows)
+
+
+def create_district_meta(conn):
+    """지역 데이터 변경 버전 (실행 중인 워커의 별칭 사전 / 시간표 색인 무효화용 - guide_meta 와 같은 방식)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS district_meta (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        );
+    """)
+    conn.execute("INSERT OR IGNORE INTO district_meta (id, version) VALUES (1, abs(random() % 1000000000))")
+
+
+def bump_district_version(conn):
+    conn.execute("UPDATE district_meta SET version = version + 1 WHERE id = 1")
+
+
+# --------------------
+# 스키마 마이그레이션 (PRAGMA user_version 으로 적용 버전 기록)
+# --------------------
+
+# 항상 끝에 추가만 합니다. 각 단계는 한 트랜잭션에서 실행되고 성공하면 user_version 이 올라갑니다.
+MIGRATIONS = [
+    (1, "기본 스키마 (IF NOT EXISTS - 이전 DB에는 빠진 테이블만 추가)", create_tables),
+    (2, "city_district 고유 키를 (city_name, district_name) 로 변경", rebuild_city_district_unique_key),
+    (3, "guide_item 카테고리 색인 추가 (카테고리별 항목 페이지 조회)", create_guide_item_category_index),
+    (4, "배출 가능 시간표(collection_schedule) 추가 및 기존 지역 데이터로 채우기", create_collection_schedule),
+    (5, "지역 데이터 변경 버전(district_meta) 추가", create_district_meta),
+]
+
+
+def connect_writer(db_path=DATABASE):
+    """시드/가져오기용 쓰기 연결 (트랜잭션은 write_transaction 으로 직접 관리)"""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")   # 쓰는 동안에도 다른 워커의 읽기를 막지 않음
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@contextmanager
+def write_transaction(conn):
+    """BEGIN IMMEDIATE: 여러 워커가 동시에 시작해도 쓰기 잠금을 먼저 잡은 하나만 진행합니다."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def migrate(conn):
+    """아직 적용되지 않은 마이그레이션만 순서대로 실행합니다."""
+    for version, description, apply in MIGRATIONS:
+        with write_transaction(conn):
+            # 잠금을 잡은 뒤에 버전을 다시 읽어, 다른 워커가 이미 적용한 단계는 건너뜁니다.
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                continue
+            print(f"➡️ 마이그레이션 {version}: {description}")
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+
+
+# --------------------
+# 지역 데이터 적재 (시드 / 대량 가져오기 공용)
+# --------------------
+
+def content_hash(data):
+    return hashlib.sha256(json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def district_records(data, city_aliases=None, district_aliases=None):
+    """RECYCLE_INFO_DATA 형태의 중첩 dict → 가져오기 레코드 목록"""
+    city_aliases = city_aliases or {}
+    district_aliases = district_aliases or {}
+    return [{
+        "city_name": city,
+        "district_name": district,
+        "discharge_time": info["배출시간"],
+        "재활용품": info.get("재활용품", {}),
+        "봉투색상": info.get("봉투색상", {}),
+        "aliases": district_aliases.get((city, district), []),
+        "city_aliases": city_aliases.get(city, []),
+    } for city, districts in data.items() for district, info in districts.items()]
+
+
+def import_district_records(conn, records, defer_indexes=False):
+    """시/구 레코드를 upsert 합니다. (호출한 쪽의 트랜잭션 안에서 실행, 처리 통계 반환)
+
+    같은 (시, 구)는 district_id 를 유지한 채 배출시간을 갱신하고 상세 규정/별칭을 교체합니다.
+    defer_indexes=True 이면 보조 색인을 지웠다가 적재가 끝난 뒤 한 번에 다시 만듭니다.
+    """
+    started = time.perf_counter()
+    if defer_indexes:
+        drop_secondary_indexes(conn)
+
+    # 1. CityDistrict upsert
+    conn.executemany("""
+        INSERT INTO city_district (city_name, district_name, discharge_time)
+        VALUES (?, ?, ?)
+        ON CONFLICT (city_name, district_name) DO UPDATE SET discharge_time = excluded.discharge_time
+    """, [(r["city_name"], r["district_name"], r["discharge_time"]) for r in records])
+    district_ids = {
+        (city, district): district_id
+        for district_id, city, district in conn.execute("SELECT district_id, city_name, district_name FROM city_district")
+    }
+    ids = [(district_ids[r["city_name"], r["district_name"]],) for r in records]
+
+    # 2. 이번에 들어온 구의 기존 상세 규정/별칭 삭제 (임시 테이블로 한 번에 - 색인이 없어도 전체 스캔 1회)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS import_district_ids (district_id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM import_district_ids")
+    conn.executemany("INSERT OR IGNORE INTO import_district_ids (district_id) VALUES (?)", ids)
+    conn.execute("DELETE FROM recycle_detail WHERE district_id IN (SELECT district_id FROM import_district_ids)")
+    conn.execute("DELETE FROM district_alias WHERE district_id IN (SELECT district_id FROM import_district_ids)")
+    conn.execute("DELETE FROM collection_schedule WHERE district_id IN (SELECT district_id FROM import_district_ids)")
+
+    # 3. RecycleDetail (재활용품 / 봉투색상) 삽입
+    details = [
+        (district_id, info_type, item, value)
+        for (district_id,), r in zip(ids, records)
+        for info_type in ("재활용품", "봉투색상")
+        for item, value in r[info_type].items()
+    ]
+    conn.executemany("""
+        INSERT INTO recycle_detail (district_id, info_type, item_name, info_value)
+        VALUES (?, ?, ?, ?)
+    """, details)
+
+    # 3-1. 배출 가능 시간표 (배출시간 + 재활용품 요일 → 주간 비트맵)
+    schedules = [
+        row
+        for (district_id,), r in zip(ids, records)
+        for row in schedule_rows(district_id, r["discharge_time"], r["재활용품"])
+    ]
+    insert_collection_schedules(conn, schedules)
+
+    # 4. CityAlias / DistrictAlias 삽입
+    #    표준 이름은 다른 구의 축약형/옛 이름을 덮어쓰고(REPLACE), 나머지는 먼저 들어온 것을 유지합니다(IGNORE).
+    city_rows = {}
+    for r in records:
+        for alias, alias_type in city_alias_rows(r["city_name"], r.get("city_aliases", ())):
+            city_rows.setdefault(alias, (alias, r["city_name"], alias_type))
+    name_rows, other_rows = [], []
+    for (district_id,), r in zip(ids, records):
+        for alias, alias_type in district_alias_rows(r["district_name"], r.get("aliases", ())):
+            (name_rows if alias_type == "name" else other_rows).append((r["city_name"], alias, district_id, alias_type))
+    conn.executemany("INSERT OR IGNORE INTO city_alias (alias, city_name, alias_type) VALUES (?, ?, ?)", list(city_rows.values()))
+    conn.executemany("""
+        INSERT OR REPLACE INTO district_alias (city_name, alias, district_id, alias_type)
+        VALUES (?, ?, ?, ?)
+    """, name_rows)
+    conn.executemany("""
+        INSERT OR IGNORE INTO district_alias (city_name, alias, district_id, alias_type)
+        VALUES (?, ?, ?, ?)
+    """, other_rows)
+
+    if defer_indexes:
+        create_secondary_indexes(conn)
+    # 행 단위 트리거 대신 가져오기 한 번에 한 번 - 같은 트랜잭션에서 커밋되므로 워커는 새 데이터와 새 버전을 함께 봅니다.
+    bump_district_version(conn)
+
+    seconds = time.perf_counter() - started
+    rows = len(records) + len(details) + len(schedules) + len(city_rows) + len(name_rows) + len(other_rows)
+    return {
+        "districts": len(records),
+        "details": len(details),
+        "schedules": len(schedules),
+        "aliases": len(name_rows) + len(other_rows),
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds) if seconds > 0 else None,
+    }
+
+
+def insert_recycle_info(conn, data, city_aliases=None, district_aliases=None):
+    """CityDistrict / RecycleDetail / 별칭 데이터 삽입 (Pure SQL DML)"""
     print("➡️ 지역별 분리수거 정보 삽입 시작...")
-    
-    for city, districts in data.items():
-        for district_key, info in districts.items():
-            # 1. CityDistrict 삽입
-            cursor.execute("""
-                INSERT INTO city_district (city_name, district_name, discharge_time) 
-                VALUES (?, ?, ?)
-            """, (city, district_key, info["배출시간"]))
-            
-            # 삽입된 행의 ID를 가져옵니다.
-            district_id = cursor.lastrowid 
-            
-            # 2. RecycleDetail (재활용품) 삽입
-            recycle_details = []
-            for item, value in info["재활용품"].items():
-                recycle_details.append((district_id, "재활용품", item, value))
-                
-            # 3. RecycleDetail (봉투색상) 삽입
-            for item, value in info["봉투색상"].items():
-                recycle_details.append((district_id, "봉투색상", item, value))
-            
-            cursor.executemany("""
-                INSERT INTO recycle_detail (district_id, info_type, item_name, info_value) 
-                VALUES (?, ?, ?, ?)
-            """, recycle_details)
-
-    conn.commit()
-    print("✅ 지역별 분리수거 정보 삽입 완료.")
-
-
-def insert_disposal_guide(conn, data):
-    """GuideCategory와 GuideItem 데이터 삽입 (Pure SQL DML)"""
+    stats = import_district_records(conn, district_records(data, city_aliases, district_aliases))
+    print(f"✅ 지역별 분리수거 정보 삽입 완료. ({stats['districts']}개 시/구)")
+    return stats
+
+
+def insert_disposal_guide(conn, data, manifest=None):
+    """GuideCategory와 GuideItem 데이터 삽입 (Pure SQL DML) - 기존 가이드는 교체합니다.
+
+    manifest(static_assets 빌드 결과)에 있는 이미지는 해시 경로(/assets/img/<hash>-<최대 너비>)로 바꿔 저장합니다.
+    """
+    manifest = manifest or {"images": {}}
     cursor = conn.cursor()
     print("➡️ 분리수거 가이드 정보 삽입 시작...")
-    
+
+    # 삭제 트리거가 FTS 색인과 guide_meta 버전을 함께 갱신합니다.
+    cursor.execute("DELETE FROM guide_item")
+    cursor.execute("DELETE FROM guide_category")
+
     for category_data in data["categories"]:
         # 1. GuideCategory 삽입
         cursor.execute("""
-            INSERT INTO guide_category (name, icon) 
+            INSERT INTO guide_category (name, icon)
             VALUES (?, ?)
         """, (category_data["name"], category_data["icon"]))
-        
+
         category_id = cursor.lastrowid
-        
+
         # 2. GuideItem 삽입
         item_details = []
         for item_data in category_data["items"]:
-            item_details.append((category_id, item_data["name"], item_data["description"],item_data.get("image_path","")))
+            image_path = rewrite_image_path(item_data.get("image_path", ""), manifest)
+            item_details.append((category_id, item_data["name"], item_data["description"], image_path))
 
         cursor.executemany("""
-            INSERT INTO guide_item (category_id, name, description,image_path) 
+            INSERT INTO guide_item (category_id, name, description,image_path)
             VALUES (?, ?, ?, ?)
         """, item_details)
-            
-    conn.commit()
+
     print("✅ 분리수거 가이드 정보 삽입 완료.")
 
 
-def init_db_with_data():
-    """데이터베이스 초기화 및 데이터 삽입을 수행하는 메인 함수"""
-    # 기존 DB 파일이 있으면 삭제하고 새로 만듭니다. (개발 환경용)
-    if os.path.exists(DATABASE):
-        os.remove(DATABASE)
-        print(f"💡 기존 {DATABASE} 파일을 삭제했습니다.")
+def seed_dataset(conn, name, data, apply, force=False):
+    """data 의 내용 해시가 마지막 시드와 같으면 건너뛰고, 다르면 apply(conn, data) 후 해시를 기록합니다."""
+    digest = content_hash(data)
+    with write_transaction(conn):
+        row = conn.execute("SELECT content_hash FROM seed_state WHERE name = ?", (name,)).fetchone()
+        if row and row[0] == digest and not force:
+            print(f"💡 {name}: 변경 없음, 시드 생략")
+            return False
+        apply(conn, data)
+        conn.execute("""
+            INSERT INTO seed_state (name, content_hash, seeded_at) VALUES (?, ?, datetime('now'))
+            ON CONFLICT (name) DO UPDATE SET content_hash = excluded.content_hash, seeded_at = excluded.seeded_at
+        """, (name, digest))
+    return True
+
 
-    # DB 연결
-    conn = sqlite3.connect(DATABASE)
+def init_db_with_data(db_path=DATABASE, force=False, conn=None):
+    """스키마 마이그레이션 후 내장 데이터를 시드합니다. (내용이 바뀐 데이터셋만 다시 넣음)
+
+    conn 을 주면 그 쓰기 연결(autocommit 모드)을 사용하고 닫지 않습니다.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = connect_writer(db_path)
     try:
-        # 테이블 생성
-        create_tables(conn)
-        
-        # 데이터 삽입
-        insert_recycle_info(conn, RECYCLE_INFO_DATA)
-        insert_disposal_guide(conn, DISPOSAL_GUIDE_DATA)
-        
+        migrate(conn)
+
+        recycle_info = {
+            "districts": RECYCLE_INFO_DATA,
+            "city_aliases": CITY_ALIAS_DATA,
+            "district_aliases": sorted(DISTRICT_ALIAS_DATA.items()),
+        }
+        seed_dataset(conn, "recycle_info", recycle_info, lambda c, _: insert_recycle_info(
+            c, RECYCLE_INFO_DATA, CITY_ALIAS_DATA, DISTRICT_ALIAS_DATA
+        ), force)
+        # 이미지를 다시 빌드하면 해시 경로가 바뀌므로 manifest 의 이미지 목록도 내용 해시에 포함합니다.
+        manifest = load_manifest(STATIC_DIST_DIR)
+        disposal_guide = {"guide": DISPOSAL_GUIDE_DATA, "images": manifest["images"]}
+        seed_dataset(conn, "disposal_guide", disposal_guide, lambda c, _: insert_disposal_guide(
+            c, DISPOSAL_GUIDE_DATA, manifest
+        ), force)
+
         print("🎉 데이터베이스 초기화 및 데이터 삽입이 모두 완료되었습니다.")
     except Exception as e:
         print(f"❌ 데이터베이스 초기화 중 오류 발생: {e}")
+    finally:
+        if own_conn:
+            conn.close()
+
+
+# --------------------
+# 대량 가져오기 (JSON / CSV)
+# --------------------
+
+def load_district_file(path):
+    """가져올 파일을 레코드 목록으로 읽습니다.
+
+    - JSON: RECYCLE_INFO_DATA 와 같은 {시: {구: {...}}} 형태 또는 레코드 배열
+    - CSV : city_name, district_name, discharge_time 열 + "재활용품:<품목>", "봉투색상:<품목>" 열,
+            선택 열 aliases ("|" 로 구분)
+    """
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return district_records(data)
+        return [{
+            "city_name": r["city_name"],
+            "district_name": r["district_name"],
+            "discharge_time": r["discharge_time"],
+            "재활용품": r.get("재활용품", {}),
+            "봉투색상": r.get("봉투색상", {}),
+            "aliases": r.get("aliases", []),
+            "city_aliases": r.get("city_aliases", []),
+        } for r in data]
+
+    records = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            record = {
+                "city_name": row["city_name"].strip(),
+                "district_name": row["district_name"].strip(),
+                "discharge_time": row["discharge_time"].strip(),
+                "재활용품": {},
+                "봉투색상": {},
+                "aliases": [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()],
+            }
+            for column, value in row.items():
+                info_type, _, item = (column or "").partition(":")
+                if info_type in ("재활용품", "봉투색상") and item and value and value.strip():
+                    record[info_type][item.strip()] = value.strip()
+            records.append(record)
+    return records
+
+
+def import_district_files(paths, db_path=DATABASE):
+    """파일들을 한 트랜잭션으로 가져옵니다. (WAL, executemany, 보조 색인 지연 생성)"""
+    conn = connect_writer(db_path)
+    try:
+        migrate(conn)
+        records = [record for path in paths for record in load_district_file(path)]
+        with write_transaction(conn):
+            stats = import_district_records(conn, records, defer_indexes=True)
+        print(f"✅ 가져오기 완료: 시/구 {stats['districts']}개, 상세 {stats['details']}개, 별칭 {stats['aliases']}개 "
+              f"- {stats['seconds']}초 ({stats['rows_per_sec']} rows/sec)")
+        return stats
     finally:
         conn.close()
 
+
 if __name__ == '__main__':
-    # 이 파일 단독 실행 시 DB 초기화
-    init_db_with_data()
+    # 사용법: python static/data/db_init.py                 (마이그레이션 + 내장 데이터 시드)
+    #         python static/data/db_init.py --force         (내용이 같아도 다시 시드)
+    #         python static/data/db_init.py --import a.csv b.json
+    parser = argparse.ArgumentParser(description="DB 마이그레이션 / 시드 / 지역 데이터 가져오기")
+    parser.add_argument("--db", default=DATABASE)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--import", dest="import_paths", nargs="+", metavar="FILE")
+    args = parser.parse_args()
+
+    if args.import_paths:
+        import_district_files(args.import_paths, args.db)
+    else:
+        init_db_with_data(args.db, force=args.force)
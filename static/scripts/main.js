@@ -4,8 +4,15 @@ console.log("JS 파일 로드됨 (최종 통합 버전)");
 // ✅ 전역 변수: 위치 정보 및 가이드 데이터 저장
 // ----------------------------------------
 let userLocation = { city: null, districtKey: null, districtOriginal: null }; 
-let guideData = null; // 가이드 데이터 캐싱
-let uploadedImageBase64 = null; 
+let guideIndex = null;              // 카테고리 목록 { categories: [{ category_id, name, icon, item_count }] }
+const guideItemPages = new Map();   // category_id → { items, nextCursor } (불러온 항목 페이지, nextCursor 가 null 이면 끝)
+const guideItemDetails = new Map(); // item_id → 항목 상세 (설명 포함, 처음 열 때 한 번만 요청)
+const GUIDE_PAGE_SIZE = 30;
+const GUIDE_ITEM_ANCHOR = /#guide-item-(\d+)$/; // 챗봇 출처 링크 (/final#guide-item-<id>) → 항목 상세 창
+localStorage.removeItem("guideCache"); // 이전 버전이 저장하던 전체 가이드 사본 정리
+let chatSessionId = null;            // 서버 대화 세션 ID (후속 질문이 앞 대화를 이어 받도록 매 요청에 보냄)
+let uploadedImageFile = null;        // 첨부한 원본 파일 (multipart 로 그대로 전송)
+let uploadedImagePreviewUrl = null;  // 미리보기/채팅 버블용 object URL
 
 // ----------------------------------------
 // UI 요소 정의
@@ -43,53 +50,44 @@ function error(err) {
   document.getElementById("location-info-display").innerHTML = `<p class="text-center">📍 위치 정보를 가져올 수 없습니다.</p>`;
 }
 
-// 2️⃣ Reverse Geocoding 및 DB 조회
+// 2️⃣ 행정구역 판별 + 지역 정보 + 가이드를 한 번에 조회 (/bootstrap)
 async function getAddress(lat, lon) {
-  console.log("서버로 Reverse Geocoding 요청 시작");
+  console.log("서버로 bootstrap 요청 시작");
+  const container = document.getElementById("location-info-display");
+  const categoryGrid = document.getElementById("category-grid");
+
   try {
-    const response = await fetch("/reverse-geocode", {
+    const response = await fetch("/bootstrap", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ latitude: lat, longitude: lon })
+      body: JSON.stringify({
+        latitude: lat,
+        longitude: lon,
+        guideMode: "index" // 가이드는 카테고리 목록만 받고 항목/설명은 열 때 요청
+      })
     });
 
     const data = await response.json();
     if (data.error) throw new Error(data.error);
 
-    const address = data.address;
-    const city = address.county || address.city || address.town || "알수없음"; 
-    let districtGu = address.city_district || address.suburb || ""; 
-    
-    if (!districtGu && data.display_name && data.display_name.includes("분당구")) {
-        districtGu = "분당구";
-    }
-
-    let districtName = districtGu || city; 
-    const districtKey = districtName.replace(/\s/g, "");
-    const districtOriginal = `${city} ${districtName}`.trim().replace(/\s+/g, ' '); 
-    
+    const { city, districtKey, districtOriginal } = data.location;
     userLocation = { city, districtKey, districtOriginal }; 
 
-    loadRecycleInfo(city, districtKey, districtOriginal);
+    renderRecycleInfo(data, districtOriginal);
 
   } catch (err) {
-    console.error("Reverse Geocoding 중 오류:", err);
-    document.getElementById("location-info-display").innerHTML = `<p class="text-center">📍 위치 API 호출 중 오류가 발생했습니다.</p>`;
+    console.error("bootstrap 중 오류:", err);
+    container.innerHTML = `<p class="text-center">📍 위치 API 호출 중 오류가 발생했습니다.</p>`;
+    categoryGrid.innerHTML = `<p class="text-red-500 col-span-3">가이드 정보를 불러오는데 실패했습니다.</p>`;
   }
 }
-    
-async function loadRecycleInfo(city, districtKey, districtOriginal) {
-  const container = document.getElementById("location-info-display");
-  const categoryGrid = document.getElementById("category-grid");
 
-  try {
-    const res = await fetch("/get-recycle-info", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ city: city, districtKey: districtKey })
-    });
-    
-    const data = await res.json();
+/**
+ * /bootstrap (또는 /get-recycle-info) 응답의 지역 정보와 가이드를 화면에 반영합니다.
+ */
+function renderRecycleInfo(data, districtOriginal) {
+    const container = document.getElementById("location-info-display");
+    const categoryGrid = document.getElementById("category-grid");
 
     // 위치 정보 처리 (생략, 기존 로직 그대로)
     const info = data.location_info; 
@@ -120,20 +118,15 @@ async function loadRecycleInfo(city, districtKey, districtOriginal) {
       `;
     }
 
-    // 가이드 정보 처리
-    guideData = data.guide_data; 
+    // 가이드 정보 처리 (카테고리 목록만 - 항목은 카테고리를 열 때 불러옴)
+    guideIndex = data.guide_index;
     
-    if (guideData && guideData.categories) {
+    if (guideIndex && guideIndex.categories) {
         renderCategories(); 
+        openGuideItemFromHash(); // 출처 링크를 새 탭으로 연 경우
     } else {
         categoryGrid.innerHTML = `<p class="text-red-500 col-span-3">가이드 정보를 불러오는데 실패했습니다.</p>`;
     }
-
-  } catch (err) {
-    console.error("DB API 로드 중 오류:", err);
-    container.innerHTML = `<p class="text-center">📍 분리수거 정보 로드 중 오류 발생.</p>`;
-    categoryGrid.innerHTML = `<p class="text-red-500 col-span-3">가이드 정보를 불러오는데 실패했습니다.</p>`;
-  }
 }
 
 // ----------------------------------------
@@ -144,73 +137,136 @@ function renderCategories() {
     const categoryGrid = document.getElementById("category-grid");
     categoryGrid.innerHTML = ''; 
     
-    if (!guideData || !guideData.categories) return;
+    if (!guideIndex || !guideIndex.categories) return;
 
-    guideData.categories.forEach(category => {
+    guideIndex.categories.forEach(category => {
         const categoryDiv = document.createElement('div');
         categoryDiv.className = 'p-3 bg-white rounded-lg shadow-sm text-center cursor-pointer hover:bg-emerald-50 transition';
         categoryDiv.innerHTML = `
             <div class="text-3xl">${category.icon}</div>
             <p class="mt-1 text-sm font-medium">${category.name}</p>
+            <p class="text-xs text-gray-400">${category.item_count}개</p>
         `;
-        categoryDiv.addEventListener('click', () => showCategoryItems(category.name));
+        categoryDiv.addEventListener('click', () => showCategoryItems(category.category_id));
         categoryGrid.appendChild(categoryDiv);
     });
 }
 
-function showCategoryItems(categoryName) {
+// 빌드된 이미지(/assets/img/<hash>-<원본 쪽 최대 너비>)는 너비 구간(-64, -128 ...)을 srcset 으로 골라 받습니다.
+// 최대 너비보다 큰 구간은 그 너비로 바꿔 w 값이 실제 파일 너비와 맞게 합니다. (형식은 서버가 Accept 로 선택)
+const GUIDE_IMAGE_WIDTHS = [64, 128];
+function guideImageAttrs(path, cssPx) {
+    const match = path.match(/^(\/assets\/img\/[0-9a-f]+)-(\d+)$/);
+    if (!match) return `src="${path}"`;
+    const [, base, maxWidth] = match;
+    const widths = [...new Set(GUIDE_IMAGE_WIDTHS.map(w => Math.min(w, Number(maxWidth))))];
+    const srcset = widths.map(w => `${base}-${w} ${w}w`).join(", ");
+    return `src="${base}-${widths[0]}" srcset="${srcset}" sizes="${cssPx}px" loading="lazy" decoding="async"`;
+}
+
+/**
+ * 카테고리의 다음 항목 페이지를 불러와 guideItemPages 에 덧붙입니다. (설명 없이 id/이름/이미지만)
+ */
+async function loadMoreItems(categoryId) {
+    const page = guideItemPages.get(categoryId) || { items: [], nextCursor: 0 };
+    guideItemPages.set(categoryId, page);
+    if (page.nextCursor === null) return page;
+
+    const res = await fetch(`/guide/categories/${categoryId}/items?limit=${GUIDE_PAGE_SIZE}&cursor=${page.nextCursor}`);
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.error || `HTTP ${res.status}`);
+    page.items.push(...data.items);
+    page.nextCursor = data.next_cursor;
+    return page;
+}
+
+async function showCategoryItems(categoryId) {
     const categoryGrid = document.getElementById("category-grid");
     const itemListContainer = document.getElementById("item-list-container");
-    const category = guideData.categories.find(c => c.name === categoryName);
+    const category = guideIndex.categories.find(c => c.category_id === categoryId);
 
     if (!category) return;
 
     categoryGrid.classList.add('hidden');
     itemListContainer.classList.remove('hidden');
-
     itemListContainer.innerHTML = `
         <h3 class="text-xl font-semibold text-gray-800 mb-3">${category.icon} ${category.name} <span class="text-sm text-gray-500 float-right cursor-pointer" onclick="goBackToCategories()">← 뒤로</span></h3>
-        <div class="space-y-2">
-            ${category.items.map(item => `
-                <div class="p-3 bg-gray-50 rounded-lg shadow-sm flex justify-between items-center cursor-pointer hover:bg-gray-100 transition" 
-                     onclick="showItemDescription('${categoryName}', '${item.name}')">
-                    
-                    <div class="flex items-center space-x-3">
-                        ${item.image_path ?
-                            `<img src="${item.image_path}" alt="${item.name}" class="w-8 h-8 object-contain rounded"/>`
-                            : `<span class="w-8 h-8 text-xl flex items-center justify-center">📦</span>`}
-                        <span class="font-medium">${item.name}</span>
-                    </div>
-
-                    <span class="text-emerald-500">자세히 보기 →</span>
+        <div id="guide-item-rows" class="space-y-2"><p class="text-sm text-gray-400">불러오는 중...</p></div>
+    `;
+
+    try {
+        const page = guideItemPages.get(categoryId) || await loadMoreItems(categoryId);
+        renderItemRows(categoryId, page);
+    } catch (err) {
+        console.error("가이드 항목 로드 중 오류:", err);
+        document.getElementById("guide-item-rows").innerHTML = `<p class="text-red-500">항목을 불러오지 못했습니다.</p>`;
+    }
+}
+
+function renderItemRows(categoryId, page) {
+    document.getElementById("guide-item-rows").innerHTML = `
+        ${page.items.map(item => `
+            <div class="p-3 bg-gray-50 rounded-lg shadow-sm flex justify-between items-center cursor-pointer hover:bg-gray-100 transition" 
+                 data-item-id="${item.item_id}" onclick="showItemDescription(${item.item_id})">
+                
+                <div class="flex items-center space-x-3">
+                    ${item.image_path ?
+                        `<img ${guideImageAttrs(item.image_path, 32)} alt="${item.name}" class="w-8 h-8 object-contain rounded"/>`
+                        : `<span class="w-8 h-8 text-xl flex items-center justify-center">📦</span>`}
+                    <span class="font-medium">${item.name}</span>
                 </div>
-            `).join('')}
-        </div>
+
+                <span class="text-emerald-500">자세히 보기 →</span>
+            </div>
+        `).join('')}
+        ${page.nextCursor !== null ? `
+            <button class="w-full p-2 text-sm text-emerald-600 hover:bg-emerald-50 rounded-lg" onclick="showMoreItems(${categoryId})">더 보기</button>
+        ` : ''}
     `;
 }
 
+async function showMoreItems(categoryId) {
+    try {
+        renderItemRows(categoryId, await loadMoreItems(categoryId));
+    } catch (err) {
+        console.error("가이드 항목 로드 중 오류:", err);
+    }
+}
+
 function goBackToCategories() {
     document.getElementById("category-grid").classList.remove('hidden');
     document.getElementById("item-list-container").classList.add('hidden');
 }
 
-function showItemDescription(categoryName, itemName) {
-    const category = guideData.categories.find(c => c.name === categoryName);
-    if (!category) return;
-    const item = category.items.find(i => i.name === itemName);
+async function showItemDescription(itemId) {
+    try {
+        let item = guideItemDetails.get(itemId);
+        if (!item) {
+            const res = await fetch(`/guide/items/${itemId}?fields=category_id,name,description,image_path`);
+            item = await res.json();
+            if (!res.ok) throw new Error(item.error || `HTTP ${res.status}`);
+            guideItemDetails.set(itemId, item);
+        }
+        const category = guideIndex && guideIndex.categories.find(c => c.category_id === item.category_id);
 
-    if (item) {
         // ✅ 이미지 경로가 있으면 <img> 태그 사용, 없으면 카테고리 아이콘(이모지) 사용
         const imageHtml = item.image_path 
-            ? `<img src="${item.image_path}" alt="${item.name}" class="inline-block w-6 h-6 mr-2 object-contain align-middle"/>` 
-            : `${category.icon} `; // 이미지 없으면 기존 카테고리 이모지 사용
+            ? `<img ${guideImageAttrs(item.image_path, 24)} alt="${item.name}" class="inline-block w-6 h-6 mr-2 object-contain align-middle"/>` 
+            : `${category ? category.icon : "📦"} `; // 이미지 없으면 기존 카테고리 이모지 사용
             
         document.getElementById('modal-title').innerHTML = `${imageHtml} ${item.name}`;
         document.getElementById('modal-description').innerText = item.description;
         document.getElementById("item-modal").showModal();
+    } catch (err) {
+        console.error("가이드 항목 상세 로드 중 오류:", err);
     }
 }
 
+function openGuideItemFromHash() {
+    const match = location.hash.match(GUIDE_ITEM_ANCHOR);
+    if (match) showItemDescription(Number(match[1]));
+}
+
 function closeModal() { 
     document.getElementById("item-modal").close();
 }
@@ -238,14 +294,14 @@ async function handleUnifiedChat() {
     const userMessage = chatInput.value.trim();
     
     // 이미지도 없고 메시지도 없으면 전송 방지
-    if (!userMessage && !uploadedImageBase64) return;
+    if (!userMessage && !uploadedImageFile) return;
     
     // 1. 사용자 메시지 렌더링
-    const displayMessage = uploadedImageBase64 ? 
+    const displayMessage = uploadedImageFile ? 
                            (userMessage || "이미지 분석 요청") : 
                            userMessage;
                            
-    appendMessage(displayMessage, 'user', false, uploadedImageBase64);
+    appendMessage(displayMessage, 'user', false, uploadedImagePreviewUrl);
     chatInput.value = '';
     
     // 2. 로딩 메시지 렌더링
@@ -253,37 +309,64 @@ async function handleUnifiedChat() {
     sendChatBtn.disabled = true;
     removeImageBtn.disabled = true;
 
-    const currentImageBase64 = uploadedImageBase64; 
+    const currentImageFile = uploadedImageFile; 
     
-    // 3. 서버 호출 (통합 엔드포인트 사용)
+    // 3. 서버 호출 (스트리밍 엔드포인트 - 토큰이 도착하는 대로 표시)
     try {
-        const response = await fetch("/chatbot-unified-chat", {
+        // 이미지는 base64 로 바꾸지 않고 원본 파일을 multipart 로 전송 (서버에서 축소/재압축)
+        const formData = new FormData();
+        formData.append("message", userMessage);
+        if (chatSessionId) {
+            formData.append("session_id", chatSessionId);
+        }
+        if (userLocation.districtOriginal) {
+            formData.append("location", userLocation.districtOriginal);
+        }
+        if (currentImageFile) {
+            formData.append("image", currentImageFile);
+        }
+
+        if (currentImageFile) {
+            // 이미지 분석은 작업 큐에 제출하고 완료 이벤트를 기다립니다. (서버 웹 워커를 붙잡지 않음)
+            const result = await runVisionJob(formData, loadingElement);
+            chatSessionId = result.session_id || chatSessionId;
+            loadingElement.classList.remove('loading-message');
+            loadingElement.innerText = result.response;
+            chatbotSourceContainer.classList.add('hidden'); // 이미지 분석 시 출처 숨김
+            return;
+        }
+
+        const response = await fetch("/chatbot-unified-chat/stream", {
             method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ 
-                message: userMessage, 
-                image_data_url: currentImageBase64, 
-                location: userLocation.districtOriginal 
-            })
+            body: formData
         });
 
-        const data = await response.json();
+        if (!response.ok) {
+            const data = await response.json();
+            throw new Error(data.error || `HTTP ${response.status}`);
+        }
 
-        // 4. 응답 렌더링
-        if (data.error) {
-            loadingElement.innerHTML = `<span class="text-red-500">❌ 오류: ${data.error}</span>`;
-            renderSources(data.sources); 
-        } else {
-            loadingElement.classList.remove('loading-message');
-            loadingElement.innerText = data.response;
-            
-            // 이미지 첨부가 없었으면 출처 표시 (RAG)
-            if (!currentImageBase64) {
-                renderSources(data.sources); 
-            } else {
-                chatbotSourceContainer.classList.add('hidden'); // 이미지 분석 시 출처 숨김
+        let answerText = "";
+        let sources = [];
+
+        // 4. 응답 렌더링 (SSE 이벤트 단위)
+        await readEventStream(response, (event, data) => {
+            if (event === "sources") {
+                sources = data.sources;
+                chatSessionId = data.session_id || chatSessionId;
+            } else if (event === "token") {
+                if (!answerText) {
+                    loadingElement.classList.remove('loading-message');
+                }
+                answerText += data.text;
+                loadingElement.innerText = answerText;
+                scrollToBottom(chatMessagesContainer);
+            } else if (event === "error") {
+                loadingElement.innerHTML = `<span class="text-red-500">❌ 오류: ${data.error}</span>`;
             }
-        }
+        });
+
+        renderSources(sources); // 출처 표시 (RAG)
 
     } catch (err) {
         loadingElement.innerHTML = `<span class="text-red-500">❌ 네트워크 오류가 발생했습니다.</span>`;
@@ -293,39 +376,80 @@ async function handleUnifiedChat() {
         removeImageBtn.disabled = false;
         
         // 이미지를 첨부해서 보냈다면, 전송 후 미리보기 제거
-        if (currentImageBase64) {
-            removeImagePreview();
+        if (currentImageFile) {
+            removeImagePreview(false); // 채팅 버블이 같은 object URL 을 쓰므로 해제하지 않음
         }
         scrollToBottom(chatMessagesContainer);
     }
 }
 
 
+/**
+ * /vision-jobs 에 이미지 분석을 제출하고 결과({ response, cached })를 반환합니다.
+ * 대기열이 가득 차면(429) Retry-After 만큼 기다렸다 다시 제출하며, 대기 중에는 순번을 표시합니다.
+ */
+async function runVisionJob(formData, loadingElement) {
+    let response;
+    for (let attempt = 0; attempt < 3; attempt++) {
+        response = await fetch("/vision-jobs", { method: "POST", body: formData });
+        if (response.status !== 429) break;
+        const retryAfter = Number(response.headers.get("Retry-After")) || 5;
+        loadingElement.innerText = `분석 요청이 많아 ${retryAfter}초 후 다시 시도합니다...`;
+        await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+    }
+    const job = await response.json();
+    if (!response.ok) throw new Error(job.error || `HTTP ${response.status}`);
+    if (job.status === "done") return job.result;
+
+    return new Promise((resolve, reject) => {
+        const events = new EventSource(job.events_url);
+        events.addEventListener("status", (e) => {
+            const data = JSON.parse(e.data);
+            loadingElement.innerText = data.status === "queued" && data.position
+                ? `분석 대기 중... (앞에 ${data.position}건)`
+                : "이미지를 분석하고 있습니다...";
+        });
+        events.addEventListener("done", (e) => {
+            events.close();
+            resolve(JSON.parse(e.data).result);
+        });
+        events.addEventListener("error", (e) => {
+            events.close();
+            // 서버가 보낸 error 이벤트에는 data 가 있고, 연결 오류에는 없습니다.
+            reject(new Error(e.data ? JSON.parse(e.data).error : "이벤트 스트림 연결 오류"));
+        });
+    });
+}
+
+
 // --------------------
 // 이미지 첨부 및 제거 로직
 // --------------------
 
-// 파일이 선택되면 미리보기를 표시하고 Base64 저장
+// 파일이 선택되면 미리보기를 표시하고 파일 객체 저장 (base64 변환 없음)
 cameraInput.addEventListener('change', (event) => {
     const file = event.target.files[0];
     if (file) {
-        const reader = new FileReader();
-        reader.onload = function(e) {
-            uploadedImageBase64 = e.target.result; 
-            imagePreview.src = uploadedImageBase64;
-            imagePreviewContainer.classList.remove('hidden');
-            chatInput.placeholder = "이미지와 함께 질문하거나, 바로 전송하세요.";
-        };
-        reader.readAsDataURL(file); 
+        removeImagePreview();
+        uploadedImageFile = file;
+        uploadedImagePreviewUrl = URL.createObjectURL(file);
+        imagePreview.src = uploadedImagePreviewUrl;
+        imagePreviewContainer.classList.remove('hidden');
+        chatInput.placeholder = "이미지와 함께 질문하거나, 바로 전송하세요.";
         event.target.value = null; 
     }
 });
 
 /**
- * 미리보기 이미지를 제거하고 Base64 변수를 초기화합니다.
+ * 미리보기 이미지를 제거하고 첨부 파일 변수를 초기화합니다.
+ * revoke 가 true 이면 (전송하지 않고 제거한 경우) object URL 도 해제합니다.
  */
-function removeImagePreview() {
-    uploadedImageBase64 = null;
+function removeImagePreview(revoke = true) {
+    if (revoke && uploadedImagePreviewUrl) {
+        URL.revokeObjectURL(uploadedImagePreviewUrl);
+    }
+    uploadedImageFile = null;
+    uploadedImagePreviewUrl = null;
     imagePreview.src = '';
     imagePreviewContainer.classList.add('hidden');
     chatInput.placeholder = "분리수거에 대해 질문해 주세요...";
@@ -334,31 +458,32 @@ function removeImagePreview() {
 
 /**
  * 분리배출 가이드 검색을 처리하고, 해당 항목이 있는 카테고리로 이동합니다.
+ * (검색은 서버의 /guide/search 에서 수행 - 관련도 1위 항목으로 이동)
  */
-function handleGuideSearch() {
-    const query = guideSearchInput.value.trim().toLowerCase();
-    if (!query || !guideData || !guideData.categories) return;
+async function handleGuideSearch() {
+    const query = guideSearchInput.value.trim();
+    if (!query || !guideIndex || !guideIndex.categories) return;
 
     let foundItem = null;
-    let foundCategoryName = null;
-
-    // 모든 카테고리를 순회하며 항목 검색
-    for (const category of guideData.categories) {
-        foundItem = category.items.find(item => 
-            item.name.toLowerCase().includes(query)
-        );
-        if (foundItem) {
-            foundCategoryName = category.name;
-            break; 
-        }
+
+    try {
+        const res = await fetch(`/guide/search?q=${encodeURIComponent(query)}&limit=1`);
+        const data = await res.json();
+        if (data.error) throw new Error(data.error);
+        foundItem = data.results[0] || null;
+    } catch (err) {
+        console.error("가이드 검색 중 오류:", err);
     }
 
-    if (foundItem) {
+    const category = foundItem && guideIndex.categories.find(c => c.name === foundItem.category);
+    if (category) {
         // 검색된 항목이 있으면 해당 카테고리 목록 화면으로 이동
-        showCategoryItems(foundCategoryName);
+        await showCategoryItems(category.category_id);
         
-        // 검색된 항목으로 스크롤하고 강조 (옵션)
-        highlightItem(foundItem.name);
+        // 검색된 항목으로 스크롤하고 강조 (아직 불러오지 않은 페이지에 있으면 상세 창을 바로 엶)
+        if (!highlightItem(foundItem.item_id)) {
+            showItemDescription(foundItem.item_id);
+        }
         
         // 검색창 초기화
         guideSearchInput.value = '';
@@ -368,11 +493,11 @@ function handleGuideSearch() {
 }
 
 /**
- * 항목 목록에서 검색된 아이템을 강조하고 스크롤합니다.
+ * 항목 목록에서 검색된 아이템을 강조하고 스크롤합니다. 목록에 없으면 false.
  */
-function highlightItem(itemName) {
+function highlightItem(itemId) {
     const itemContainer = document.getElementById("item-list-container");
-    const itemDiv = itemContainer.querySelector(`[onclick*="showItemDescription('${itemName}')"]`);
+    const itemDiv = itemContainer.querySelector(`[data-item-id="${itemId}"]`);
     
     if (itemDiv) {
         // 강조 효과 (예: 2초 동안 배경색 변경)
@@ -383,6 +508,7 @@ function highlightItem(itemName) {
             itemDiv.style.backgroundColor = ''; // 원래 배경색으로 복귀 (CSS 클래스 hover:bg-gray-100가 적용됨)
         }, 2000);
     }
+    return Boolean(itemDiv);
 }
 
 // --------------------
@@ -392,7 +518,7 @@ function highlightItem(itemName) {
 /**
  * 메시지를 채팅창에 추가합니다. (이미지 첨부 상태 반영)
  */
-function appendMessage(text, sender, isLoading = false, attachedImageBase64 = null) {
+function appendMessage(text, sender, isLoading = false, attachedImageUrl = null) {
     const messageDiv = document.createElement('div');
     messageDiv.classList.add(
         sender === 'user' ? 'user-message' : 'chatbot-message', 
@@ -401,9 +527,9 @@ function appendMessage(text, sender, isLoading = false, attachedImageBase64 = nu
     
     let contentHTML = ``;
     
-    if (attachedImageBase64 && sender === 'user') {
+    if (attachedImageUrl && sender === 'user') {
         // 사용자 메시지에 이미지가 첨부된 경우, 채팅 버블 내부에 이미지 삽입
-        contentHTML += `<img src="${attachedImageBase64}" class="max-h-32 mb-2 rounded-lg" alt="첨부 이미지"/>`;
+        contentHTML += `<img src="${attachedImageUrl}" class="max-h-32 mb-2 rounded-lg" alt="첨부 이미지"/>`;
     }
     
     // 텍스트 내용 추가 (로딩 처리 포함)
@@ -429,6 +555,36 @@ function appendMessage(text, sender, isLoading = false, attachedImageBase64 = nu
     return messageDiv;
 }
 
+/**
+ * fetch 응답 본문을 Server-Sent Events 로 읽어 이벤트마다 onEvent(event, data)를 호출합니다.
+ * (EventSource 는 POST 를 지원하지 않으므로 직접 파싱)
+ */
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = "message";
+            let data = "";
+            for (const line of rawEvent.split("\n")) {
+                if (line.startsWith("event:")) event = line.slice(6).trim();
+                else if (line.startsWith("data:")) data += line.slice(5).trim();
+            }
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
 /**
  * 출처 정보를 화면에 표시합니다.
  */
@@ -438,7 +594,17 @@ function renderSources(sources) {
     if (sources && sources.length > 0) {
         sources.forEach(source => {
             const sourceItem = document.createElement('div');
-            sourceItem.innerHTML = `<a href="${source.url}" target="_blank" class="text-blue-600 hover:underline">${source.title}</a>`;
+            const guideItem = (source.url || '').match(GUIDE_ITEM_ANCHOR);
+            if (guideItem) {
+                // 로컬 가이드 출처는 새 탭 대신 이 페이지의 항목 상세 창으로 엽니다.
+                sourceItem.innerHTML = `<a href="${source.url}" class="text-blue-600 hover:underline">${source.title}</a>`;
+                sourceItem.firstChild.addEventListener('click', (e) => {
+                    e.preventDefault();
+                    showItemDescription(Number(guideItem[1]));
+                });
+            } else {
+                sourceItem.innerHTML = `<a href="${source.url}" target="_blank" class="text-blue-600 hover:underline">${source.title}</a>`;
+            }
             sourceList.appendChild(sourceItem);
         });
         chatbotSourceContainer.classList.remove('hidden');
@@ -465,6 +631,7 @@ document.addEventListener('DOMContentLoaded', () => {
   }
 
   guideSearchBtn.addEventListener('click', handleGuideSearch);
+  window.addEventListener('hashchange', openGuideItemFromHash);
   guideSearchInput.addEventListener('keydown', (e) => {
       if (e.key === 'Enter') {
           handleGuideSearch();
@@ -0,0 +1,226 @@
+# static_assets.py
+# 사용법: python static_assets.py [--static static] [--out static/dist]
+#  - 가이드 이미지(image_path)와 static/images 의 모든 이미지를 너비 구간별 AVIF/WebP/JPEG 로 만들고,
+#    main.js / hw1.css 를 내용 해시 파일명으로 복사한 뒤 .gz(.br) 를 미리 압축해 둡니다.
+#  - 결과 파일 목록은 static/dist/manifest.json 에 기록되며, 앱은 /assets/... 로 이를 제공합니다.
+#  - 빌드 후 DB를 다시 시드하면(static/data/db_init.py) guide_item.image_path 가 해시 경로로 바뀝니다.
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+
+from flask import request, send_file
+from PIL import Image, ImageOps
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+try:
+    import brotli  # 선택 의존성: 없으면 .br 없이 .gz 만 만듭니다.
+except ImportError:
+    brotli = None
+
+# ----------------------------------------
+# ✅ 빌드 설정
+# ----------------------------------------
+
+IMAGE_WIDTHS = (64, 128, 256, 512)   # 썸네일 32px(@2x=64) ~ 상세 보기
+DEFAULT_IMAGE_WIDTH = 128            # 너비 없이 요청된 이미지 (/assets/img/<hash>)
+IMAGE_FORMATS = (("avif", "image/avif", {"quality": 55}), ("webp", "image/webp", {"quality": 80, "method": 6}),
+                 ("jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}))
+TEXT_ASSETS = ("scripts/main.js", "css/hw1.css")
+IMMUTABLE_MAX_AGE = 365 * 86400
+MANIFEST_NAME = "manifest.json"
+
+
+def file_digest(path, length=12):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:length]
+
+
+def _write_bytes(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _write_if_missing(path, write):
+    """해시 파일명은 내용이 같으면 이름도 같으므로, 이미 있으면 다시 만들지 않습니다."""
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write(path)
+
+
+def build_image(src, out_dir, widths=IMAGE_WIDTHS):
+    """원본 하나 → {"base": "img/<hash>", "width": 원본 너비, "variants": {실제 너비: {형식: 상대 경로}}}"""
+    digest = file_digest(src)
+    image = ImageOps.exif_transpose(Image.open(src))
+    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    # 원본보다 큰 구간은 원본 너비로 바꿔 만들고, 파일 이름도 실제 너비로 붙입니다.
+    # (225px 원본 → 64, 128, 225 / 40px 원본 → 40 - srcset 의 w 값이 실제 너비와 맞도록)
+    targets = sorted({min(w, image.width) for w in widths})
+    variants = {}
+    for width in targets:
+        resized = image if width >= image.width else image.resize(
+            (width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        # JPEG(대체) → WebP → AVIF 순으로 인코딩하고, 이미 고른 것보다 작을 때만 새 형식을 남깁니다.
+        # (작은 썸네일에서는 AVIF 헤더가 오히려 더 큰 경우가 있음)
+        formats, smallest = {}, None
+        for ext, _, options in reversed(IMAGE_FORMATS):
+            buffer = io.BytesIO()
+            (resized.convert("RGB") if ext == "jpg" else resized).save(buffer, ext.replace("jpg", "jpeg"), **options)
+            data = buffer.getvalue()
+            if smallest is not None and len(data) >= smallest:
+                continue
+            smallest = len(data)
+            name = f"img/{digest}-{width}.{ext}"
+            _write_if_missing(os.path.join(out_dir, name), lambda path: _write_bytes(path, data))
+            formats[ext] = name
+        variants[str(width)] = formats
+    return {"base": f"img/{digest}", "width": image.width, "variants": variants}
+
+
+def build_text_asset(src, rel_path, out_dir):
+    """main.js → scripts/main.<hash>.js (+ .gz, .br)"""
+    stem, ext = os.path.splitext(rel_path)
+    name = f"{stem}.{file_digest(src)}{ext}"
+    with open(src, "rb") as f:
+        data = f.read()
+    target = os.path.join(out_dir, name)
+    _write_if_missing(target, lambda path: _write_bytes(path, data))
+    _write_if_missing(target + ".gz", lambda path: _write_bytes(path, gzip.compress(data, 9, mtime=0)))
+    if brotli is not None:
+        _write_if_missing(target + ".br", lambda path: _write_bytes(path, brotli.compress(data, quality=11)))
+    return name
+
+
+def build_assets(static_dir, out_dir, image_paths=()):
+    """image_paths(/static/... URL) 와 static/images 전체, TEXT_ASSETS 를 빌드하고 manifest 를 씁니다."""
+    images_dir = os.path.join(static_dir, "images")
+    urls = set(image_paths)
+    if os.path.isdir(images_dir):
+        urls |= {f"/static/images/{name}" for name in os.listdir(images_dir)}
+
+    manifest = {"images": {}, "files": {}}
+    for url in sorted(urls):
+        src = os.path.join(static_dir, url[len("/static/"):])
+        if not os.path.isfile(src):
+            print(f"❌ 이미지 파일 없음: {url}")
+            continue
+        manifest["images"][url] = build_image(src, out_dir)
+        print(f"✅ {url} → {manifest['images'][url]['base']} ({', '.join(manifest['images'][url]['variants'])}px)")
+
+    for rel_path in TEXT_ASSETS:
+        src = os.path.join(static_dir, rel_path)
+        if os.path.isfile(src):
+            manifest["files"][rel_path] = build_text_asset(src, rel_path, out_dir)
+            print(f"✅ {rel_path} → {manifest['files'][rel_path]}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(out_dir):
+    """빌드 결과가 없으면 빈 manifest (원본 /static 경로를 그대로 사용)"""
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"images": {}, "files": {}}
+
+
+def rewrite_image_path(image_path, manifest):
+    """/static/images/헌 옷.jpeg → /assets/img/<hash>-<가장 큰 변형 너비> (빌드된 이미지가 없으면 원래 경로)
+
+    main.js 는 경로 끝의 너비로 그보다 작은 구간만 srcset 에 넣습니다.
+    """
+    entry = manifest["images"].get(image_path)
+    if not entry:
+        return image_path
+    return f"/assets/{entry['base']}-{max(int(width) for width in entry['variants'])}"
+
+
+# ----------------------------------------
+# ✅ /assets 제공 (immutable 캐시, Accept / Accept-Encoding 협상)
+# ----------------------------------------
+
+class AssetServer:
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.manifest = load_manifest(out_dir)
+        # "img/<hash>" → {너비(int): {형식: 경로}}
+        self.images = {
+            entry["base"]: {int(width): formats for width, formats in entry["variants"].items()}
+            for entry in self.manifest["images"].values()
+        }
+
+    def url(self, filename):
+        """템플릿용: 빌드된 해시 파일이 있으면 /assets/..., 없으면 /static/..."""
+        hashed = self.manifest["files"].get(filename)
+        return f"/assets/{hashed}" if hashed else f"/static/{filename}"
+
+    @staticmethod
+    def _accepts(mimetype):
+        # */* 만으로는 AVIF/WebP 지원을 알 수 없으므로 명시된 형식만 인정합니다.
+        return any(value == mimetype and quality > 0 for value, quality in request.accept_mimetypes)
+
+    def _image_file(self, name):
+        base, _, width = name.rpartition("-")
+        if base in self.images and width.isdigit():
+            width = int(width)
+        else:
+            base, width = name, DEFAULT_IMAGE_WIDTH
+        variants = self.images.get(base)
+        if variants is None:
+            raise NotFound()
+        # 요청 너비 이상인 가장 작은 구간, 없으면 가장 큰 구간
+        bucket = min((w for w in variants if w >= width), default=max(variants))
+        for ext, mimetype, _ in IMAGE_FORMATS:
+            if ext in variants[bucket] and (ext == "jpg" or self._accepts(mimetype)):
+                return variants[bucket][ext], mimetype
+
+    def serve(self, filename):
+        vary = "Accept-Encoding"
+        encoding = None
+        if filename.startswith("img/") and "." not in filename:
+            filename, mimetype = self._image_file(filename)
+            vary = "Accept"
+            path = safe_join(self.out_dir, filename)
+        else:
+            path = safe_join(self.out_dir, filename)
+            mimetype = None
+            if path and not filename.startswith("img/"):
+                for candidate, name in (("br", ".br"), ("gzip", ".gz")):
+                    if request.accept_encodings[candidate] and os.path.isfile(path + name):
+                        encoding, path = candidate, path + name
+                        break
+                mimetype = "text/javascript" if filename.endswith(".js") else "text/css"
+        if path is None or not os.path.isfile(path):
+            raise NotFound()
+
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=True, max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.content_encoding = encoding
+        response.vary.add(vary)
+        response.cache_control.public = True
+        response.cache_control.immutable = True  # 파일명이 내용 해시라 재검증 불필요
+        return response
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from static.data.db_init import DISPOSAL_GUIDE_DATA
+
+    parser = argparse.ArgumentParser(description="정적 파일 빌드 (이미지 변형, 해시 파일명, 사전 압축)")
+    parser.add_argument("--static", default="static")
+    parser.add_argument("--out", default=os.path.join("static", "dist"))
+    args = parser.parse_args()
+
+    guide_images = [item["image_path"] for category in DISPOSAL_GUIDE_DATA["categories"]
+                    for item in category["items"] if item.get("image_path")]
+    build_assets(args.static, args.out, guide_images)
@@ -0,0 +1,133 @@
+# vision_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+from search_cache import normalize_query
+
+# ----------------------------------------
+# ✅ 지각 해시 (dHash, 64비트)
+# ----------------------------------------
+
+def dhash(image, hash_size=8):
+    """이미지의 difference hash: 흑백 (hash_size+1)x hash_size 로 줄인 뒤 가로 인접 픽셀의 밝기 차 부호"""
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = small.tobytes()  # L 모드: 픽셀당 1바이트, 행 우선
+    value = 0
+    width = hash_size + 1
+    for row in range(hash_size):
+        offset = row * width
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+# ----------------------------------------
+# ✅ Vision 답변 캐시 (다중 인덱스 해시 테이블)
+# ----------------------------------------
+
+class VisionCache:
+    """같은 물건을 찍은 사진(해밍 거리 max_distance 이하)에 대해 저장된 Vision 답변을 돌려줍니다.
+
+    64비트 해시를 max_distance + 1 조각으로 나눠 조각별 사전에 색인합니다.
+    거리가 max_distance 이하인 두 해시는 비둘기집 원리에 따라 최소 한 조각이 정확히 같으므로,
+    조각이 일치하는 항목만 후보로 보고 실제 해밍 거리를 확인합니다.
+    질문 문구와 사용자 위치가 다르면 다른 항목으로 취급합니다.
+    """
+
+    def __init__(self, max_distance=5, maxsize=1000, ttl=7 * 86400, bits=64):
+        self.max_distance = max_distance
+        self.maxsize = maxsize
+        self.ttl = ttl
+        chunks = max_distance + 1
+        bounds = [round(i * bits / chunks) for i in range(chunks + 1)]
+        self._chunks = [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+
+        self._entries = OrderedDict()  # entry_id -> entry (삽입/사용 순서)
+        self._tables = [{} for _ in self._chunks]  # (scope, chunk 값) -> set(entry_id)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def scope(question, location):
+        return normalize_query(question or ""), normalize_query(location if location and location != "알수없음" else "")
+
+    def _chunk_keys(self, scope, image_hash):
+        return [(scope, (image_hash >> shift) & mask) for shift, mask in self._chunks]
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        for table, key in zip(self._tables, entry["chunk_keys"]):
+            ids = table.get(key)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del table[key]
+
+    def _expire(self, now):
+        # LRU 순서는 만료 시각 순서와 다르므로 전체를 훑어 만료 항목부터 정리합니다. (용량 초과 시에만 호출)
+        for entry_id in [i for i, e in self._entries.items() if e["expires_at"] <= now]:
+            self._remove(entry_id)
+
+    def lookup(self, image_hash, question, location):
+        """가장 가까운 저장 답변(dict: response, distance)을 반환합니다. 없으면 None."""
+        scope = self.scope(question, location)
+        now = time.time()
+        with self._lock:
+            candidates = set()
+            for table, key in zip(self._tables, self._chunk_keys(scope, image_hash)):
+                candidates |= table.get(key, set())
+
+            best_id, best_distance = None, self.max_distance + 1
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if entry["expires_at"] <= now:
+                    continue
+                distance = hamming(image_hash, entry["hash"])
+                if distance < best_distance:
+                    best_id, best_distance = entry_id, distance
+
+            if best_id is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.stats["hits"] += 1
+            return {"response": self._entries[best_id]["response"], "distance": best_distance}
+
+    def store(self, image_hash, question, location, response):
+        scope = self.scope(question, location)
+        now = time.time()
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            chunk_keys = self._chunk_keys(scope, image_hash)
+            self._entries[entry_id] = {
+                "hash": image_hash,
+                "response": response,
+                "chunk_keys": chunk_keys,
+                "expires_at": now + self.ttl,
+            }
+            for table, key in zip(self._tables, chunk_keys):
+                table.setdefault(key, set()).add(entry_id)
+            self.stats["stores"] += 1
+
+            if len(self._entries) > self.maxsize:
+                self._expire(now)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
@@ -0,0 +1,173 @@
+# vision_jobs.py
+import math
+import queue
+import threading
+import time
+import uuid
+
+from http_client import LatencyHistogram
+from metrics import STAGE_BUCKETS_MS
+
+# ----------------------------------------
+# ✅ Vision 분석 작업 큐 (전용 워커 풀 + 대기열 상한)
+# ----------------------------------------
+
+class QueueFull(Exception):
+    """대기열이 가득 차 작업을 받지 못한 경우 (retry_after: 다시 시도할 때까지 권장 대기 초)"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"이미지 분석 요청이 많습니다. {retry_after}초 후 다시 시도해 주세요.")
+        self.retry_after = retry_after
+
+
+class VisionJob:
+    def __init__(self, func=None):
+        self.id = uuid.uuid4().hex
+        self.func = func
+        self.status = "queued"   # queued → running → done | error
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.changed = threading.Condition()
+
+    def snapshot(self, position=None):
+        data = {"job_id": self.id, "status": self.status}
+        if position is not None:
+            data["position"] = position
+        if self.status == "done":
+            data["result"] = self.result
+        elif self.status == "error":
+            data["error"] = self.error
+        return data
+
+
+class VisionJobQueue:
+    """gpt-4o Vision 호출을 Flask 요청 스레드 밖의 고정된 워커 수로 처리합니다.
+
+    submit() 은 작업을 대기열에 넣고 바로 반환하며, 대기열이 max_queue 를 넘으면 QueueFull 을 던집니다.
+    OpenAI 로 동시에 나가는 Vision 호출은 workers 개를 넘지 않으므로, 사진 업로드가 몰려도
+    /get-recycle-info 같은 가벼운 요청을 처리할 웹 워커가 남습니다. 끝난 작업은 job_ttl 초 동안 조회할 수 있습니다.
+    """
+
+    def __init__(self, workers=2, max_queue=32, job_ttl=600):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.job_ttl = job_ttl
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self.wait_ms = LatencyHistogram(STAGE_BUCKETS_MS)  # 대기열에서 기다린 시간
+        self.run_ms = LatencyHistogram(STAGE_BUCKETS_MS)   # Vision 호출 처리 시간
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "running": 0}
+
+    def _start_workers(self):
+        # 첫 작업이 들어올 때 시작 (import 시점에 스레드를 만들지 않음 - 프리포크 서버 대비)
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"vision-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def retry_after(self):
+        """지금 대기열이 한 칸 빌 때까지의 예상 시간 (평균 처리 시간 기준, 1~60초)"""
+        run = self.run_ms.snapshot()
+        average_s = run["sum_ms"] / run["count"] / 1000 if run["count"] else 5.0
+        return max(1, min(60, math.ceil(average_s * (self._queue.qsize() + 1) / self.workers)))
+
+    def _purge(self, now):
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished is not None and now - job.finished > self.job_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, func):
+        """func() 의 반환값이 작업 결과가 됩니다. (예외는 error 상태로 기록)"""
+        self._start_workers()
+        job = VisionJob(func)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise QueueFull(self.retry_after())
+        with self._lock:
+            self._purge(job.created)
+            self._jobs[job.id] = job
+            self.stats["submitted"] += 1
+        return job
+
+    def add_finished(self, result):
+        """큐를 거치지 않고 끝난 작업 (Vision 캐시 적중) - 클라이언트는 같은 방식으로 결과를 조회합니다."""
+        job = VisionJob()
+        job.status, job.result, job.finished = "done", result, job.created
+        with self._lock:
+            self._purge(job.created)
+            self._jobs[job.id] = job
+        return job
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.started = time.time()
+            self.wait_ms.observe((job.started - job.created) * 1000)
+            with self._lock:
+                self.stats["running"] += 1
+            with job.changed:
+                job.status = "running"
+                job.changed.notify_all()
+
+            try:
+                result, status, error = job.func(), "done", None
+            except Exception as e:
+                print("❌ Vision 작업 실패:", e)
+                result, status, error = None, "error", str(e)
+
+            finished = time.time()
+            self.run_ms.observe((finished - job.started) * 1000)
+            with self._lock:
+                self.stats["running"] -= 1
+                self.stats["completed" if status == "done" else "failed"] += 1
+            with job.changed:
+                job.status, job.result, job.error, job.finished = status, result, error, finished
+                job.func = None
+                job.changed.notify_all()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job, timeout, seen_status=None):
+        """job 의 상태가 seen_status 와 달라지거나(기본: 끝날 때까지) timeout 초가 지나면 반환합니다. (롱 폴링/SSE 용)"""
+        with job.changed:
+            job.changed.wait_for(
+                lambda: job.status in ("done", "error") or (seen_status is not None and job.status != seen_status),
+                timeout,
+            )
+            return job.status
+
+    def position(self, job):
+        """대기 중인 작업 앞에 남은 작업 수 (대략값)"""
+        if job.status != "queued":
+            return None
+        with self._queue.mutex:
+            pending = list(self._queue.queue)
+        return pending.index(job) if job in pending else 0
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["jobs"] = len(self._jobs)
+        stats.update({
+            "depth": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "workers": self.workers,
+            "wait_ms": self.wait_ms.snapshot(),
+            "run_ms": self.run_ms.snapshot(),
+        })
+        return stats